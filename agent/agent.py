@@ -1,27 +1,88 @@
 from __future__ import annotations
+import asyncio
+import time
 from typing import AsyncGenerator
 from agent.events import AgentEvent, AgentEventType
+from agent.metrics import SessionMetrics
+from agent.replay import SessionRecorder
 from client.llm_client import LLMClient
-from client.response import StreamEventType
+from client.response import StreamEventType, canonical_json
 from context.contextmanager import ContextManager
-from tools.registry import create_default_registry
-from client.response import ToolCall, ToolResultMessage
+from context.file_tracker import FileTracker
+from tools.registry import ToolRegistry, create_default_registry
+from tools.base import ToolResult
+from tools.builtin.fetch_output import FetchOutputTool, spill_output
+from tools.mcp import get_mcp_manager
+from agent.subagents import SpawnSubagentsTool
+from client.response import TokenUsage, ToolCall, ToolResultMessage
 from pathlib import Path
+from context.agents_md import format_instructions, get_agents_index
+from utils.blob_store import get_blob_store
+from utils.text import count_tokens
+from utils.tracing import get_tracer
 
 
 from config.config import Config
 
+CANCELLED_SUFFIX = "\n\n[response interrupted by user]"
+TOOL_CANCELLED_MESSAGE = "Error: Tool call cancelled by user before completion."
+
 
 class Agent:
-    def __init__(self, config: Config | None = None):
-        self.llm_client = LLMClient(config=config)
-        self.context_manager = ContextManager()
-        self.tool_registry = create_default_registry()
+    def __init__(
+        self,
+        config: Config | None = None,
+        llm_client: LLMClient | None = None,
+        tool_registry: ToolRegistry | None = None,
+    ):
         self.config = config
+        self._owns_llm_client = llm_client is None
+        self.llm_client = llm_client or LLMClient(config=config)
+        self.context_manager = ContextManager(config)
+        self.agents_index = get_agents_index(config.cwd)
+        # The cwd chain is already part of the system prompt.
+        self._seen_instructions = set(self.agents_index.files_for(config.cwd))
+        self.file_tracker = FileTracker()
+        self.run_usage = TokenUsage()
+        self.total_usage = TokenUsage()
+        self.metrics = SessionMetrics(config.model)
+        self.recorder: SessionRecorder | None = None
+        self.mcp_manager = get_mcp_manager()
+
+        self._owns_registry = tool_registry is None
+        self.tool_registry = tool_registry or create_default_registry()
+        self.blob_store = None
+        self._apply_tool_config()
+
+    def _apply_tool_config(self) -> None:
+        """Builds the config-dependent tools from the current snapshot."""
+        config = self.config
+        registry = self.tool_registry
+        if self._owns_registry:
+            if not config.subagents.enabled:
+                registry.unregister(SpawnSubagentsTool.name)
+            elif registry.get(SpawnSubagentsTool.name) is None:
+                registry.register(SpawnSubagentsTool(self))
+            self.mcp_manager.configure(registry, config.mcp_servers)
+
+        self.blob_store = None
+        if config.tools.spill_tokens:
+            self.blob_store = get_blob_store(config)
+        fetch_output = registry.get(FetchOutputTool.name)
+        if self.blob_store is None:
+            if self._owns_registry and fetch_output is not None:
+                registry.unregister(FetchOutputTool.name)
+        elif fetch_output is None or (
+            self._owns_registry and fetch_output.store is not self.blob_store
+        ):
+            registry.register(FetchOutputTool(self.blob_store))
 
     async def run(self, message: str):
         yield AgentEvent.agent_start(message)
         self.context_manager.add_user_message(message)
+        self.run_usage = TokenUsage()
+        if self.recorder:
+            self.recorder.begin_turn(message)
 
         final_response = None
         async for event in self._agentic_loop():
@@ -33,39 +94,71 @@ class Agent:
             elif event.type == AgentEventType.AGENT_ERROR:
                 final_response = event.data.get("error")
 
-        yield AgentEvent.agent_end(final_response)
+        if self.recorder:
+            self.recorder.end_turn()
+        yield AgentEvent.agent_end(final_response, usage=self.run_usage)
 
     async def _agentic_loop(self) -> AsyncGenerator[AgentEvent, None]:
 
         max_turns = self.config.max_turns
 
         for turn_num in range(max_turns):
-            response_text = ""
+            get_tracer().instant("agent.turn", turn=turn_num + 1)
+            response_parts: list[str] = []
 
+            if self._owns_registry:
+                await self.mcp_manager.sync_tools(self.tool_registry)
             tool_schemas = self.tool_registry.get_schemas()
 
             tool_calls: list[ToolCall] = []
 
-            async for event in self.llm_client.chat_completion(
-                messages=self.context_manager.get_messages(),
-                tools=tool_schemas if tool_schemas else None,
-                stream=True,
-            ):
-                if event.type == StreamEventType.TEXT_DELTA:
-                    if event.text_delta:
-                        content = event.text_delta.content or ""
-                        response_text += content
-                        yield AgentEvent.text_delta(content)
-
-                elif event.type == StreamEventType.TOOL_CALL_COMPLETE:
-                    if event.tool_call:
-                        tool_calls.append(event.tool_call)
-
-                elif event.type == StreamEventType.ERROR:
-                    yield AgentEvent.agent_error(
-                        event.error or "Something went wrong | Unknown error"
+            tool_call_results: list[ToolResultMessage] = []
+            messages = self.context_manager.get_messages()
+            estimated_tokens = self.context_manager.estimated_tokens()
+            recorded_events = [] if self.recorder else None
+            try:
+                async for event in self.llm_client.chat_completion(
+                    messages=messages,
+                    tools=tool_schemas if tool_schemas else None,
+                    stream=True,
+                    estimated_tokens=estimated_tokens,
+                ):
+                    if recorded_events is not None:
+                        recorded_events.append(event)
+                    if event.type == StreamEventType.TEXT_DELTA:
+                        if event.text_delta:
+                            content = event.text_delta.content or ""
+                            response_parts.append(content)
+                            yield AgentEvent.text_delta(content)
+
+                    elif event.type == StreamEventType.TOOL_CALL_COMPLETE:
+                        if event.tool_call:
+                            tool_calls.append(event.tool_call)
+
+                    elif event.type == StreamEventType.MESSAGE_COMPLETE:
+                        if event.usage:
+                            self.run_usage += event.usage
+                            self.total_usage += event.usage
+                            turn = self.metrics.record_llm(event.usage, event.stats)
+                            yield AgentEvent.turn_usage(turn)
+
+                    elif event.type == StreamEventType.ERROR:
+                        yield AgentEvent.agent_error(
+                            event.error or "Something went wrong | Unknown error"
+                        )
+            except (asyncio.CancelledError, GeneratorExit):
+                response_text = "".join(response_parts)
+                if response_text:
+                    self.context_manager.add_assistant_message(
+                        response_text + CANCELLED_SUFFIX
                     )
+                raise
 
+            response_text = "".join(response_parts)
+            if recorded_events is not None:
+                self.recorder.llm_call(
+                    messages, tool_schemas or None, estimated_tokens, recorded_events
+                )
             self.context_manager.add_assistant_message(
                 response_text or None,
                 tool_calls=(
@@ -75,7 +168,7 @@ class Agent:
                             "type": "function",
                             "function": {
                                 "name": tc.name,
-                                "arguments": str(tc.arguments),
+                                "arguments": canonical_json(tc.arguments),
                             },
                         }
                         for tc in tool_calls
@@ -90,44 +183,126 @@ class Agent:
             if not tool_calls:
                 return
 
-            tool_call_results: list[ToolResultMessage] = []
-            for tool_call in tool_calls:
-                yield AgentEvent.tool_call_start(
-                    call_id=tool_call.call_id,
-                    name=tool_call.name,
-                    arguments=tool_call.arguments,
-                )
+            try:
+                for tool_call in tool_calls:
+                    yield AgentEvent.tool_call_start(
+                        call_id=tool_call.call_id,
+                        name=tool_call.name,
+                        arguments=tool_call.arguments,
+                    )
 
-                result = await self.tool_registry.invoke(
-                    tool_call.name,
-                    tool_call.arguments,
-                    self.config.cwd,
-                )
+                    started = time.perf_counter()
+                    result = await self.tool_registry.invoke(
+                        tool_call.name,
+                        tool_call.arguments,
+                        self.config.cwd,
+                        timeout=self._tool_timeout(tool_call.name),
+                        file_tracker=self.file_tracker,
+                        config=self.config,
+                    )
+                    self._record_tool(
+                        tool_call.name, time.perf_counter() - started, result.success
+                    )
+                    if self.recorder:
+                        self.recorder.tool_result(
+                            tool_call.name, tool_call.arguments, result
+                        )
 
-                yield AgentEvent.tool_call_complete(
-                    call_id=tool_call.call_id,
-                    name=tool_call.name,
-                    result=result,
-                )
+                    yield AgentEvent.tool_call_complete(
+                        call_id=tool_call.call_id,
+                        name=tool_call.name,
+                        result=result,
+                    )
 
-                tool_call_results.append(
+                    tool_call_results.append(
+                        ToolResultMessage(
+                            tool_call_id=tool_call.call_id,
+                            content=self._context_output(tool_call.name, result)
+                            + self._scoped_instructions(result),
+                            is_error=not result.success,
+                        )
+                    )
+            except (asyncio.CancelledError, GeneratorExit):
+                completed = {r.tool_call_id for r in tool_call_results}
+                tool_call_results.extend(
                     ToolResultMessage(
-                        tool_call_id=tool_call.call_id,
-                        content=result.to_model_output(),
-                        is_error=not result.success,
+                        tool_call_id=tc.call_id,
+                        content=TOOL_CANCELLED_MESSAGE,
+                        is_error=True,
                     )
+                    for tc in tool_calls
+                    if tc.call_id not in completed
                 )
+                raise
+            finally:
+                for tool_result in tool_call_results:
+                    self.context_manager.add_tool_result(
+                        tool_result.tool_call_id,
+                        tool_result.content,
+                    )
 
-            for tool_result in tool_call_results:
-                self.context_manager.add_tool_result(
-                    tool_result.tool_call_id,
-                    tool_result.content,
-                )
+    def reload_config(self, config: Config) -> None:
+        """Swaps in a new config snapshot. Call between runs, never during one."""
+        self.config = config
+        self.context_manager.reload(config)
+        self.metrics.model = config.model
+        if self._owns_llm_client:
+            self.llm_client.reconfigure(config)
+        self._apply_tool_config()
+
+    def _context_output(self, tool_name: str, result: ToolResult) -> str:
+        """Spills outputs above ``tools.spill_tokens`` to the blob store."""
+        output = result.to_model_output()
+        tools_config = self.config.tools
+        if self.blob_store is None or tool_name == FetchOutputTool.name:
+            return output
+        if count_tokens(output, self.config.model_name) <= tools_config.spill_tokens:
+            return output
+
+        # The model only sees a preview, so the next read must not be a diff.
+        if result.metadata.get("path"):
+            self.file_tracker.forget(Path(result.metadata["path"]))
+        with get_tracer().span("context.spill", tool=tool_name, chars=len(output)):
+            return spill_output(
+                self.blob_store,
+                output,
+                tools_config.spill_head_lines,
+                tools_config.spill_tail_lines,
+                max_chars=tools_config.spill_tokens * 2,
+            )
+
+    def _scoped_instructions(self, result: ToolResult) -> str:
+        """AGENTS.md instructions covering a touched path, the first time only."""
+        path = result.metadata.get("path")
+        if not path:
+            return ""
+        files = [
+            (file, text)
+            for file, text in self.agents_index.instructions_for(Path(path))
+            if file not in self._seen_instructions
+        ]
+        if not files:
+            return ""
+        self._seen_instructions.update(file for file, _ in files)
+        return "\n\n# AGENTS.md instructions for this path\n\n" + format_instructions(
+            self.agents_index, files
+        )
+
+    def _record_tool(self, name: str, seconds: float, success: bool) -> None:
+        tool = self.tool_registry.get(name)
+        kind = tool.kind.value if tool else None
+        self.metrics.record_tool(name, kind, seconds, success)
+
+    def _tool_timeout(self, name: str) -> float | None:
+        tool = self.tool_registry.get(name)
+        return self.config.tool_timeout(name, tool.timeout if tool else None)
 
     async def __aenter__(self) -> Agent:
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.llm_client:
+        if self.recorder:
+            self.recorder.close()
+        if self.llm_client and self._owns_llm_client:
             await self.llm_client.close()
-            self.llm_client = None
+        self.llm_client = None
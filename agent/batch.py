@@ -0,0 +1,242 @@
+from __future__ import annotations
+import asyncio
+import json
+import math
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, TextIO
+from agent.agent import Agent
+from agent.events import AgentEventType
+from client.llm_client import LLMClientPool
+from client.response import TokenUsage
+from config.config import Config
+from config.loader import load_config
+from tools.mcp import get_mcp_manager
+from utils.errors import ConfigError
+
+
+@dataclass
+class BatchTask:
+    id: str
+    prompt: str
+    cwd: Path | None = None
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    wall_time: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+    usage: TokenUsage = field(default_factory=TokenUsage)
+
+    def percentile(self, pct: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(1, math.ceil(pct / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def summary(self) -> str:
+        completed = self.succeeded + self.failed
+        throughput = completed / self.wall_time if self.wall_time else 0.0
+        lines = [
+            f"tasks: {self.total} total, {self.succeeded} ok, {self.failed} failed, {self.skipped} skipped",
+            f"wall time: {self.wall_time:.2f}s, throughput: {throughput:.2f} tasks/s",
+        ]
+        if self.latencies:
+            lines.append(
+                "latency: "
+                + ", ".join(f"p{p}={self.percentile(p):.2f}s" for p in (50, 90, 99))
+                + f", max={max(self.latencies):.2f}s"
+            )
+        lines.append(
+            f"tokens: {self.usage.prompt_tokens} prompt "
+            f"({self.usage.cached_tokens} cached), "
+            f"{self.usage.completion_tokens} completion"
+        )
+        return "\n".join(lines)
+
+
+def load_tasks(path: Path) -> list[BatchTask]:
+    tasks: list[BatchTask] = []
+    seen: set[str] = set()
+
+    with path.open("r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ConfigError(
+                    f"Invalid JSON on line {line_no} of {path}: {e}",
+                    config_file=str(path),
+                ) from e
+
+            if isinstance(record, str):
+                record = {"prompt": record}
+            if not isinstance(record, dict) or not record.get("prompt"):
+                raise ConfigError(
+                    f"Task on line {line_no} of {path} has no prompt",
+                    config_file=str(path),
+                )
+
+            task_id = str(record.get("id", line_no))
+            if task_id in seen:
+                raise ConfigError(
+                    f"Duplicate task id {task_id!r} on line {line_no} of {path}",
+                    config_file=str(path),
+                )
+            seen.add(task_id)
+
+            cwd = record.get("cwd")
+            tasks.append(
+                BatchTask(
+                    id=task_id,
+                    prompt=record["prompt"],
+                    cwd=Path(cwd) if cwd else None,
+                )
+            )
+
+    return tasks
+
+
+def load_completed_ids(path: Path) -> set[str]:
+    completed: set[str] = set()
+    if not path.is_file():
+        return completed
+
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("status") == "ok":
+                completed.add(str(record.get("id")))
+    return completed
+
+
+class BatchRunner:
+    """Runs independent agent sessions from a JSONL task file concurrently.
+
+    Sessions share LLM clients (and with them the HTTP connection pool and
+    rate limiter), plus the process wide tokenizer and file caches. A task with
+    its own ``cwd`` runs with the config loaded for that directory, so its
+    project settings and AGENTS.md instructions apply; each directory is
+    loaded once.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        concurrency: int = 4,
+        progress: TextIO | None = None,
+    ) -> None:
+        self.config = config
+        self.concurrency = max(1, concurrency)
+        self.progress = progress or sys.stderr
+        self.stats = BatchStats()
+        self.llm_clients = LLMClientPool()
+        self._configs: dict[Path, asyncio.Future[Config]] = {}
+
+    async def _config_for(self, task: BatchTask) -> Config:
+        if task.cwd is None:
+            return self.config
+        cwd = task.cwd if task.cwd.is_absolute() else self.config.cwd / task.cwd
+        cwd = cwd.resolve()
+        loaded = self._configs.get(cwd)
+        if loaded is None:
+            # Loading scans the workspace; keep the running tasks streaming.
+            loaded = asyncio.ensure_future(asyncio.to_thread(load_config, cwd=cwd))
+            self._configs[cwd] = loaded
+        config = await asyncio.shield(loaded)
+        errors = config.validate()
+        if errors:
+            raise ConfigError("; ".join(errors))
+        return config
+
+    async def _run_task(self, task: BatchTask) -> dict[str, Any]:
+        started = time.monotonic()
+        response: str | None = None
+        errors: list[str] = []
+        tool_calls = 0
+        usage = TokenUsage()
+
+        try:
+            config = await self._config_for(task)
+            agent = await asyncio.to_thread(
+                Agent, config=config, llm_client=self.llm_clients.get(config)
+            )
+            async with agent:
+                async for event in agent.run(task.prompt):
+                    if event.type == AgentEventType.TEXT_COMPLETE:
+                        response = event.data.get("content")
+                    elif event.type == AgentEventType.AGENT_ERROR:
+                        errors.append(event.data.get("error") or "Unknown error")
+                    elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
+                        tool_calls += 1
+                usage = agent.total_usage
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+
+        latency = time.monotonic() - started
+        ok = response is not None and not errors
+        return {
+            "id": task.id,
+            "status": "ok" if ok else "error",
+            "response": response,
+            "errors": errors,
+            "tool_calls": tool_calls,
+            "latency": round(latency, 3),
+            "usage": asdict(usage),
+        }
+
+    async def run(self, tasks_path: Path, output_path: Path) -> BatchStats:
+        tasks = load_tasks(tasks_path)
+        completed = load_completed_ids(output_path)
+        pending = [task for task in tasks if task.id not in completed]
+
+        self.stats = stats = BatchStats(
+            total=len(tasks), skipped=len(tasks) - len(pending)
+        )
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def worker(task: BatchTask, out: TextIO) -> None:
+            async with semaphore:
+                record = await self._run_task(task)
+
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+            stats.latencies.append(record["latency"])
+            stats.usage += TokenUsage(**record["usage"])
+            if record["status"] == "ok":
+                stats.succeeded += 1
+            else:
+                stats.failed += 1
+
+            done = stats.succeeded + stats.failed
+            print(
+                f"[{done}/{len(pending)}] {task.id} {record['status']} "
+                f"{record['latency']:.2f}s",
+                file=self.progress,
+                flush=True,
+            )
+
+        try:
+            with output_path.open("a", encoding="utf-8") as out:
+                await asyncio.gather(*(worker(task, out) for task in pending))
+        finally:
+            stats.wall_time = time.monotonic() - started
+            await self.llm_clients.close()
+            await get_mcp_manager().close()
+
+        return stats
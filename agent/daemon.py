@@ -0,0 +1,206 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from contextlib import aclosing, suppress
+from pathlib import Path
+from agent.agent import Agent
+from agent.daemon_client import connect, default_socket_path
+from agent.events import AgentEventType
+from client.llm_client import LLMClientPool
+from config.config import Config
+from config.loader import load_config
+from context.agents_md import get_agents_index
+from context.repo_map import get_repo_map
+from tools.mcp import get_mcp_manager
+from ui.ndjson import encode_record, event_record, make_record
+from utils.errors import AgentError, ConfigError
+from utils.text import get_tokenizer
+
+logger = logging.getLogger(__name__)
+
+
+class AgentDaemon:
+    """Serves agent runs over a Unix domain socket from a warm process.
+
+    Each connection sends one JSON line ``{"prompt": ..., "cwd": ...}`` and
+    receives the run's events as NDJSON records, ending with a ``done`` record
+    that carries the exit code. Connections are served concurrently and share
+    LLM clients (with their connection pools and rate limiters), the tokenizer,
+    the file cache and MCP servers. The daemon exits after ``idle_timeout``
+    seconds without a connection.
+    """
+
+    def __init__(self, config: Config, socket_path: Path | None = None) -> None:
+        self.config = config
+        self.socket_path = socket_path or default_socket_path()
+        self.idle_timeout = config.daemon.idle_timeout
+        self.llm_clients = LLMClientPool()
+        self._active = 0
+        self._last_activity = time.monotonic()
+        self._slots: asyncio.Semaphore | None = None
+        self._stopped: asyncio.Event | None = None
+
+    def _warm(self) -> None:
+        """Loads the tokenizer and fills the workspace caches for the daemon's
+        cwd. System prompts are still built per request, from these caches."""
+        import openai  # noqa: F401
+
+        get_tokenizer(self.config.model_name)
+        get_agents_index(self.config.cwd).wait_ready()
+        get_repo_map(self.config)
+
+    def _prepare_socket(self) -> None:
+        if self.socket_path.exists():
+            sock = connect(self.socket_path)
+            if sock is not None:
+                sock.close()
+                raise AgentError(
+                    f"An agent daemon is already listening on {self.socket_path}"
+                )
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def serve(self) -> None:
+        self._slots = asyncio.Semaphore(self.config.daemon.max_clients)
+        self._stopped = asyncio.Event()
+        self._prepare_socket()
+
+        # Bind under a restrictive umask so the socket is never reachable by
+        # other users, not even before the chmod.
+        umask = os.umask(0o077)
+        try:
+            server = await asyncio.start_unix_server(
+                self._handle_connection, path=str(self.socket_path)
+            )
+        finally:
+            os.umask(umask)
+        os.chmod(self.socket_path, 0o600)
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(sig, self.stop)
+
+        try:
+            try:
+                await asyncio.to_thread(self._warm)
+            except Exception as e:
+                logger.warning(f"Daemon warm-up failed: {e}")
+            self.llm_clients.get(self.config).get_client()
+
+            self._last_activity = time.monotonic()
+            idle_watch = asyncio.create_task(self._watch_idle())
+            await self._stopped.wait()
+            idle_watch.cancel()
+        finally:
+            server.close()
+            await server.wait_closed()
+            await self.llm_clients.close()
+            await get_mcp_manager().close()
+            with suppress(FileNotFoundError):
+                self.socket_path.unlink()
+
+    async def _watch_idle(self) -> None:
+        if self.idle_timeout is None:
+            return
+
+        interval = min(self.idle_timeout, 30.0)
+        while True:
+            await asyncio.sleep(interval)
+            idle = time.monotonic() - self._last_activity
+            if self._active == 0 and idle >= self.idle_timeout:
+                logger.info(f"Daemon idle for {idle:.0f}s, shutting down")
+                self.stop()
+                return
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self._active += 1
+        try:
+            async with self._slots:
+                await self._serve_request(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._active -= 1
+            self._last_activity = time.monotonic()
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _serve_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        async def send(record: dict) -> None:
+            writer.write(encode_record(record).encode("utf-8"))
+            await writer.drain()
+
+        try:
+            request = json.loads(await reader.readline())
+            prompt = request["prompt"]
+            cwd = Path(request.get("cwd") or os.getcwd())
+            # Loading scans the workspace; other clients keep streaming.
+            config = await asyncio.to_thread(load_config, cwd=cwd)
+        except (ValueError, KeyError, TypeError) as e:
+            await send(make_record("error", {"error": f"Invalid request: {e}"}))
+            await send(make_record("done", {"exit_code": 2}))
+            return
+        except ConfigError as e:
+            await send(make_record("error", {"error": f"Error: {e}"}))
+            await send(make_record("done", {"exit_code": 1}))
+            return
+
+        errors = config.validate()
+        if errors:
+            for error in errors:
+                await send(make_record("error", {"error": error}))
+            await send(make_record("done", {"exit_code": 1}))
+            return
+
+        run = asyncio.create_task(self._run_agent(config, prompt, send))
+        disconnected = asyncio.create_task(reader.read())
+        try:
+            await asyncio.wait({run, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            disconnected.cancel()
+            if not run.done():
+                run.cancel()
+                with suppress(asyncio.CancelledError):
+                    await run
+
+        if run.cancelled():
+            return
+
+        try:
+            final_response = run.result()
+        except ConnectionError:
+            raise
+        except Exception as e:
+            logger.exception("Daemon run failed")
+            await send(make_record("error", {"error": f"{type(e).__name__}: {e}"}))
+            final_response = None
+
+        exit_code = 0 if final_response is not None else 1
+        await send(make_record("done", {"exit_code": exit_code}))
+
+    async def _run_agent(self, config: Config, prompt: str, send) -> str | None:
+        final_response: str | None = None
+        agent = await asyncio.to_thread(
+            Agent, config=config, llm_client=self.llm_clients.get(config)
+        )
+        async with agent:
+            async with aclosing(agent.run(prompt)) as events:
+                async for event in events:
+                    await send(event_record(event))
+                    if event.type == AgentEventType.TEXT_COMPLETE:
+                        final_response = event.data.get("content")
+        return final_response
@@ -0,0 +1,125 @@
+"""Thin client for the resident agent daemon (``main.py --daemon``).
+
+Forwards a prompt and cwd over a Unix domain socket and streams the events
+back. Only the standard library is imported so that each call costs little
+more than interpreter startup. When no daemon is listening the prompt is run
+in-process through ``main.py`` instead.
+
+Usage: python -m agent.daemon_client [--cwd DIR] [--output text|ndjson] PROMPT
+"""
+
+from __future__ import annotations
+import argparse
+import getpass
+import json
+import os
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+SOCKET_ENV_VAR = "AI_AGENT_SOCKET"
+
+
+def default_socket_path() -> Path:
+    override = os.environ.get(SOCKET_ENV_VAR)
+    if override:
+        return Path(override)
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "ai-agent.sock"
+    return Path(tempfile.gettempdir()) / f"ai-agent-{getpass.getuser()}.sock"
+
+
+def connect(path: Path) -> socket.socket | None:
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    return sock
+
+
+def _print_text_record(record: dict) -> None:
+    data = record.get("data") or {}
+    event_type = record.get("type")
+
+    if event_type == "text_delta":
+        sys.stdout.write(data.get("content", ""))
+        sys.stdout.flush()
+    elif event_type == "text_complete":
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    elif event_type == "tool_call_start":
+        print(f"[tool] {data.get('name', 'unknown')}", file=sys.stderr)
+    elif event_type in ("agent_error", "error"):
+        print(f"Error: {data.get('error', 'Unknown error')}", file=sys.stderr)
+
+
+def run(sock: socket.socket, prompt: str, cwd: Path, output: str) -> int:
+    request = {"prompt": prompt, "cwd": str(cwd)}
+    sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+    with sock.makefile("r", encoding="utf-8") as stream:
+        for line in stream:
+            record = json.loads(line)
+            if record.get("type") == "done":
+                return int(record.get("data", {}).get("exit_code", 1))
+
+            if output == "ndjson":
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            else:
+                _print_text_record(record)
+
+    print("Error: the agent daemon closed the connection", file=sys.stderr)
+    return 1
+
+
+def run_cold(prompt: str, cwd: Path, output: str) -> None:
+    main_py = Path(__file__).resolve().parent.parent / "main.py"
+    args = [sys.executable, str(main_py), "--cwd", str(cwd), "--output", output]
+    os.execv(sys.executable, args + ["--", prompt])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("prompt", nargs="?")
+    parser.add_argument("--cwd", "-c", type=Path, default=Path.cwd())
+    parser.add_argument("--output", "-o", choices=["text", "ndjson"], default="text")
+    parser.add_argument("--socket", type=Path, default=None)
+    parser.add_argument(
+        "--no-fallback",
+        action="store_true",
+        help="Fail instead of running in-process when no daemon is listening.",
+    )
+    args = parser.parse_args()
+
+    prompt = args.prompt
+    if not prompt and not sys.stdin.isatty():
+        prompt = sys.stdin.read().strip()
+    if not prompt:
+        parser.error("a prompt is required")
+
+    cwd = args.cwd.resolve()
+    sock = connect(args.socket or default_socket_path())
+    if sock is None:
+        if args.no_fallback:
+            print("Error: no agent daemon is running", file=sys.stderr)
+            sys.exit(1)
+        run_cold(prompt, cwd, args.output)
+
+    try:
+        with sock:
+            sys.exit(run(sock, prompt, cwd, args.output))
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 from __future__ import annotations
 from enum import Enum
-from dataclasses import dataclass, field
-from typing import Any
+from dataclasses import asdict, dataclass, field
+from typing import Any, TYPE_CHECKING
 from client.response import TokenUsage
 
+if TYPE_CHECKING:
+    from agent.metrics import TurnMetrics
+
 
 class AgentEventType(str, Enum):
     # agent lifecycle
     AGENT_START = "agent_start"
     AGENT_END = "agent_end"
     AGENT_ERROR = "agent_error"
+    TURN_USAGE = "turn_usage"
 
     # text streaming
     TEXT_DELTA = "text_delta"
@@ -20,7 +24,7 @@ class AgentEventType(str, Enum):
     TOOL_CALL_COMPLETE = "tool_call_complete"
 
 
-@dataclass
+@dataclass(slots=True)
 class AgentEvent:
     type: AgentEventType
     data: dict[str, Any] = field(default_factory=dict)
@@ -35,7 +39,7 @@ class AgentEvent:
     ) -> AgentEvent:
         return cls(
             type=AgentEventType.AGENT_END,
-            data={"response": response, "usage": usage.__dict__ if usage else None},
+            data={"response": response, "usage": asdict(usage) if usage else None},
         )
 
     @classmethod
@@ -47,6 +51,24 @@ class AgentEvent:
             data={"error": error, "details": details or {}},
         )
 
+    @classmethod
+    def turn_usage(cls, metrics: TurnMetrics) -> AgentEvent:
+        prompt = metrics.prompt_tokens
+        return cls(
+            type=AgentEventType.TURN_USAGE,
+            data={
+                "turn": metrics.turn,
+                "prompt_tokens": prompt,
+                "cached_tokens": metrics.cached_tokens,
+                "uncached_tokens": max(prompt - metrics.cached_tokens, 0),
+                "completion_tokens": metrics.completion_tokens,
+                "cache_hit_ratio": metrics.cached_tokens / prompt if prompt else 0.0,
+                "ttft": metrics.ttft,
+                "tokens_per_second": metrics.tokens_per_second,
+                "cost": metrics.cost,
+            },
+        )
+
     @classmethod
     def text_delta(cls, content: str) -> AgentEvent:
         return cls(type=AgentEventType.TEXT_DELTA, data={"content": content})
@@ -74,5 +96,6 @@ class AgentEvent:
                 "error": result.error,
                 "metadata": result.metadata,
                 "truncated": result.truncated,
+                "payload": result.payload,
             },
         )
@@ -0,0 +1,170 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+from typing import Any
+from client.response import RequestStats, TokenUsage
+from config.config import ModelConfig
+from utils.metrics import get_metrics
+
+TOKENS_PER_SECOND_BUCKETS = (1, 5, 10, 20, 35, 50, 75, 100, 150, 250, 500)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _distribution(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "max": max(values),
+    }
+
+
+@dataclass
+class TurnMetrics:
+    turn: int
+    prompt_tokens: int
+    cached_tokens: int
+    completion_tokens: int
+    ttft: float | None = None
+    tokens_per_second: float | None = None
+    cost: float | None = None
+
+
+class SessionMetrics:
+    """Token, latency, tool and cost numbers for one agent session.
+
+    Everything recorded here is also added to the process-wide registry from
+    ``utils.metrics``, which is what ``/metrics`` and ``--metrics-output`` dump.
+    """
+
+    def __init__(self, model: ModelConfig) -> None:
+        self.model = model
+        self.turns: list[TurnMetrics] = []
+        self.usage = TokenUsage()
+        self.retries = 0
+        self.rate_limit_wait = 0.0
+        self.cost: float | None = None
+        self.tool_latencies: dict[str, list[float]] = {}
+        self.tool_kinds: dict[str, str] = {}
+        self.tool_errors: dict[str, int] = {}
+
+    def _cost(self, usage: TokenUsage) -> float | None:
+        model = self.model
+        if model.input_price_per_mtok is None or model.output_price_per_mtok is None:
+            return None
+
+        cached_price = model.cached_input_price_per_mtok
+        if cached_price is None:
+            cached_price = model.input_price_per_mtok
+        uncached = max(usage.prompt_tokens - usage.cached_tokens, 0)
+        return (
+            uncached * model.input_price_per_mtok
+            + usage.cached_tokens * cached_price
+            + usage.completion_tokens * model.output_price_per_mtok
+        ) / 1_000_000
+
+    def record_llm(self, usage: TokenUsage, stats: RequestStats | None) -> TurnMetrics:
+        turn = TurnMetrics(
+            turn=len(self.turns) + 1,
+            prompt_tokens=usage.prompt_tokens,
+            cached_tokens=usage.cached_tokens,
+            completion_tokens=usage.completion_tokens,
+            cost=self._cost(usage),
+        )
+        if stats is not None:
+            turn.ttft = stats.ttft
+            generation = stats.duration - (stats.ttft or 0.0)
+            if usage.completion_tokens and generation > 0:
+                turn.tokens_per_second = usage.completion_tokens / generation
+            self.retries += stats.retries
+            self.rate_limit_wait += stats.rate_limit_wait
+
+        self.turns.append(turn)
+        self.usage += usage
+        if turn.cost is not None:
+            self.cost = (self.cost or 0.0) + turn.cost
+
+        model = self.model.name
+        registry = get_metrics()
+        registry.counter("agent_llm_requests", "Completed LLM requests.").inc(
+            model=model
+        )
+        registry.counter("agent_prompt_tokens", "Prompt tokens sent.").inc(
+            usage.prompt_tokens, model=model
+        )
+        registry.counter(
+            "agent_cached_tokens", "Prompt tokens served from the provider cache."
+        ).inc(usage.cached_tokens, model=model)
+        registry.counter("agent_completion_tokens", "Completion tokens received.").inc(
+            usage.completion_tokens, model=model
+        )
+        if turn.ttft is not None:
+            registry.histogram(
+                "agent_time_to_first_token_seconds",
+                "Time from sending a request to its first streamed token.",
+            ).observe(turn.ttft, model=model)
+        if turn.tokens_per_second is not None:
+            registry.histogram(
+                "agent_output_tokens_per_second",
+                "Completion tokens per second after the first token.",
+                TOKENS_PER_SECOND_BUCKETS,
+            ).observe(turn.tokens_per_second, model=model)
+        if turn.cost is not None:
+            registry.counter("agent_cost_usd", "Estimated LLM spend in USD.").inc(
+                turn.cost, model=model
+            )
+        return turn
+
+    def record_tool(
+        self, name: str, kind: str | None, seconds: float, success: bool
+    ) -> None:
+        kind = kind or "unknown"
+        self.tool_latencies.setdefault(name, []).append(seconds)
+        self.tool_kinds[name] = kind
+        if not success:
+            self.tool_errors[name] = self.tool_errors.get(name, 0) + 1
+
+        registry = get_metrics()
+        registry.histogram(
+            "agent_tool_duration_seconds", "Tool execution time."
+        ).observe(seconds, tool=name, kind=kind)
+        if not success:
+            registry.counter("agent_tool_errors", "Failed tool calls.").inc(tool=name)
+
+    def summary(self) -> dict[str, Any]:
+        usage = self.usage
+        return {
+            "turns": len(self.turns),
+            "prompt_tokens": usage.prompt_tokens,
+            "cached_tokens": usage.cached_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "cache_hit_ratio": (
+                usage.cached_tokens / usage.prompt_tokens
+                if usage.prompt_tokens
+                else 0.0
+            ),
+            "ttft": _distribution([t.ttft for t in self.turns if t.ttft is not None]),
+            "tokens_per_second": _distribution(
+                [t.tokens_per_second for t in self.turns if t.tokens_per_second]
+            ),
+            "retries": self.retries,
+            "rate_limit_wait": self.rate_limit_wait,
+            "cost": self.cost,
+            "tools": {
+                name: {
+                    "kind": self.tool_kinds[name],
+                    "calls": len(latencies),
+                    "errors": self.tool_errors.get(name, 0),
+                    "total": sum(latencies),
+                    **_distribution(latencies),
+                }
+                for name, latencies in sorted(self.tool_latencies.items())
+            },
+        }
@@ -0,0 +1,359 @@
+from __future__ import annotations
+import dataclasses
+import hashlib
+import json
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncGenerator
+from client.response import (
+    RequestStats,
+    StreamEvent,
+    StreamEventType,
+    TextDelta,
+    TokenUsage,
+    ToolCall,
+    ToolCallDelta,
+    canonical_json,
+)
+from config.config import Config
+from tools.base import ToolResult
+from tools.registry import ToolRegistry
+from ui.ndjson import encode_record
+from utils.errors import ConfigError
+
+BUNDLE_VERSION = 1
+
+
+def request_digest(
+    messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None
+) -> tuple[str, int]:
+    """Returns the SHA-256 and length of a request's canonical JSON."""
+    payload = canonical_json({"messages": messages, "tools": tools or []})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest(), len(payload)
+
+
+def _decode_event(data: dict[str, Any]) -> StreamEvent:
+    def build(cls: type, key: str) -> Any:
+        value = data.get(key)
+        return cls(**value) if value is not None else None
+
+    return StreamEvent(
+        type=StreamEventType(data["type"]),
+        text_delta=build(TextDelta, "text_delta"),
+        error=data.get("error"),
+        finish_reason=data.get("finish_reason"),
+        tool_call_delta=build(ToolCallDelta, "tool_call_delta"),
+        tool_call=build(ToolCall, "tool_call"),
+        usage=build(TokenUsage, "usage"),
+        stats=build(RequestStats, "stats"),
+    )
+
+
+class SessionRecorder:
+    """Writes a replay bundle: a JSONL file holding every user turn, LLM call
+    (request digest, estimated tokens and the streamed response) and tool
+    result of one session.
+    """
+
+    def __init__(self, path: Path, config: Config) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._stream = path.open("w", encoding="utf-8")
+        self.turn = 0
+        self._started = (0.0, 0.0)
+        self._write(
+            {
+                "type": "header",
+                "version": BUNDLE_VERSION,
+                "created_at": time.time(),
+                "model": config.model_name,
+                "cwd": str(config.cwd),
+            }
+        )
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._stream.write(encode_record(record))
+        self._stream.flush()
+
+    def begin_turn(self, message: str) -> None:
+        self.turn += 1
+        self._started = (time.perf_counter(), time.process_time())
+        self._write({"type": "user", "turn": self.turn, "message": message})
+
+    def llm_call(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        estimated_tokens: int,
+        events: list[StreamEvent],
+    ) -> None:
+        digest, chars = request_digest(messages, tools)
+        self._write(
+            {
+                "type": "llm",
+                "turn": self.turn,
+                "request_sha256": digest,
+                "request_chars": chars,
+                "estimated_tokens": estimated_tokens,
+                "events": [
+                    e for e in events if e.type != StreamEventType.TOOL_CALL_DELTA
+                ],
+            }
+        )
+
+    def tool_result(
+        self, name: str, arguments: dict[str, Any], result: ToolResult
+    ) -> None:
+        self._write(
+            {
+                "type": "tool",
+                "turn": self.turn,
+                "name": name,
+                "arguments": arguments,
+                "result": {
+                    f.name: getattr(result, f.name)
+                    for f in dataclasses.fields(result)
+                    if f.name != "payload"
+                },
+            }
+        )
+
+    def end_turn(self) -> None:
+        wall_started, cpu_started = self._started
+        self._write(
+            {
+                "type": "turn_end",
+                "turn": self.turn,
+                "wall": time.perf_counter() - wall_started,
+                "cpu": time.process_time() - cpu_started,
+            }
+        )
+
+    def close(self) -> None:
+        if not self._stream.closed:
+            self._stream.close()
+
+
+@dataclass
+class RecordedTurn:
+    message: str
+    llm_calls: list[dict[str, Any]] = field(default_factory=list)
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    wall: float | None = None
+    cpu: float | None = None
+
+
+def load_bundle(path: Path) -> tuple[dict[str, Any], list[RecordedTurn]]:
+    header: dict[str, Any] | None = None
+    turns: list[RecordedTurn] = []
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind = record.get("type")
+            if kind == "header":
+                header = record
+            elif kind == "user":
+                turns.append(RecordedTurn(message=record["message"]))
+            elif not turns:
+                continue
+            elif kind == "llm":
+                turns[-1].llm_calls.append(record)
+            elif kind == "tool":
+                turns[-1].tool_calls.append(record)
+            elif kind == "turn_end":
+                turns[-1].wall = record["wall"]
+                turns[-1].cpu = record["cpu"]
+
+    if header is None or header.get("version") != BUNDLE_VERSION:
+        raise ConfigError(f"{path} is not a version {BUNDLE_VERSION} replay bundle")
+    return header, turns
+
+
+class ReplayLLMClient:
+    """Serves the recorded LLM responses of a bundle, turn by turn, and notes
+    what the current code sends instead of contacting a provider.
+    """
+
+    def __init__(self, turns: list[RecordedTurn]) -> None:
+        self.turns = turns
+        self.requests: list[list[dict[str, Any]]] = [[] for _ in turns]
+        self._turn = 0
+
+    def start_turn(self, index: int) -> None:
+        self._turn = index
+
+    async def chat_completion(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        stream: bool = True,
+        estimated_tokens: int | None = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
+        digest, chars = request_digest(messages, tools)
+        sent = self.requests[self._turn]
+        recorded_calls = self.turns[self._turn].llm_calls
+        recorded = (
+            recorded_calls[len(sent)] if len(sent) < len(recorded_calls) else None
+        )
+        sent.append(
+            {
+                "request_chars": chars,
+                "estimated_tokens": estimated_tokens or 0,
+                "identical": recorded is not None
+                and recorded["request_sha256"] == digest,
+            }
+        )
+
+        if recorded is None:
+            yield StreamEvent(
+                type=StreamEventType.ERROR,
+                error=f"Replay diverged: no recorded LLM call #{len(sent)} "
+                f"for turn {self._turn + 1}",
+            )
+            return
+        for data in recorded["events"]:
+            yield _decode_event(data)
+
+    async def close(self) -> None:
+        pass
+
+
+class ReplayToolRegistry(ToolRegistry):
+    """Answers tool calls with the results recorded in a bundle.
+
+    Results are matched by tool name and canonical arguments, in recorded
+    order. The wrapped registry's tools still provide the schemas.
+    """
+
+    def __init__(self, registry: ToolRegistry, turns: list[RecordedTurn]) -> None:
+        super().__init__()
+        self._tools = registry._tools
+        self._results: dict[tuple[str, str], deque[ToolResult]] = defaultdict(deque)
+        for turn in turns:
+            for call in turn.tool_calls:
+                key = (call["name"], canonical_json(call["arguments"]))
+                self._results[key].append(ToolResult(**call["result"]))
+
+    async def invoke(
+        self, name: str, params: dict[str, Any], cwd: Path, *args: Any, **kwargs: Any
+    ) -> ToolResult:
+        recorded = self._results.get((name, canonical_json(params)))
+        if not recorded:
+            return ToolResult.error_result(
+                f"Replay diverged: no recorded result for {name}({params})"
+            )
+        return recorded.popleft()
+
+
+async def run_replay(
+    config: Config, bundle_path: Path, live_tools: bool = False
+) -> dict[str, Any]:
+    """Re-runs a recorded session against the current code.
+
+    LLM responses always come from the bundle; tool results do too unless
+    ``live_tools``. Returns per-turn wall time, CPU, allocations and tokens
+    sent, next to what was recorded.
+    """
+    from agent.agent import Agent
+    from agent.events import AgentEventType
+
+    header, turns = load_bundle(bundle_path)
+    llm_client = ReplayLLMClient(turns)
+    results: list[dict[str, Any]] = []
+
+    async with Agent(config=config, llm_client=llm_client) as agent:
+        if not live_tools:
+            agent.tool_registry = ReplayToolRegistry(agent.tool_registry, turns)
+
+        tracemalloc.start()
+        try:
+            for index, turn in enumerate(turns):
+                llm_client.start_turn(index)
+                tracemalloc.reset_peak()
+                baseline_memory = tracemalloc.get_traced_memory()[0]
+                wall_started = time.perf_counter()
+                cpu_started = time.process_time()
+
+                errors: list[str] = []
+                async for event in agent.run(turn.message):
+                    if event.type == AgentEventType.AGENT_ERROR:
+                        errors.append(event.data.get("error", ""))
+
+                wall = time.perf_counter() - wall_started
+                cpu = time.process_time() - cpu_started
+                current, peak = tracemalloc.get_traced_memory()
+                sent = llm_client.requests[index]
+                results.append(
+                    {
+                        "turn": index + 1,
+                        "llm_calls": len(sent),
+                        "recorded_llm_calls": len(turn.llm_calls),
+                        "identical_requests": sum(1 for r in sent if r["identical"]),
+                        "tokens_sent": sum(r["estimated_tokens"] for r in sent),
+                        "recorded_tokens_sent": sum(
+                            c["estimated_tokens"] for c in turn.llm_calls
+                        ),
+                        "request_chars": sum(r["request_chars"] for r in sent),
+                        "wall": wall,
+                        "cpu": cpu,
+                        "alloc_peak_bytes": peak - baseline_memory,
+                        "alloc_retained_bytes": current - baseline_memory,
+                        "recorded_wall": turn.wall,
+                        "recorded_cpu": turn.cpu,
+                        "errors": errors,
+                    }
+                )
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "bundle": str(bundle_path),
+        "recorded_model": header.get("model"),
+        "live_tools": live_tools,
+        "turns": results,
+    }
+
+
+def format_replay_report(
+    report: dict[str, Any], baseline: dict[str, Any] | None = None
+) -> str:
+    def delta(value: float, before: float | None) -> str:
+        if not before:
+            return ""
+        return f" ({(value - before) / before:+.0%})"
+
+    base_turns = {t["turn"]: t for t in (baseline or {}).get("turns", [])}
+    lines = [
+        f"replay of {report['bundle']} "
+        f"({'live' if report['live_tools'] else 'recorded'} tools)",
+        f"{'turn':>4} {'calls':>7} {'same':>5} {'tokens sent':>22} "
+        f"{'wall ms':>16} {'cpu ms':>16} {'peak alloc KB':>20}",
+    ]
+    for turn in report["turns"]:
+        base = base_turns.get(turn["turn"], {})
+        tokens = f"{turn['tokens_sent']} vs {turn['recorded_tokens_sent']}"
+        lines.append(
+            f"{turn['turn']:>4} "
+            f"{turn['llm_calls']:>3}/{turn['recorded_llm_calls']:<3} "
+            f"{turn['identical_requests']:>5} {tokens:>22} "
+            f"{turn['wall'] * 1000:>9.1f}{delta(turn['wall'], base.get('wall')):<7} "
+            f"{turn['cpu'] * 1000:>9.1f}{delta(turn['cpu'], base.get('cpu')):<7} "
+            f"{turn['alloc_peak_bytes'] / 1024:>12.0f}"
+            f"{delta(turn['alloc_peak_bytes'], base.get('alloc_peak_bytes')):<8}"
+        )
+        for error in turn["errors"]:
+            lines.append(f"     error: {error}")
+
+    turns = report["turns"]
+    lines.append(
+        f"total: wall {sum(t['wall'] for t in turns) * 1000:.1f} ms, "
+        f"cpu {sum(t['cpu'] for t in turns) * 1000:.1f} ms, "
+        f"tokens sent {sum(t['tokens_sent'] for t in turns)} "
+        f"(recorded {sum(t['recorded_tokens_sent'] for t in turns)})"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,462 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import signal
+import time
+import uuid
+from collections import deque
+from contextlib import aclosing, suppress
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator
+from agent.agent import Agent
+from client.llm_client import LLMClientPool
+from config.config import Config
+from config.loader import load_config
+from tools.mcp import get_mcp_manager
+from ui.ndjson import encode_record, event_record, make_record
+from utils.errors import ConfigError
+from utils.metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 1 << 20
+SSE_PING_INTERVAL = 15.0
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+HTTP_REASONS = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    503: "Service Unavailable",
+}
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+    def json(self) -> dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError as e:
+            raise _HTTPError(400, f"Invalid JSON body: {e}") from e
+        if not isinstance(data, dict):
+            raise _HTTPError(400, "JSON body must be an object")
+        return data
+
+
+class Session:
+    """One isolated conversation: its own Agent, ContextManager and cwd.
+
+    Events from every run are kept in a bounded buffer of SSE frames so a
+    subscriber that reconnects with ``Last-Event-ID`` misses nothing that is
+    still buffered.
+    """
+
+    def __init__(
+        self, session_id: str, config: Config, agent: Agent, event_buffer: int
+    ) -> None:
+        self.id = session_id
+        self.config = config
+        self.agent = agent
+        self.created_at = time.time()
+        self.runs = 0
+        self.closed = False
+
+        self._frames: deque[tuple[int, str]] = deque(maxlen=event_buffer)
+        self._frame_bytes = 0
+        self._seq = 0
+        self._subscribers: set[asyncio.Queue[str | None]] = set()
+        self._run: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._run is not None and not self._run.done()
+
+    @property
+    def events_published(self) -> int:
+        return self._seq
+
+    def memory_bytes(self) -> int:
+        return self.agent.context_manager.memory_bytes() + self._frame_bytes
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "cwd": str(self.config.cwd),
+            "created_at": self.created_at,
+            "running": self.running,
+            "runs": self.runs,
+            "events": self._seq,
+            "context_tokens": self.agent.context_manager.estimated_tokens(),
+            "memory_bytes": self.memory_bytes(),
+            "usage": self.agent.total_usage,
+            "metrics": self.agent.metrics.summary(),
+        }
+
+    def publish(self, record: dict[str, Any]) -> None:
+        self._seq += 1
+        frame = (
+            f"id: {self._seq}\nevent: {record['type']}\n"
+            f"data: {encode_record(record)}\n"
+        )
+
+        if len(self._frames) == self._frames.maxlen:
+            self._frame_bytes -= len(self._frames[0][1])
+        self._frames.append((self._seq, frame))
+        self._frame_bytes += len(frame)
+
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # Too slow to keep up: drop it, it can resume from Last-Event-ID.
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def subscribe(self, last_event_id: int = 0) -> AsyncIterator[str | None]:
+        queue: asyncio.Queue[str | None] = asyncio.Queue(
+            maxsize=self._frames.maxlen or 0
+        )
+        for seq, frame in self._frames:
+            if seq > last_event_id:
+                queue.put_nowait(frame)
+        if self.closed:
+            queue.put_nowait(None)
+        else:
+            self._subscribers.add(queue)
+
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), SSE_PING_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self._subscribers.discard(queue)
+
+    def start(self, message: str) -> int:
+        if self.running:
+            raise _HTTPError(409, "A run is already in progress for this session")
+        self.runs += 1
+        self._run = asyncio.create_task(self._drive(message))
+        return self.runs
+
+    async def _drive(self, message: str) -> None:
+        try:
+            async with aclosing(self.agent.run(message)) as events:
+                async for event in events:
+                    self.publish(event_record(event))
+        except asyncio.CancelledError:
+            self.publish(make_record("run_cancelled", {"run": self.runs}))
+            raise
+        except Exception as e:
+            logger.exception(f"Session {self.id} run failed")
+            self.publish(make_record("error", {"error": f"{type(e).__name__}: {e}"}))
+
+    async def cancel(self) -> bool:
+        if not self.running:
+            return False
+        self._run.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._run
+        return True
+
+    async def close(self) -> None:
+        await self.cancel()
+        self.closed = True
+        for queue in list(self._subscribers):
+            with suppress(asyncio.QueueFull):
+                queue.put_nowait(None)
+        self._subscribers.clear()
+        await self.agent.__aexit__(None, None, None)
+
+
+class AgentServer:
+    """Hosts many agent sessions in one process behind a small HTTP API.
+
+    Routes (JSON bodies and responses):
+
+    - ``POST /sessions`` ``{"cwd": ...}`` creates a session
+    - ``GET /sessions`` and ``GET /sessions/{id}`` report sessions
+    - ``DELETE /sessions/{id}`` closes a session
+    - ``POST /sessions/{id}/messages`` ``{"message": ...}`` starts a run
+    - ``POST /sessions/{id}/cancel`` cancels the running turn
+    - ``GET /sessions/{id}/events`` streams the session's AgentEvents as SSE
+    - ``GET /stats`` reports process wide counters
+    - ``GET /metrics`` dumps token, latency and tool metrics as OpenMetrics text
+
+    Sessions share LLM clients, the tokenizer, the file cache and MCP servers.
+    """
+
+    def __init__(
+        self, config: Config, host: str | None = None, port: int | None = None
+    ) -> None:
+        self.config = config
+        self.host = host or config.server.host
+        self.port = config.server.port if port is None else port
+        self.sessions: dict[str, Session] = {}
+        self.llm_clients = LLMClientPool()
+        self.started_at = time.monotonic()
+
+        self._server: asyncio.Server | None = None
+        self._stopped: asyncio.Event | None = None
+
+    async def start(self) -> None:
+        self._stopped = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.started_at = time.monotonic()
+
+    def stop(self) -> None:
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def serve(self) -> None:
+        await self.start()
+
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with suppress(NotImplementedError, RuntimeError):
+                loop.add_signal_handler(sig, self.stop)
+
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for session in list(self.sessions.values()):
+            await session.close()
+        self.sessions.clear()
+        await self.llm_clients.close()
+        await get_mcp_manager().close()
+
+    def stats(self) -> dict[str, Any]:
+        sessions = list(self.sessions.values())
+        return {
+            "uptime": time.monotonic() - self.started_at,
+            "cpu_time": time.process_time(),
+            "sessions": len(sessions),
+            "running": sum(1 for s in sessions if s.running),
+            "events": sum(s.events_published for s in sessions),
+            "memory_bytes": sum(s.memory_bytes() for s in sessions),
+        }
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                try:
+                    keep_alive = await self._dispatch(request, writer)
+                except _HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": e.message})
+                    keep_alive = True
+                if not keep_alive or request.headers.get("connection") == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except _HTTPError as e:
+            with suppress(ConnectionError):
+                await self._send_json(writer, e.status, {"error": e.message})
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError as e:
+            raise _HTTPError(400, "Malformed request line") from e
+
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError as e:
+            raise _HTTPError(400, "Malformed Content-Length header") from e
+        if length < 0:
+            raise _HTTPError(400, "Malformed Content-Length header")
+        if length > MAX_BODY_BYTES:
+            raise _HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        return Request(
+            method=method.upper(),
+            path=target.split("?", 1)[0].rstrip("/") or "/",
+            headers=headers,
+            body=body,
+        )
+
+    async def _send_json(
+        self, writer: asyncio.StreamWriter, status: int, payload: Any
+    ) -> None:
+        await self._send_text(
+            writer, status, encode_record(payload), "application/json"
+        )
+
+    async def _send_text(
+        self, writer: asyncio.StreamWriter, status: int, text: str, content_type: str
+    ) -> None:
+        body = text.encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n"
+            ).encode("latin-1")
+            + body
+        )
+        await writer.drain()
+
+    def _get_session(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise _HTTPError(404, f"Unknown session: {session_id}")
+        return session
+
+    async def _dispatch(self, request: Request, writer: asyncio.StreamWriter) -> bool:
+        parts = request.path.strip("/").split("/")
+        route = (request.method, parts[0], len(parts))
+
+        if route == ("GET", "stats", 1):
+            await self._send_json(writer, 200, self.stats())
+        elif route == ("GET", "metrics", 1):
+            await self._send_text(
+                writer, 200, get_metrics().render(), OPENMETRICS_CONTENT_TYPE
+            )
+        elif route == ("GET", "sessions", 1):
+            await self._send_json(
+                writer, 200, [s.info() for s in self.sessions.values()]
+            )
+        elif route == ("POST", "sessions", 1):
+            session = await self._create_session(request.json())
+            await self._send_json(writer, 201, session.info())
+        elif route == ("GET", "sessions", 2):
+            await self._send_json(writer, 200, self._get_session(parts[1]).info())
+        elif route == ("DELETE", "sessions", 2):
+            session = self._get_session(parts[1])
+            del self.sessions[session.id]
+            await session.close()
+            await self._send_json(writer, 200, {"id": session.id, "closed": True})
+        elif route == ("POST", "sessions", 3) and parts[2] == "messages":
+            session = self._get_session(parts[1])
+            message = request.json().get("message")
+            if not isinstance(message, str) or not message:
+                raise _HTTPError(400, "'message' must be a non-empty string")
+            run = session.start(message)
+            await self._send_json(writer, 202, {"id": session.id, "run": run})
+        elif route == ("POST", "sessions", 3) and parts[2] == "cancel":
+            session = self._get_session(parts[1])
+            cancelled = await session.cancel()
+            await self._send_json(
+                writer, 200, {"id": session.id, "cancelled": cancelled}
+            )
+        elif route == ("GET", "sessions", 3) and parts[2] == "events":
+            session = self._get_session(parts[1])
+            await self._stream_events(session, request, writer)
+            return False
+        elif parts[0] in ("stats", "metrics", "sessions"):
+            raise _HTTPError(405, f"{request.method} not allowed on {request.path}")
+        else:
+            raise _HTTPError(404, f"No route for {request.path}")
+
+        return True
+
+    def _load_session_config(self, cwd: Path) -> Config:
+        try:
+            config = load_config(cwd=cwd)
+        except ConfigError as e:
+            raise _HTTPError(400, str(e)) from e
+
+        errors = config.validate()
+        if errors:
+            raise _HTTPError(400, "; ".join(errors))
+        return config
+
+    async def _create_session(self, body: dict[str, Any]) -> Session:
+        if len(self.sessions) >= self.config.server.max_sessions:
+            raise _HTTPError(503, "Session limit reached")
+
+        cwd = Path(body.get("cwd") or self.config.cwd)
+        # Config loading and agent setup scan the workspace (AGENTS.md files,
+        # the repository map); keep other sessions streaming meanwhile.
+        config = await asyncio.to_thread(self._load_session_config, cwd)
+        agent = await asyncio.to_thread(
+            Agent, config=config, llm_client=self.llm_clients.get(config)
+        )
+        if len(self.sessions) >= self.config.server.max_sessions:
+            await agent.__aexit__(None, None, None)
+            raise _HTTPError(503, "Session limit reached")
+
+        session_id = uuid.uuid4().hex
+        session = Session(session_id, config, agent, self.config.server.event_buffer)
+        self.sessions[session_id] = session
+        return session
+
+    async def _stream_events(
+        self, session: Session, request: Request, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            last_event_id = int(request.headers.get("last-event-id") or 0)
+        except ValueError:
+            last_event_id = 0
+
+        writer.write(
+            (
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream\r\n"
+                "Cache-Control: no-cache\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode("latin-1")
+        )
+        await writer.drain()
+
+        async with aclosing(session.subscribe(last_event_id)) as frames:
+            async for frame in frames:
+                writer.write(frame.encode("utf-8"))
+                await writer.drain()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Callable
+from pydantic import BaseModel, Field
+from agent.events import AgentEventType
+from config.config import SubagentsConfig
+from tools.base import Tool, ToolKind, ToolInvocation, ToolResult
+from tools.registry import ToolRegistry
+from utils.text import truncate_text
+
+if TYPE_CHECKING:
+    from agent.agent import Agent
+
+SUBAGENT_PREAMBLE = (
+    "You are a sub-agent working on one part of a larger task for another agent. "
+    "Work autonomously using the tools available to you, then reply with a concise, "
+    "self-contained report of your findings. Include file paths and line numbers "
+    "where relevant. Do not ask questions; nobody will answer them."
+)
+
+
+class _Slots:
+    """The process-wide count of running sub-agents, shared by every parent.
+
+    Each caller waits until fewer than its current ``max_concurrency`` are
+    running, so a reloaded limit applies to the next acquisition without
+    letting the running count exceed it.
+    """
+
+    def __init__(self) -> None:
+        self.running = 0
+        self._changed = asyncio.Condition()
+
+    @asynccontextmanager
+    async def hold(self, settings: Callable[[], SubagentsConfig]):
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: self.running < settings().max_concurrency
+            )
+            self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            async with self._changed:
+                self._changed.notify_all()
+
+
+_slots = _Slots()
+
+
+class SpawnSubagentsParams(BaseModel):
+    tasks: list[str] = Field(
+        ...,
+        min_length=1,
+        description="Independent task descriptions. Each task is handled by its own sub-agent, and all tasks run in parallel.",
+    )
+    tools: list[str] | None = Field(
+        None,
+        description="Names of the tools the sub-agents may use. Defaults to every tool they are allowed, which is the read-only tools unless configured otherwise.",
+    )
+
+
+class SpawnSubagentsTool(Tool):
+    name = "spawn_subagents"
+    description = (
+        "Run several independent sub-agents in parallel, one per task, and return "
+        "their summarized reports as a single result. Use this for wide tasks that "
+        "split into independent parts, such as auditing every module for an issue. "
+        "Sub-agents start with an empty conversation, so each task must be self-contained."
+    )
+    kind = ToolKind.READ
+    schema = SpawnSubagentsParams
+    timeout = 900.0
+
+    def __init__(self, parent: Agent) -> None:
+        super().__init__()
+        self.parent = parent
+
+    @property
+    def settings(self) -> SubagentsConfig:
+        return self.parent.config.subagents
+
+    def _build_registry(self, requested: list[str] | None) -> ToolRegistry:
+        """The requested tools, narrowed to ``subagents.tools`` when configured
+        and otherwise to the read-only ones."""
+        configured = self.settings.tools
+        registry = ToolRegistry()
+
+        for tool in self.parent.tool_registry.get_tools():
+            if tool.name == self.name:
+                continue
+            if requested and tool.name not in requested:
+                continue
+            if configured is not None:
+                if tool.name not in configured:
+                    continue
+            elif tool.is_mutating({}):
+                continue
+            registry.register(tool)
+
+        return registry
+
+    async def _run_task(self, task: str, registry: ToolRegistry) -> tuple[bool, str]:
+        from agent.agent import Agent
+
+        config = self.parent.config.model_copy(
+            update={"max_turns": self.settings.max_turns}
+        )
+
+        async with _slots.hold(lambda: self.settings):
+            child = Agent(
+                config=config,
+                llm_client=self.parent.llm_client,
+                tool_registry=registry,
+            )
+            async with child:
+                response: str | None = None
+                error: str | None = None
+                async for event in child.run(
+                    f"{SUBAGENT_PREAMBLE}\n\n# Task\n\n{task}"
+                ):
+                    if event.type == AgentEventType.TEXT_COMPLETE:
+                        response = event.data.get("content")
+                    elif event.type == AgentEventType.AGENT_ERROR:
+                        error = event.data.get("error")
+
+        if response:
+            return True, response
+        return False, error or "Sub-agent finished without a response"
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = SpawnSubagentsParams(**invocation.params)
+        if len(params.tasks) > self.settings.max_tasks:
+            return ToolResult.error_result(
+                f"Too many tasks: {len(params.tasks)} (maximum is {self.settings.max_tasks})"
+            )
+
+        registry = self._build_registry(params.tools)
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *(self._run_task(task, registry) for task in params.tasks),
+            return_exceptions=True,
+        )
+
+        sections: list[str] = []
+        succeeded = 0
+        for i, (task, result) in enumerate(zip(params.tasks, results), start=1):
+            if isinstance(result, BaseException):
+                ok, text = False, f"Sub-agent failed: {result}"
+            else:
+                ok, text = result
+            succeeded += ok
+
+            summary = truncate_text(
+                text,
+                self.parent.config.model_name,
+                self.settings.result_max_tokens,
+            )
+            title = task.strip().splitlines()[0][:80] if task.strip() else ""
+            status = "" if ok else " (failed)"
+            sections.append(f"## Task {i}{status}: {title}\n\n{summary}")
+
+        return ToolResult.success_result(
+            "\n\n".join(sections),
+            metadata={
+                "tasks": len(params.tasks),
+                "succeeded": succeeded,
+                "tools": [tool.name for tool in registry.get_tools()],
+                "duration": round(time.monotonic() - started, 3),
+            },
+        )
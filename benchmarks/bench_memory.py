@@ -0,0 +1,176 @@
+"""Memory benchmarks for streaming and conversation history, using tracemalloc.
+
+Reports how many bytes and allocations each streamed token costs on its way
+through the agent loop, and how much a 1k-message history takes. The numbers
+are deterministic for a given Python version, so a saved baseline can be
+compared exactly.
+
+Usage:
+    python -m benchmarks.bench_memory [--tokens 20000] [--save baseline.json]
+    python -m benchmarks.bench_memory --compare baseline.json [--threshold 1.1]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, AsyncGenerator, Callable
+from client.response import StreamEvent, StreamEventType, TextDelta, TokenUsage
+from config.config import Config
+from context.contextmanager import ContextManager
+
+HISTORY_MESSAGES = 1000
+
+
+class StreamingClient:
+    """Streams ``tokens`` one-word text deltas, like the real client does."""
+
+    def __init__(self, tokens: int) -> None:
+        self.tokens = tokens
+
+    async def chat_completion(
+        self, messages: list[dict[str, Any]], **kwargs: Any
+    ) -> AsyncGenerator[StreamEvent, None]:
+        for i in range(self.tokens):
+            yield StreamEvent(
+                type=StreamEventType.TEXT_DELTA,
+                text_delta=TextDelta(content=f"w{i % 1000} "),
+            )
+        yield StreamEvent(
+            type=StreamEventType.MESSAGE_COMPLETE,
+            finish_reason="stop",
+            usage=TokenUsage(completion_tokens=self.tokens),
+        )
+
+    async def close(self) -> None:
+        pass
+
+
+def traced(fn: Callable[[], Any]) -> dict[str, int]:
+    """Runs ``fn`` under tracemalloc and returns what it kept and peaked at."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        kept = fn()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(s.count_diff for s in after.compare_to(before, "filename"))
+    del kept
+    return {
+        "retained_bytes": current - start_bytes,
+        "peak_bytes": peak - start_bytes,
+        "retained_blocks": blocks,
+    }
+
+
+def bench_stream(tokens: int) -> dict[str, float]:
+    """Streams one long reply through ``Agent.run``.
+
+    The consumer keeps every event, as the server does for ``Last-Event-ID``
+    resumption, so per-event object overhead shows up in retained bytes.
+    """
+    from agent.agent import Agent
+
+    loop = asyncio.new_event_loop()
+    agent = Agent(config=Config(), llm_client=StreamingClient(tokens))
+
+    async def consume() -> list[Any]:
+        return [event async for event in agent.run("write a long answer")]
+
+    try:
+        stats = traced(lambda: loop.run_until_complete(consume()))
+    finally:
+        loop.close()
+    return {
+        "stream.retained_bytes_per_token": stats["retained_bytes"] / tokens,
+        "stream.peak_bytes_per_token": stats["peak_bytes"] / tokens,
+        "stream.retained_blocks_per_token": stats["retained_blocks"] / tokens,
+    }
+
+
+def bench_history(messages: int = HISTORY_MESSAGES) -> dict[str, float]:
+    def fill() -> ContextManager:
+        context = ContextManager(Config())
+        for i in range(messages):
+            if i % 3 == 0:
+                context.add_user_message(f"request {i}: look at utils/text.py")
+            elif i % 3 == 1:
+                context.add_assistant_message(
+                    "",
+                    tool_calls=[
+                        {
+                            "id": f"call_{i}",
+                            "type": "function",
+                            "function": {
+                                "name": "read_file",
+                                "arguments": '{"path":"utils/text.py"}',
+                            },
+                        }
+                    ],
+                )
+            else:
+                context.add_tool_result(f"call_{i - 1}", f"line {i}")
+        return context
+
+    context = fill()
+    scale = 1000 / messages
+    stats = traced(fill)
+    messages_stats = traced(context.get_messages)
+    return {
+        "history.retained_bytes_per_1k": stats["retained_bytes"] * scale,
+        "history.retained_blocks_per_1k": stats["retained_blocks"] * scale,
+        "history.get_messages_bytes_per_1k": messages_stats["retained_bytes"] * scale,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20_000)
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=1.1)
+    args = parser.parse_args()
+
+    results = {**bench_stream(args.tokens), **bench_history()}
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    baseline: dict[str, float] = {}
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+
+    regressions: list[str] = []
+    print(f"{'metric':<38}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<38}{'-':>12}{value:>12.1f}")
+            continue
+        ratio = value / base if base else 1.0
+        flag = ""
+        if ratio > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<38}{base:>12.1f}{value:>12.1f}{ratio:>8.2f}{flag}")
+
+    if regressions:
+        print(
+            f"{len(regressions)} metric(s) above {args.threshold:g}x baseline: "
+            f"{', '.join(regressions)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
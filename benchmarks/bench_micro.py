@@ -0,0 +1,349 @@
+"""Microbenchmarks for the hot paths in utils, context, tools and the TUI.
+
+Every case runs offline on fixed synthetic inputs and reports the median time
+per call over ``--repeat`` runs. Results can be saved as a JSON baseline and
+later runs compared against it; the comparison exits non-zero when any case
+is slower than ``--threshold`` times its baseline.
+
+Usage:
+    python -m benchmarks.bench_micro [--filter text.] [--save baseline.json]
+    python -m benchmarks.bench_micro --compare baseline.json [--threshold 1.3]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+from rich.console import Console
+from config.config import Config
+from context.contextmanager import ContextManager
+from tools.base import ToolInvocation
+from tools.builtin import FetchOutputTool, ReadFileTool
+from ui.tui import AGENT_THEME, TUI
+from utils.blob_store import BlobStore
+from utils.text import count_tokens, truncate_text
+
+MODEL = "gpt-4"
+TEXT_SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+HISTORY_SIZES = (10, 100, 1000)
+LARGE_FILE_BYTES = 10 * 1024 * 1024 - 4096
+
+Factory = Callable[[Path], Callable[[], Any]]
+CASES: dict[str, Factory] = {}
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _run(coro: Any) -> Any:
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+def synthetic_text(chars: int) -> str:
+    lines: list[str] = []
+    size = 0
+    i = 0
+    while size < chars:
+        line = (
+            f"    result_{i % 97} = compute(value={i * 31 % 1000}, "
+            f"name='item_{i}')  # step {i}"
+        )
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    return "\n".join(lines)[:chars]
+
+
+def _count_tokens(chars: int, workdir: Path) -> Callable[[], Any]:
+    text = synthetic_text(chars)
+    return lambda: count_tokens(text, MODEL)
+
+
+def _truncate_text(chars: int, workdir: Path) -> Callable[[], Any]:
+    text = synthetic_text(chars)
+    return lambda: truncate_text(text, MODEL, ReadFileTool.MAX_OUTPUT_TOKENS)
+
+
+def _fill_context(context: ContextManager, messages: int) -> None:
+    body = synthetic_text(500)
+    for i in range(messages):
+        if i % 3 == 0:
+            context.add_user_message(f"request {i}: {body}")
+        elif i % 3 == 1:
+            context.add_assistant_message(
+                f"step {i}",
+                tool_calls=[
+                    {
+                        "id": f"call_{i}",
+                        "type": "function",
+                        "function": {
+                            "name": "read_file",
+                            "arguments": '{"path":"main.py"}',
+                        },
+                    }
+                ],
+            )
+        else:
+            context.add_tool_result(f"call_{i - 1}", body)
+
+
+def _context_add(messages: int, workdir: Path) -> Callable[[], Any]:
+    return lambda: _fill_context(ContextManager(Config()), messages)
+
+
+def _context_add_tool_result(chars: int, workdir: Path) -> Callable[[], Any]:
+    context = ContextManager(Config())
+    text = synthetic_text(chars)
+    return lambda: context.add_tool_result("call_0", text)
+
+
+def _context_get_messages(messages: int, workdir: Path) -> Callable[[], Any]:
+    context = ContextManager(Config())
+    _fill_context(context, messages)
+    return context.get_messages
+
+
+def _read_file(name: str, params: dict[str, Any], workdir: Path) -> Callable[[], Any]:
+    tool = ReadFileTool()
+    invocation = ToolInvocation(params={"path": name, **params}, cwd=workdir)
+    return lambda: _run(tool.execute(invocation))
+
+
+def _schemas(workdir: Path) -> Callable[[], Any]:
+    tools = [ReadFileTool(), FetchOutputTool(BlobStore(workdir / "blobs"))]
+    return lambda: [tool.to_openai_schema() for tool in tools]
+
+
+def _validate_params(valid: bool, workdir: Path) -> Callable[[], Any]:
+    tool = ReadFileTool()
+    params = {"path": "main.py", "offset": 10, "limit": 200}
+    if not valid:
+        params = {"path": 42, "offset": 0, "limit": -1}
+    return lambda: tool.validate_params(params)
+
+
+def _make_tui() -> TUI:
+    console = Console(
+        file=io.StringIO(),
+        force_terminal=True,
+        width=120,
+        theme=AGENT_THEME,
+        color_system="truecolor",
+    )
+    return TUI(config=Config(), console=console)
+
+
+def _read_result(name: str, workdir: Path, **params: Any):
+    tool = ReadFileTool()
+    invocation = ToolInvocation(params={"path": name, **params}, cwd=workdir)
+    return _run(tool.execute(invocation))
+
+
+def _extract_read_file_code(workdir: Path) -> Callable[[], Any]:
+    tui = _make_tui()
+    output = _read_result("large.txt", workdir, offset=1000, limit=2000).output
+    return lambda: tui._extract_read_file_code(output)
+
+
+def _render_tool_call(workdir: Path) -> Callable[[], Any]:
+    tui = _make_tui()
+    arguments = {"path": "small.py", "offset": 1, "limit": 200}
+
+    def render() -> None:
+        tui.console.file = io.StringIO()
+        tui.tool_call_start("call_0001", "read_file", "read", arguments)
+
+    return render
+
+
+def _render_tool_result(kind: str, workdir: Path) -> Callable[[], Any]:
+    tui = _make_tui()
+    result = _read_result("small.py", workdir)
+    payload = result.payload if kind == "file" else None
+    output = result.output if kind == "file" else synthetic_text(20_000)
+
+    def render() -> None:
+        tui.console.file = io.StringIO()
+        tui.tool_call_complete(
+            "call_0001",
+            "read_file" if kind == "file" else "shell",
+            "read",
+            True,
+            output,
+            None,
+            result.metadata if kind == "file" else {},
+            False,
+            payload,
+        )
+
+    return render
+
+
+def _render_stream(workdir: Path) -> Callable[[], Any]:
+    tui = _make_tui()
+    tokens = [word + " " for word in synthetic_text(20_000).split(" ")]
+
+    def render() -> None:
+        tui.console.file = io.StringIO()
+        tui.begin_assistant()
+        for token in tokens:
+            tui.stream_assistant_delta(token)
+        tui.end_assistant()
+
+    return render
+
+
+for _label, _chars in TEXT_SIZES.items():
+    CASES[f"text.count_tokens[{_label}]"] = partial(_count_tokens, _chars)
+    CASES[f"text.truncate_text[{_label}]"] = partial(_truncate_text, _chars)
+for _messages in HISTORY_SIZES:
+    CASES[f"context.add_messages[{_messages}]"] = partial(_context_add, _messages)
+    CASES[f"context.get_messages[{_messages}]"] = partial(
+        _context_get_messages, _messages
+    )
+CASES["context.add_tool_result[1M]"] = partial(_context_add_tool_result, 1_000_000)
+CASES["read_file.execute[small]"] = partial(_read_file, "small.py", {})
+CASES["read_file.execute[10MB]"] = partial(_read_file, "large.txt", {})
+CASES["read_file.execute[paged]"] = partial(
+    _read_file, "large.txt", {"offset": 50_000, "limit": 200}
+)
+CASES["tool.to_openai_schema"] = _schemas
+CASES["tool.validate_params[valid]"] = partial(_validate_params, True)
+CASES["tool.validate_params[invalid]"] = partial(_validate_params, False)
+CASES["tui.extract_read_file_code"] = _extract_read_file_code
+CASES["tui.tool_call_start"] = _render_tool_call
+CASES["tui.tool_call_complete[file]"] = partial(_render_tool_result, "file")
+CASES["tui.tool_call_complete[text]"] = partial(_render_tool_result, "text")
+CASES["tui.stream_assistant[20k]"] = _render_stream
+
+
+def write_fixtures(workdir: Path) -> None:
+    (workdir / "small.py").write_text(synthetic_text(4_000) + "\n", encoding="utf-8")
+    (workdir / "large.txt").write_text(
+        synthetic_text(LARGE_FILE_BYTES) + "\n", encoding="utf-8"
+    )
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> dict[str, Any]:
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run_suite(selected: list[str], repeat: int, min_time: float) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        write_fixtures(workdir)
+        for name in selected:
+            fn = CASES[name](workdir)
+            results[name] = measure(fn, repeat, min_time)
+            print(
+                f"{name:<36}{_format_seconds(results[name]['median']):>12}",
+                file=sys.stderr,
+                flush=True,
+            )
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.time(),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """Prints a comparison table and returns the names of regressed cases."""
+    regressions: list[str] = []
+    print(f"{'case':<36}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<36}{'-':>12}{_format_seconds(result['median']):>12}")
+            continue
+        ratio = result["median"] / base["median"] if base["median"] else 1.0
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<36}{_format_seconds(base['median']):>12}"
+            f"{_format_seconds(result['median']):>12}{ratio:>8.2f}{flag}"
+        )
+    return regressions
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only cases containing this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="seconds per repeat (at least)"
+    )
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=1.3)
+    parser.add_argument("--list", action="store_true", help="list cases and exit")
+    args = parser.parse_args()
+
+    selected = [name for name in CASES if args.filter in name]
+    if args.list:
+        print("\n".join(selected))
+        return
+
+    try:
+        current = run_suite(selected, args.repeat, args.min_time)
+    finally:
+        if _loop is not None:
+            _loop.close()
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(
+                f"{len(regressions)} case(s) slower than {args.threshold:g}x "
+                f"baseline: {', '.join(regressions)}"
+            )
+            sys.exit(1)
+    elif not args.save:
+        print(json.dumps(current, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Streaming render throughput: sustained tokens/sec rendered and CPU per token.
+
+Usage: python -m benchmarks.bench_render [--tokens 20000] [--markdown]
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import time
+from rich.console import Console
+from config.config import Config, UIConfig
+from ui.tui import AGENT_THEME, TUI
+
+WORDS = ["the", "agent", "reads", "file", "and", "writes", "code", "`x`", "**y**"]
+
+
+def synthetic_tokens(count: int) -> list[str]:
+    tokens: list[str] = []
+    for i in range(count):
+        token = WORDS[i % len(WORDS)]
+        if i % 97 == 96:
+            token += "\n\n"
+        elif i % 13 == 12:
+            token += "\n"
+        else:
+            token += " "
+        tokens.append(token)
+    return tokens
+
+
+def _make_console(width: int) -> Console:
+    return Console(
+        file=io.StringIO(),
+        force_terminal=True,
+        width=width,
+        theme=AGENT_THEME,
+        color_system="truecolor",
+    )
+
+
+def run_per_token(tokens: list[str], width: int) -> Console:
+    console = _make_console(width)
+    for token in tokens:
+        console.print(token, end="", markup=False)
+    return console
+
+
+def run_coalesced(tokens: list[str], width: int, markdown: bool) -> Console:
+    console = _make_console(width)
+    tui = TUI(config=Config(ui=UIConfig(markdown=markdown)), console=console)
+    tui.begin_assistant()
+    for token in tokens:
+        tui.stream_assistant_delta(token)
+    tui.end_assistant()
+    return console
+
+
+def measure(name: str, fn, tokens: list[str]) -> dict[str, float]:
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    fn()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    return {
+        "name": name,
+        "tokens": len(tokens),
+        "tokens_per_sec": len(tokens) / wall if wall else float("inf"),
+        "cpu_us_per_token": cpu / len(tokens) * 1e6,
+        "wall_s": wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=20_000)
+    parser.add_argument("--width", type=int, default=100)
+    parser.add_argument("--markdown", action="store_true")
+    args = parser.parse_args()
+
+    tokens = synthetic_tokens(args.tokens)
+    results = [
+        measure("per-token print", lambda: run_per_token(tokens, args.width), tokens),
+        measure(
+            "coalesced live",
+            lambda: run_coalesced(tokens, args.width, args.markdown),
+            tokens,
+        ),
+    ]
+
+    print(f"{'renderer':<18}{'tokens/s':>14}{'cpu us/token':>16}{'wall s':>10}")
+    for r in results:
+        print(
+            f"{r['name']:<18}{r['tokens_per_sec']:>14,.0f}"
+            f"{r['cpu_us_per_token']:>16.1f}{r['wall_s']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
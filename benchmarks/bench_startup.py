@@ -0,0 +1,152 @@
+"""CLI startup: time from process start to the first LLM request.
+
+Runs ``main.py --startup-profile`` against an unreachable endpoint, reads the
+phase report from stderr and exits non-zero when the median time to first
+request exceeds ``--max-ms``, or ``--threshold`` times a saved baseline.
+
+The run is fully offline. With ``--tokenizer auto`` (the default), tiktoken is
+used only if its encoding loads without a download; otherwise the runs count
+tokens by estimate (``AI_AGENT_TOKENIZER=estimate``), and the report says so.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs 5] [--max-ms 1500] [--save base.json]
+    python -m benchmarks.bench_startup --compare base.json [--threshold 1.3]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+FIRST_REQUEST_RE = re.compile(r"time to first request: ([\d.]+) ms")
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def tiktoken_available(timeout: float = 10.0) -> bool:
+    """Whether tiktoken's encoding loads in a child with no route to the network."""
+    env = dict(os.environ)
+    env.update(HTTP_PROXY="http://127.0.0.1:9", HTTPS_PROXY="http://127.0.0.1:9")
+    try:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import tiktoken; tiktoken.get_encoding('cl100k_base')",
+            ],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return False
+    return result.returncode == 0
+
+
+def run_once(timeout: float, tokenizer: str = "tiktoken") -> tuple[float, str]:
+    env = dict(os.environ)
+    env["API_KEY"] = "startup-bench"
+    if tokenizer == "estimate":
+        env["AI_AGENT_TOKENIZER"] = "estimate"
+    env["BASE_URL"] = f"http://127.0.0.1:{_closed_port()}/v1"
+
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.Popen(
+            [sys.executable, str(ROOT / "main.py"), "--startup-profile"]
+            + ["--output", "ndjson", "--cwd", cwd, "hi"],
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+
+        report: list[str] = []
+        watchdog = threading.Timer(timeout, proc.kill)
+        watchdog.start()
+        try:
+            for line in proc.stderr:
+                if line.startswith("startup:"):
+                    report.append(line.rstrip())
+                match = FIRST_REQUEST_RE.search(line)
+                if match:
+                    return float(match.group(1)), "\n".join(report)
+        finally:
+            watchdog.cancel()
+            proc.kill()
+            proc.wait()
+
+    raise RuntimeError("main.py exited without reaching the first request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=1500.0)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument(
+        "--tokenizer", choices=("auto", "tiktoken", "estimate"), default="auto"
+    )
+    parser.add_argument("--save", type=Path, help="write results as a JSON baseline")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=1.3)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    tokenizer = args.tokenizer
+    if tokenizer == "auto":
+        tokenizer = "tiktoken" if tiktoken_available() else "estimate"
+        if tokenizer == "estimate":
+            print("tiktoken encoding not cached; counting tokens by estimate")
+
+    timings: list[float] = []
+    for _ in range(args.runs):
+        ms, report = run_once(args.timeout, tokenizer)
+        timings.append(ms)
+        if args.verbose:
+            print(report)
+
+    median = statistics.median(timings)
+    print(
+        f"time to first request: median {median:.1f} ms, "
+        f"min {min(timings):.1f} ms, max {max(timings):.1f} ms "
+        f"over {len(timings)} runs (cap {args.max_ms:.0f} ms, {tokenizer} tokenizer)"
+    )
+    results = {"median_ms": median, "timings_ms": timings, "tokenizer": tokenizer}
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    failed = median > args.max_ms
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        ratio = median / baseline["median_ms"] if baseline["median_ms"] else 1.0
+        print(
+            f"baseline median {baseline['median_ms']:.1f} ms "
+            f"({baseline.get('tokenizer', '?')} tokenizer), ratio {ratio:.2f}"
+        )
+        if baseline.get("tokenizer", tokenizer) != tokenizer:
+            print("warning: baseline used a different tokenizer", file=sys.stderr)
+        failed = failed or ratio > args.threshold
+    if failed:
+        print("FAIL: startup regression", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
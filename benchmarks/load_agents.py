@@ -0,0 +1,157 @@
+"""In-process load test: N concurrent agent sessions against the scripted stub LLM.
+
+Each session runs ``--turns`` user turns. With the default script, every turn
+is a ``read_file`` tool call followed by a streamed answer. Reports
+throughput, turn latency, event-loop lag (how late a periodic timer fires),
+prompt cache hits and the failures the stub injected.
+
+Usage: python -m benchmarks.load_agents [--sessions 50] [--turns 3]
+       [--ttft 0.05] [--delay 0.005] [--error-rate 0.05] [--script steps.json]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from benchmarks.stub_llm import add_stub_arguments, load_script, start_stub_llm
+
+DEFAULT_SCRIPT = [
+    {
+        "content": "Let me read the README first. ",
+        "tool_calls": [{"name": "read_file", "arguments": {"path": "README.md"}}],
+    },
+    {"content": " ".join(f"The project does thing {i}." for i in range(20))},
+]
+
+
+async def monitor_lag(interval: float, samples: list[float]) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - started - interval)
+
+
+async def run_session(
+    agent: Any, turns: int, latencies: list[float], errors: list[str]
+) -> None:
+    from agent.events import AgentEventType
+
+    for turn in range(turns):
+        started = time.perf_counter()
+        async for event in agent.run(f"turn {turn}: summarize the project"):
+            if event.type == AgentEventType.AGENT_ERROR:
+                errors.append(event.data.get("error", ""))
+        latencies.append(time.perf_counter() - started)
+
+
+async def drive(args: argparse.Namespace, cwd: Path) -> dict[str, Any]:
+    server, stub = await start_stub_llm(
+        tokens=args.tokens,
+        delay=args.delay,
+        ttft=args.ttft,
+        jitter=args.jitter,
+        script=load_script(args.script) if args.script else DEFAULT_SCRIPT,
+        error_rate=args.error_rate,
+        disconnect_rate=args.disconnect_rate,
+        seed=args.seed,
+    )
+    port = server.sockets[0].getsockname()[1]
+    os.environ["API_KEY"] = os.environ.get("API_KEY") or "load-test"
+    os.environ["BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+
+    from agent.agent import Agent
+    from agent.metrics import percentile
+    from client.llm_client import LLMClientPool
+    from config.config import Config
+
+    pool = LLMClientPool()
+    agents = []
+    for _ in range(args.sessions):
+        config = Config(cwd=cwd)
+        agents.append(Agent(config=config, llm_client=pool.get(config)))
+
+    lag: list[float] = []
+    latencies: list[float] = []
+    errors: list[str] = []
+    monitor = asyncio.create_task(monitor_lag(args.lag_interval, lag))
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    try:
+        await asyncio.gather(
+            *(run_session(agent, args.turns, latencies, errors) for agent in agents)
+        )
+    finally:
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+        monitor.cancel()
+        await pool.close()
+        server.close()
+        await server.wait_closed()
+
+    prompt = sum(a.total_usage.prompt_tokens for a in agents)
+    cached = sum(a.total_usage.cached_tokens for a in agents)
+    return {
+        "sessions": args.sessions,
+        "turns": len(latencies),
+        "llm_requests": stub.requests,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "turns_per_s": len(latencies) / wall if wall else 0.0,
+        "turn_latency_s": {f"p{p}": percentile(latencies, p) for p in (50, 90, 99)},
+        "loop_lag_ms": {
+            **{f"p{p}": percentile(lag, p) * 1000 for p in (50, 99)},
+            "max": max(lag, default=0.0) * 1000,
+        },
+        "cache_hit_ratio": cached / prompt if prompt else 0.0,
+        "injected_429s": stub.rejected,
+        "injected_disconnects": stub.disconnected,
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--lag-interval", type=float, default=0.01)
+    parser.add_argument("--json", action="store_true", help="print raw results")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "README.md").write_text(
+            "\n".join(f"Line {i} of the project README." for i in range(200)) + "\n",
+            encoding="utf-8",
+        )
+        results = asyncio.run(drive(args, cwd))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    turns = results["turn_latency_s"]
+    lag = results["loop_lag_ms"]
+    print(
+        f"sessions: {results['sessions']}, turns: {results['turns']} "
+        f"({results['llm_requests']} LLM requests) in {results['wall_s']:.2f}s "
+        f"({results['turns_per_s']:.1f} turns/s, cpu {results['cpu_s']:.2f}s)\n"
+        f"turn latency: p50={turns['p50']:.3f}s p90={turns['p90']:.3f}s "
+        f"p99={turns['p99']:.3f}s\n"
+        f"event loop lag: p50={lag['p50']:.2f}ms p99={lag['p99']:.2f}ms "
+        f"max={lag['max']:.2f}ms\n"
+        f"prompt cache hit ratio: {results['cache_hit_ratio']:.0%}\n"
+        f"injected: {results['injected_429s']} 429s, "
+        f"{results['injected_disconnects']} disconnects; "
+        f"agent errors: {results['errors']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Drives the MCP client pool against ``benchmarks.stub_mcp``.
+
+Several registries (standing in for sessions) sync tools from one pooled stub
+server and issue ``--calls`` overlapping tool calls. The run then checks that
+every call shared one server process, that a ``list_changed`` notification
+re-syncs the catalog, that changing the server's config replaces its tools
+and process, and that removing the server unregisters them. Exits non-zero
+when a check fails.
+
+Usage: python -m benchmarks.load_mcp [--sessions 8] [--calls 200]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from config.config import MCPServerConfig
+from tools.mcp import MCPManager
+from tools.registry import ToolRegistry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _server(tag: str) -> MCPServerConfig:
+    return MCPServerConfig(
+        command=sys.executable,
+        args=["-m", "benchmarks.stub_mcp", "--tag", tag, "--page-size", "2"],
+        cwd=ROOT,
+    )
+
+
+async def _call(registry: ToolRegistry, tool: str, **params) -> str:
+    result = await registry.invoke(tool, params, ROOT)
+    if not result.success:
+        raise AssertionError(f"{tool} failed: {result.error}")
+    return result.output
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+async def drive(args: argparse.Namespace) -> list[str]:
+    failures: list[str] = []
+
+    def check(ok: bool, message: str) -> None:
+        print(f"{'ok  ' if ok else 'FAIL'} {message}")
+        if not ok:
+            failures.append(message)
+
+    manager = MCPManager()
+    registries = [ToolRegistry() for _ in range(args.sessions)]
+    try:
+        for registry in registries:
+            manager.configure(registry, {"stub": _server("a:")})
+        await asyncio.gather(*(manager.sync_tools(r) for r in registries))
+        check(all(r.get("stub__echo") for r in registries), "tools registered lazily")
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _call(registries[i % args.sessions], "stub__sleep", seconds=0.05)
+                for i in range(args.calls)
+            )
+        )
+        elapsed = time.perf_counter() - started
+        check(
+            elapsed < args.calls * 0.05 / 4,
+            f"{args.calls} overlapping calls took {elapsed:.2f}s (multiplexed)",
+        )
+
+        pids = set(await asyncio.gather(*(_call(r, "stub__pid") for r in registries)))
+        check(len(pids) == 1, f"{args.sessions} sessions share one server")
+        old_pid = int(pids.pop())
+
+        await _call(registries[0], "stub__add_tool", name="extra")
+        await asyncio.sleep(0.1)
+        await manager.sync_tools(registries[1])
+        check(
+            registries[1].get("stub__extra") is not None,
+            "list_changed re-syncs the catalog",
+        )
+
+        for registry in registries:
+            manager.configure(registry, {"stub": _server("b:")})
+        await asyncio.gather(*(manager.sync_tools(r) for r in registries))
+        echoes = await asyncio.gather(
+            *(_call(r, "stub__echo", text="x") for r in registries)
+        )
+        check(set(echoes) == {"b:x"}, "config change reaches every session")
+        await asyncio.sleep(0.1)
+        check(not _process_alive(old_pid), "replaced server process exited")
+
+        pid = int(await _call(registries[0], "stub__pid"))
+        for registry in registries[1:]:
+            manager.configure(registry, {})
+        await asyncio.gather(*(manager.sync_tools(r) for r in registries))
+        check(
+            not any(r.get("stub__echo") for r in registries[1:]),
+            "removed server's tools are unregistered",
+        )
+        check(
+            await _call(registries[0], "stub__echo", text="x") == "b:x",
+            "server kept for the session still using it",
+        )
+
+        manager.configure(registries[0], {})
+        await manager.sync_tools(registries[0])
+        await asyncio.sleep(0.1)
+        check(not _process_alive(pid), "server stopped once no session uses it")
+    finally:
+        await manager.close()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    if asyncio.run(drive(args)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Load test for ``main.py --serve`` against the stub LLM.
+
+Starts the stub LLM and the session server as subprocesses, then drives
+``--sessions`` concurrent sessions through ``--turns`` turns each over the
+HTTP API while consuming their SSE event streams. Reports turn and event
+latency (event timestamp to client receipt), server CPU and sessions per core.
+
+Usage: python -m benchmarks.load_server [--sessions 50] [--turns 3]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            (await client.get("/stats")).raise_for_status()
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_session(
+    client: httpx.AsyncClient,
+    turns: int,
+    cwd: str,
+    event_latencies: list[float],
+    turn_latencies: list[float],
+) -> None:
+    session_id = (await client.post("/sessions", json={"cwd": cwd})).json()["id"]
+    turn_done = asyncio.Queue()
+
+    async def consume() -> None:
+        async with client.stream("GET", f"/sessions/{session_id}/events") as response:
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                record = json.loads(line[6:])
+                event_latencies.append(time.time() - record["ts"])
+                if record["type"] in ("agent_end", "run_cancelled", "error"):
+                    turn_done.put_nowait(record)
+
+    consumer = asyncio.create_task(consume())
+    try:
+        for turn in range(turns):
+            started = time.monotonic()
+            response = await client.post(
+                f"/sessions/{session_id}/messages",
+                json={"message": f"turn {turn}: summarize the project"},
+            )
+            response.raise_for_status()
+            await turn_done.get()
+            turn_latencies.append(time.monotonic() - started)
+    finally:
+        await client.delete(f"/sessions/{session_id}")
+        consumer.cancel()
+
+
+async def drive(args: argparse.Namespace, base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=args.sessions * 2 + 10)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        await _wait_ready(client)
+        cpu_before = (await client.get("/stats")).json()["cpu_time"]
+
+        event_latencies: list[float] = []
+        turn_latencies: list[float] = []
+        started = time.monotonic()
+        await asyncio.gather(
+            *(
+                run_session(
+                    client, args.turns, args.cwd, event_latencies, turn_latencies
+                )
+                for _ in range(args.sessions)
+            )
+        )
+        wall = time.monotonic() - started
+        cpu = (await client.get("/stats")).json()["cpu_time"] - cpu_before
+
+    utilization = cpu / wall if wall else 0.0
+    return {
+        "sessions": args.sessions,
+        "turns": len(turn_latencies),
+        "wall_s": wall,
+        "turns_per_s": len(turn_latencies) / wall if wall else 0.0,
+        "server_cpu_s": cpu,
+        "server_cpu_utilization": utilization,
+        "sessions_per_core": args.sessions / utilization if utilization else 0.0,
+        "events": len(event_latencies),
+        "event_latency_ms": {
+            f"p{p}": percentile(event_latencies, p) * 1000 for p in (50, 90, 99)
+        },
+        "turn_latency_s": {
+            f"p{p}": percentile(turn_latencies, p) for p in (50, 90, 99)
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--tokens", type=int, default=50, help="stub reply length")
+    parser.add_argument("--delay", type=float, default=0.01, help="stub token delay")
+    parser.add_argument("--cwd", default=str(ROOT))
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="print raw results")
+    args = parser.parse_args()
+
+    stub_port, server_port = _free_port(), _free_port()
+    env = dict(os.environ)
+    env["API_KEY"] = env.get("API_KEY") or "load-test"
+    env["BASE_URL"] = f"http://127.0.0.1:{stub_port}/v1"
+
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(stub_port)]
+        + ["--tokens", str(args.tokens), "--delay", str(args.delay)],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    server = subprocess.Popen(
+        [sys.executable, str(ROOT / "main.py"), "--serve", "--port", str(server_port)],
+        cwd=ROOT,
+        env=env,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        results = asyncio.run(drive(args, f"http://127.0.0.1:{server_port}"))
+    finally:
+        server.terminate()
+        stub.terminate()
+        server.wait()
+        stub.wait()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    events = results["event_latency_ms"]
+    turns = results["turn_latency_s"]
+    print(
+        f"sessions: {results['sessions']}, turns: {results['turns']} "
+        f"in {results['wall_s']:.2f}s ({results['turns_per_s']:.1f} turns/s)\n"
+        f"server cpu: {results['server_cpu_s']:.2f}s "
+        f"({results['server_cpu_utilization']:.0%} of one core), "
+        f"sessions per core: {results['sessions_per_core']:.0f}\n"
+        f"event latency: p50={events['p50']:.2f}ms p90={events['p90']:.2f}ms "
+        f"p99={events['p99']:.2f}ms over {results['events']} events\n"
+        f"turn latency: p50={turns['p50']:.2f}s p90={turns['p90']:.2f}s "
+        f"p99={turns['p99']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
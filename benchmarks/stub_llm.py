@@ -0,0 +1,342 @@
+"""Scripted OpenAI-compatible chat completions server for latency and load tests.
+
+Replies are streamed as chunks spaced ``--delay`` seconds apart (with
+``--jitter``) after ``--ttft`` seconds. By default every reply is ``--tokens``
+canned words. ``--script`` replays a JSON list of steps instead. A
+conversation's Nth assistant turn gets step N, cycling, so concurrent
+sessions each follow the script independently. A step looks like::
+
+    {"content": "Reading it now."}
+    {"tool_calls": [{"name": "read_file", "arguments": {"path": "README.md"}}]}
+    {"status": 429}                 # rejected with Retry-After
+    {"content": "...", "disconnect_after": 3}   # connection dropped mid-stream
+
+``--error-rate`` and ``--disconnect-rate`` inject the same failures at random.
+Prompt prefixes seen before are reported as ``cached_tokens``, like provider
+prefix caching.
+
+Usage: python -m benchmarks.stub_llm [--port 18080] [--tokens 20] [--delay 0.01]
+       [--ttft 0] [--jitter 0] [--script steps.json] [--error-rate 0]
+       [--disconnect-rate 0] [--seed N]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from contextlib import suppress
+from pathlib import Path
+from typing import Any
+
+ARGUMENT_CHUNK_CHARS = 16
+MAX_PREFIXES = 100_000
+
+
+class StubLLM:
+    def __init__(
+        self,
+        tokens: int = 20,
+        delay: float = 0.01,
+        ttft: float = 0.0,
+        jitter: float = 0.0,
+        script: list[dict[str, Any]] | None = None,
+        error_rate: float = 0.0,
+        disconnect_rate: float = 0.0,
+        retry_after: float = 0.1,
+        seed: int | None = None,
+    ) -> None:
+        self.tokens = tokens
+        self.delay = delay
+        self.ttft = ttft
+        self.jitter = jitter
+        self.script = script or []
+        self.error_rate = error_rate
+        self.disconnect_rate = disconnect_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rejected = 0
+        self.disconnected = 0
+        self._prefixes: set[bytes] = set()
+
+    def _sleep_time(self, base: float) -> float:
+        if not base or not self.jitter:
+            return base
+        return max(0.0, base * (1 + self.random.uniform(-self.jitter, self.jitter)))
+
+    def _chunk(self, delta: dict, finish_reason: str | None = None) -> dict:
+        return {
+            "id": f"stub-{self.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+
+    def _usage(self, prompt_tokens: int, cached: int, completion: int) -> dict:
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion,
+            "total_tokens": prompt_tokens + completion,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+    def _prompt_tokens(self, messages: list[dict[str, Any]]) -> tuple[int, int]:
+        """Returns ``(prompt_tokens, cached_tokens)`` for ``messages``.
+
+        A prefix counts as cached when the same leading messages were sent
+        before, byte for byte.
+        """
+        digest = hashlib.sha256()
+        cached_chars = 0
+        chars = 0
+        prefixes: list[bytes] = []
+        for message in messages:
+            encoded = json.dumps(message, separators=(",", ":")).encode("utf-8")
+            digest.update(encoded)
+            chars += len(encoded)
+            key = digest.copy().digest()
+            prefixes.append(key)
+            if key in self._prefixes:
+                cached_chars = chars
+
+        if len(self._prefixes) > MAX_PREFIXES:
+            self._prefixes.clear()
+        self._prefixes.update(prefixes)
+        return chars // 4, cached_chars // 4
+
+    def _step(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        if not self.script:
+            return {"content": "".join(f"tok{i} " for i in range(self.tokens))}
+        turn = sum(1 for m in messages if m.get("role") == "assistant")
+        return self.script[turn % len(self.script)]
+
+    def _deltas(self, step: dict[str, Any]) -> list[dict[str, Any]]:
+        deltas: list[dict[str, Any]] = [
+            {"content": word} for word in re.findall(r"\S+\s*", step.get("content", ""))
+        ]
+        for index, call in enumerate(step.get("tool_calls", [])):
+            arguments = call.get("arguments", {})
+            if not isinstance(arguments, str):
+                arguments = json.dumps(arguments)
+            deltas.append(
+                {
+                    "tool_calls": [
+                        {
+                            "index": index,
+                            "id": call.get("id") or f"call_{self.requests}_{index}",
+                            "type": "function",
+                            "function": {"name": call["name"], "arguments": ""},
+                        }
+                    ]
+                }
+            )
+            for start in range(0, len(arguments), ARGUMENT_CHUNK_CHARS):
+                piece = arguments[start : start + ARGUMENT_CHUNK_CHARS]
+                deltas.append(
+                    {"tool_calls": [{"index": index, "function": {"arguments": piece}}]}
+                )
+        return deltas
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    def _reject(self, writer: asyncio.StreamWriter) -> None:
+        self.rejected += 1
+        payload = json.dumps(
+            {"error": {"message": "Rate limit exceeded", "type": "rate_limit"}}
+        ).encode()
+        writer.write(
+            b"HTTP/1.1 429 Too Many Requests\r\nContent-Type: application/json\r\n"
+            + f"Retry-After: {self.retry_after:g}\r\n".encode()
+            + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+            + payload
+        )
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> bool:
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        body = json.loads(await reader.readexactly(length)) if length else {}
+
+        self.requests += 1
+        messages = body.get("messages", [])
+        step = self._step(messages)
+
+        if step.get("status") == 429 or (
+            self.error_rate and self.random.random() < self.error_rate
+        ):
+            self._reject(writer)
+            await writer.drain()
+            return True
+
+        prompt_tokens, cached_tokens = self._prompt_tokens(messages)
+        deltas = self._deltas(step)
+        finish_reason = "tool_calls" if step.get("tool_calls") else "stop"
+
+        disconnect_after = step.get("disconnect_after")
+        if (
+            disconnect_after is None
+            and self.disconnect_rate
+            and self.random.random() < self.disconnect_rate
+        ):
+            disconnect_after = self.random.randrange(max(len(deltas), 1))
+
+        if self.ttft:
+            await asyncio.sleep(self._sleep_time(self.ttft))
+
+        if not body.get("stream"):
+            message: dict[str, Any] = {"role": "assistant", "content": None}
+            if step.get("content"):
+                message["content"] = step["content"]
+            if step.get("tool_calls"):
+                message["tool_calls"] = [
+                    {
+                        "id": f"call_{self.requests}_{i}",
+                        "type": "function",
+                        "function": {
+                            "name": call["name"],
+                            "arguments": json.dumps(call.get("arguments", {})),
+                        },
+                    }
+                    for i, call in enumerate(step["tool_calls"])
+                ]
+            payload = json.dumps(
+                {
+                    "id": f"stub-{self.requests}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": "stub",
+                    "choices": [
+                        {"index": 0, "message": message, "finish_reason": finish_reason}
+                    ],
+                    "usage": self._usage(prompt_tokens, cached_tokens, len(deltas)),
+                }
+            ).encode()
+            await asyncio.sleep(self._sleep_time(self.delay) * len(deltas))
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(payload)}\r\n\r\n".encode()
+                + payload
+            )
+            await writer.drain()
+            return True
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+
+        async def send(data: str) -> None:
+            frame = f"data: {data}\n\n".encode()
+            writer.write(f"{len(frame):x}\r\n".encode() + frame + b"\r\n")
+            await writer.drain()
+
+        for i, delta in enumerate(deltas):
+            if disconnect_after is not None and i >= disconnect_after:
+                self.disconnected += 1
+                writer.transport.abort()
+                return False
+            if i and self.delay:
+                await asyncio.sleep(self._sleep_time(self.delay))
+            await send(json.dumps(self._chunk(delta)))
+        await send(json.dumps(self._chunk({}, finish_reason)))
+        usage_chunk = self._chunk({})
+        usage_chunk["choices"] = []
+        usage_chunk["usage"] = self._usage(prompt_tokens, cached_tokens, len(deltas))
+        await send(json.dumps(usage_chunk))
+        await send("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return True
+
+
+def load_script(path: Path) -> list[dict[str, Any]]:
+    script = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(script, list) or not all(isinstance(s, dict) for s in script):
+        raise ValueError(f"{path}: a script is a JSON list of step objects")
+    return script
+
+
+async def start_stub_llm(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    tokens: int = 20,
+    delay: float = 0.01,
+    **options: Any,
+) -> tuple[asyncio.Server, StubLLM]:
+    stub = StubLLM(tokens=tokens, delay=delay, **options)
+    server = await asyncio.start_server(stub.handle, host, port)
+    return server, stub
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server, _ = await start_stub_llm(
+        args.host,
+        args.port,
+        args.tokens,
+        args.delay,
+        ttft=args.ttft,
+        jitter=args.jitter,
+        script=load_script(args.script) if args.script else None,
+        error_rate=args.error_rate,
+        disconnect_rate=args.disconnect_rate,
+        seed=args.seed,
+    )
+    port = server.sockets[0].getsockname()[1]
+    print(f"stub LLM listening on http://{args.host}:{port}/v1", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--tokens", type=int, default=20, help="canned reply length")
+    parser.add_argument("--delay", type=float, default=0.01, help="seconds per chunk")
+    parser.add_argument(
+        "--ttft", type=float, default=0.0, help="seconds before the first chunk"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="relative +/- on delays"
+    )
+    parser.add_argument("--script", type=Path, default=None)
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 429s"
+    )
+    parser.add_argument("--disconnect-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    with suppress(KeyboardInterrupt):
+        asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
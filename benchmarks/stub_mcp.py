@@ -0,0 +1,125 @@
+"""Minimal MCP server speaking the stdio transport, for exercising the client pool.
+
+Tools:
+
+    echo   {"text": str}           returns the text
+    sleep  {"seconds": float}      returns after the delay, so calls overlap
+    pid    {}                      returns the server's process id
+    add_tool {"name": str}         registers an extra echo tool and sends
+                                   notifications/tools/list_changed
+
+``--tag`` is prefixed to every echo, so a restarted server with new arguments
+is distinguishable from the old one. ``--page-size`` splits ``tools/list``
+into cursor pages.
+
+Usage: python -m benchmarks.stub_mcp [--tag T] [--page-size N]
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import Any
+
+
+def _tool(name: str, description: str, properties: dict[str, Any]) -> dict:
+    return {
+        "name": name,
+        "description": description,
+        "inputSchema": {"type": "object", "properties": properties},
+    }
+
+
+class StubMCP:
+    def __init__(self, tag: str = "", page_size: int = 0) -> None:
+        self.tag = tag
+        self.page_size = page_size
+        self.tools = [
+            _tool("echo", "Echo the text back", {"text": {"type": "string"}}),
+            _tool("sleep", "Wait, then reply", {"seconds": {"type": "number"}}),
+            _tool("pid", "Server process id", {}),
+            _tool("add_tool", "Register another tool", {"name": {"type": "string"}}),
+        ]
+        self._write_lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def write(self, message: dict[str, Any]) -> None:
+        async with self._write_lock:
+            sys.stdout.write(json.dumps(message, separators=(",", ":")) + "\n")
+            sys.stdout.flush()
+
+    async def call(self, name: str, arguments: dict[str, Any]) -> str:
+        if name == "sleep":
+            await asyncio.sleep(float(arguments.get("seconds", 0.1)))
+            return "slept"
+        if name == "pid":
+            return str(os.getpid())
+        if name == "add_tool":
+            self.tools.append(_tool(arguments["name"], "Added echo tool", {}))
+            await self.write(
+                {"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}
+            )
+            return "added"
+        return f"{self.tag}{arguments.get('text', '')}"
+
+    async def handle(self, message: dict[str, Any]) -> None:
+        method = message.get("method")
+        params = message.get("params") or {}
+        if "id" not in message:
+            return
+
+        response: dict[str, Any] = {"jsonrpc": "2.0", "id": message["id"]}
+        if method == "initialize":
+            response["result"] = {
+                "protocolVersion": params.get("protocolVersion"),
+                "capabilities": {"tools": {"listChanged": True}},
+                "serverInfo": {"name": "stub-mcp", "version": "0"},
+            }
+        elif method == "tools/list":
+            start = int(params.get("cursor") or 0)
+            end = start + self.page_size if self.page_size else len(self.tools)
+            response["result"] = {"tools": self.tools[start:end]}
+            if end < len(self.tools):
+                response["result"]["nextCursor"] = str(end)
+        elif method == "tools/call":
+            names = {t["name"] for t in self.tools}
+            if params.get("name") not in names:
+                response["error"] = {"code": -32602, "message": "Unknown tool"}
+            else:
+                text = await self.call(params["name"], params.get("arguments") or {})
+                response["result"] = {"content": [{"type": "text", "text": text}]}
+        elif method == "ping":
+            response["result"] = {}
+        else:
+            response["error"] = {"code": -32601, "message": f"Unknown {method}"}
+        await self.write(response)
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        while line := await reader.readline():
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            # Requests are handled concurrently, like a real server.
+            task = asyncio.create_task(self.handle(message))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tag", default="")
+    parser.add_argument("--page-size", type=int, default=0)
+    args = parser.parse_args()
+    asyncio.run(StubMCP(args.tag, args.page_size).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
-from typing import Any, AsyncGenerator
-from openai import AsyncOpenAI, RateLimitError, APIConnectionError, APIError
+from __future__ import annotations
+from typing import TYPE_CHECKING, Any, AsyncGenerator
 from client.response import (
+    RequestStats,
     TextDelta,
     TokenUsage,
     StreamEvent,
@@ -9,22 +10,60 @@ from client.response import (
     ToolCall,
 )
 from client.response import parse_tool_call_arguments
+from client.rate_limiter import get_rate_limiter, parse_retry_after
 from config.config import Config
+from utils.startup import get_startup_profiler
+from utils.metrics import get_metrics
+from utils.tracing import get_tracer
+from utils.text import estimate_tokens
 import asyncio
+import json
+import random
+import threading
+import time
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+def prewarm() -> None:
+    """Import the OpenAI SDK in a background thread so the first request does not pay for it."""
+    threading.Thread(target=lambda: __import__("openai"), daemon=True).start()
+
+
+def _parse_usage(usage: Any) -> TokenUsage:
+    details = getattr(usage, "prompt_tokens_details", None)
+    return TokenUsage(
+        prompt_tokens=usage.prompt_tokens or 0,
+        completion_tokens=usage.completion_tokens or 0,
+        total_tokens=usage.total_tokens or 0,
+        cached_tokens=(getattr(details, "cached_tokens", None) or 0),
+    )
 
 
 class LLMClient:
     def __init__(self, config: Config | None = None) -> None:
         self._client: AsyncOpenAI | None = None
         self._max_retries: int = 3
-        self._config = config or Config()
+        self.reconfigure(config or Config())
+
+    def reconfigure(self, config: Config) -> None:
+        """Uses a new config snapshot for subsequent requests."""
+        self._config = config
+        self.rate_limiter = get_rate_limiter(
+            config.base_url or "default", config.rate_limit_for(config.base_url)
+        )
 
     def get_client(self) -> AsyncOpenAI:
         if self._client is None:
-            self._client = AsyncOpenAI(
-                api_key=self._config.api_key,
-                base_url=self._config.base_url,
-            )
+            with get_startup_profiler().phase("openai_client"):
+                from openai import AsyncOpenAI
+
+                self._client = AsyncOpenAI(
+                    api_key=self._config.api_key,
+                    base_url=self._config.base_url,
+                    max_retries=0,
+                )
         return self._client
 
     async def close(self) -> None:
@@ -52,47 +91,86 @@ class LLMClient:
         messages: list[dict[str, Any]],
         tools: list[dict[str, Any]] | None = None,
         stream: bool = True,
+        estimated_tokens: int | None = None,
     ) -> AsyncGenerator[StreamEvent, None]:
 
         client = self.get_client()
 
+        from httpx import TransportError
+        from openai import APIConnectionError, APIError, RateLimitError
+
+        if estimated_tokens is None:
+            estimated_tokens = estimate_tokens(
+                json.dumps(messages, ensure_ascii=False, default=str)
+            )
+
         kwargs = {
             "model": self._config.model_name,
             "messages": messages,
             "stream": stream,
         }
 
+        if stream:
+            kwargs["stream_options"] = {"include_usage": True}
+
         if tools:
             kwargs["tools"] = self._build_tools(tools)
             kwargs["tool_choice"] = "auto"
 
+        rate_limit_wait = 0.0
         for attempt in range(self._max_retries + 1):
+            waited = await self.rate_limiter.acquire(estimated_tokens)
+            if waited:
+                rate_limit_wait += waited
+                get_metrics().counter(
+                    "agent_rate_limit_wait_seconds",
+                    "Time spent waiting on client-side rate limits.",
+                ).inc(waited)
+            get_startup_profiler().first_request()
+            streamed = False
             try:
 
                 if stream:
                     async for event in self._stream_response(client, kwargs):
+                        if event.usage:
+                            self.rate_limiter.record_usage(
+                                estimated_tokens, event.usage.total_tokens
+                            )
+                        if event.stats:
+                            event.stats.retries = attempt
+                            event.stats.rate_limit_wait = rate_limit_wait
+                        streamed = True
                         yield event
                 else:
                     event = await self._non_stream_response(client, kwargs)
+                    if event.usage:
+                        self.rate_limiter.record_usage(
+                            estimated_tokens, event.usage.total_tokens
+                        )
+                    event.stats.retries = attempt
+                    event.stats.rate_limit_wait = rate_limit_wait
                     yield event
 
                 return
             except RateLimitError as e:
+                headers = e.response.headers if e.response is not None else None
+                self.rate_limiter.update_from_headers(headers)
                 if attempt < self._max_retries:
-                    # attempt -> failed
-                    # 1s -> Failed
-                    # 2s -> Failed
-                    # 4s -> Failed
-                    wait = 2**attempt
-                    await asyncio.sleep(wait)
+                    _record_retry("rate_limit")
+                    wait = parse_retry_after(headers)
+                    if wait is None:
+                        wait = 2**attempt + random.uniform(0, 1)
+                    self.rate_limiter.block_for(wait)
                 else:
                     yield StreamEvent(
                         type=StreamEventType.ERROR,
                         error=f"Rate limit exceeded: {e}",
                     )
                     return
-            except APIConnectionError as e:
-                if attempt < self._max_retries:
+            except (APIConnectionError, TransportError) as e:
+                # A retry after deltas were yielded would repeat them.
+                if attempt < self._max_retries and not streamed:
+                    _record_retry("connection")
                     wait = 2**attempt
                     await asyncio.sleep(wait)
                 else:
@@ -102,7 +180,8 @@ class LLMClient:
                     )
                     return
             except APIError as e:
-                if attempt < self._max_retries:
+                if attempt < self._max_retries and not streamed:
+                    _record_retry("api_error")
                     wait = 2**attempt
                     await asyncio.sleep(wait)
                 else:
@@ -115,70 +194,91 @@ class LLMClient:
     async def _stream_response(
         self, client: AsyncOpenAI, kwargs: dict[str, Any]
     ) -> AsyncGenerator[StreamEvent, None]:
-        response = await client.chat.completions.create(**kwargs)
+        tracer = get_tracer()
+        started = time.perf_counter()
+        with tracer.span(
+            "llm.request", model=kwargs["model"], messages=len(kwargs["messages"])
+        ):
+            raw = await client.chat.completions.with_raw_response.create(**kwargs)
+        self.rate_limiter.update_from_headers(raw.headers)
+        response = raw.parse()
 
         finish_reason: str | None = None
         usage: TokenUsage | None = None
         tool_calls: dict[int, dict[str, Any]] = {}
+        chunks = 0
+        first_token_at: float | None = None
 
-        async for chunk in response:
-            if hasattr(chunk, "usage") and chunk.usage:
-                usage = TokenUsage(
-                    prompt_tokens=chunk.usage.prompt_tokens,
-                    completion_tokens=chunk.usage.completion_tokens,
-                    total_tokens=chunk.usage.total_tokens,
-                    cached_tokens=chunk.usage.prompt_tokens_details.cached_tokens,
-                )
-
-            if not chunk.choices:
-                continue
-
-            choice = chunk.choices[0]
-            delta = choice.delta
-
-            if choice.finish_reason:
-                finish_reason = choice.finish_reason
-
-            if delta.content:
-                yield StreamEvent(
-                    type=StreamEventType.TEXT_DELTA,
-                    text_delta=TextDelta(content=delta.content),
-                )
-
-            if delta.tool_calls:
-                for tool_call_delta in delta.tool_calls:
-                    idx = tool_call_delta.index
-
-                    if idx not in tool_calls:
-                        tool_calls[idx] = {
-                            "id": tool_call_delta.id or "",
-                            "name": "",
-                            "arguments": "",
-                        }
-
-                        if tool_call_delta.function:
-                            if tool_call_delta.function.name:
-                                tool_calls[idx]["name"] = tool_call_delta.function.name
+        with tracer.span("llm.stream", model=kwargs["model"]) as span:
+            try:
+                async for chunk in response:
+                    if hasattr(chunk, "usage") and chunk.usage:
+                        usage = _parse_usage(chunk.usage)
+
+                    if not chunk.choices:
+                        continue
+
+                    choice = chunk.choices[0]
+                    delta = choice.delta
+                    if first_token_at is None and (delta.content or delta.tool_calls):
+                        first_token_at = time.perf_counter()
+                        tracer.instant("llm.first_token")
+                    chunks += 1
+
+                    if choice.finish_reason:
+                        finish_reason = choice.finish_reason
+
+                    if delta.content:
+                        yield StreamEvent(
+                            type=StreamEventType.TEXT_DELTA,
+                            text_delta=TextDelta(content=delta.content),
+                        )
+
+                    if delta.tool_calls:
+                        for tool_call_delta in delta.tool_calls:
+                            idx = tool_call_delta.index
+
+                            if idx not in tool_calls:
+                                tool_calls[idx] = {
+                                    "id": "",
+                                    "name": "",
+                                    "arguments": [],
+                                }
+                            entry = tool_calls[idx]
+
+                            if tool_call_delta.id:
+                                entry["id"] = tool_call_delta.id
+
+                            function = tool_call_delta.function
+                            if not function:
+                                continue
+
+                            if function.name and not entry["name"]:
+                                entry["name"] = function.name
                                 yield StreamEvent(
                                     type=StreamEventType.TOOL_CALL_START,
                                     tool_call_delta=ToolCallDelta(
-                                        call_id=tool_calls[idx]["id"],
-                                        name=tool_call_delta.function.name,
+                                        call_id=entry["id"], name=function.name
                                     ),
                                 )
 
-                            if tool_call_delta.function.arguments:
-                                tool_calls[idx][
-                                    "arguments"
-                                ] += tool_call_delta.function.arguments
+                            if function.arguments:
+                                entry["arguments"].append(function.arguments)
                                 yield StreamEvent(
                                     type=StreamEventType.TOOL_CALL_DELTA,
                                     tool_call_delta=ToolCallDelta(
-                                        call_id=tool_calls[idx]["id"],
-                                        arguments_delta=tool_call_delta.function.arguments,
-                                        name=tool_call_delta.function.name,
+                                        call_id=entry["id"],
+                                        arguments_delta=function.arguments,
+                                        name=entry["name"],
                                     ),
                                 )
+            finally:
+                await response.close()
+            span.set(
+                chunks=chunks,
+                finish_reason=finish_reason,
+                completion_tokens=usage.completion_tokens if usage else None,
+            )
 
         for idx, tc in tool_calls.items():
             yield StreamEvent(
@@ -186,7 +286,7 @@ class LLMClient:
                 tool_call=ToolCall(
                     call_id=tc["id"],
                     name=tc["name"],
-                    arguments=parse_tool_call_arguments(tc["arguments"]),
+                    arguments=parse_tool_call_arguments("".join(tc["arguments"])),
                 ),
             )
 
@@ -194,12 +294,22 @@ class LLMClient:
             type=StreamEventType.MESSAGE_COMPLETE,
             finish_reason=finish_reason,
             usage=usage,
+            stats=RequestStats(
+                ttft=first_token_at - started if first_token_at else None,
+                duration=time.perf_counter() - started,
+            ),
         )
 
     async def _non_stream_response(
         self, client: AsyncOpenAI, kwargs: dict[str, Any]
     ) -> StreamEvent:
-        response = await client.chat.completions.create(**kwargs)
+        started = time.perf_counter()
+        with get_tracer().span(
+            "llm.request", model=kwargs["model"], messages=len(kwargs["messages"])
+        ):
+            raw = await client.chat.completions.with_raw_response.create(**kwargs)
+        self.rate_limiter.update_from_headers(raw.headers)
+        response = raw.parse()
 
         choice = response.choices[0]
         message = choice.message
@@ -221,12 +331,7 @@ class LLMClient:
 
         usage = None
         if response.usage:
-            usage = TokenUsage(
-                prompt_tokens=response.usage.prompt_tokens,
-                completion_tokens=response.usage.completion_tokens,
-                total_tokens=response.usage.total_tokens,
-                cached_tokens=response.usage.prompt_tokens_details.cached_tokens,
-            )
+            usage = _parse_usage(response.usage)
         else:
             usage = None
 
@@ -235,6 +340,37 @@ class LLMClient:
             text_delta=text_delta,
             finish_reason=choice.finish_reason,
             usage=usage,
+            stats=RequestStats(duration=time.perf_counter() - started),
         )
 
         return event
+
+
+def _record_retry(reason: str) -> None:
+    get_metrics().counter("agent_llm_retries", "LLM requests retried.").inc(
+        reason=reason
+    )
+
+
+class LLMClientPool:
+    """LLM clients shared between sessions in one process.
+
+    Sessions whose configs agree on endpoint, credentials and model settings
+    get the same client, and with it the same connection pool.
+    """
+
+    def __init__(self) -> None:
+        self._clients: dict[tuple, LLMClient] = {}
+
+    def get(self, config: Config) -> LLMClient:
+        key = (config.api_key, config.base_url, config.model.model_dump_json())
+        client = self._clients.get(key)
+        if client is None:
+            client = LLMClient(config=config)
+            self._clients[key] = client
+        return client
+
+    async def close(self) -> None:
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
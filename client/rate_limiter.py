@@ -0,0 +1,214 @@
+from __future__ import annotations
+import asyncio
+import re
+import time
+from email.utils import parsedate_to_datetime
+from typing import Mapping
+from config.config import RateLimitConfig
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_duration(value: str) -> float | None:
+    """Parse OpenAI style reset durations such as ``1s``, ``6m0s`` or ``20ms``."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str] | None) -> float | None:
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, period: float = 60.0) -> None:
+        self.capacity = capacity
+        self.period = period
+        self.available = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.available = min(
+            self.capacity, self.available + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        needed = min(amount, self.capacity)
+        if self.available >= needed:
+            return 0.0
+        return (needed - self.available) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.available -= amount
+
+    def set_capacity(self, capacity: float) -> None:
+        self._refill()
+        self.capacity = capacity
+        self.available = min(self.available, capacity)
+
+    def sync(self, remaining: float) -> None:
+        self._refill()
+        self.available = min(self.available, remaining)
+
+
+class RateLimiter:
+    """Requests and tokens per minute budget shared by every request to one endpoint.
+
+    Callers queue on a single lock, so concurrent requests are admitted in
+    arrival order instead of all retrying at once after a 429.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int | None = None,
+        tokens_per_minute: int | None = None,
+    ) -> None:
+        self.configured_rpm = requests_per_minute
+        self.configured_tpm = tokens_per_minute
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+        self.total_wait = 0.0
+        self.throttled_requests = 0
+
+    def configure(self, config: RateLimitConfig) -> None:
+        if config.requests_per_minute != self.configured_rpm:
+            self.configured_rpm = config.requests_per_minute
+            self.requests = self._resize(self.requests, config.requests_per_minute)
+        if config.tokens_per_minute != self.configured_tpm:
+            self.configured_tpm = config.tokens_per_minute
+            self.tokens = self._resize(self.tokens, config.tokens_per_minute)
+
+    @staticmethod
+    def _resize(bucket: TokenBucket | None, capacity: int | None) -> TokenBucket | None:
+        if not capacity:
+            return None
+        if bucket is None:
+            return TokenBucket(capacity)
+        bucket.set_capacity(capacity)
+        return bucket
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = self._blocked_until - time.monotonic()
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens))
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> float:
+        waited = 0.0
+        async with self._lock:
+            while (wait := self._wait_time(tokens)) > 0:
+                await asyncio.sleep(wait)
+                waited += wait
+
+            if self.requests is not None:
+                self.requests.consume(1)
+            if self.tokens is not None:
+                self.tokens.consume(tokens)
+
+        if waited:
+            self.total_wait += waited
+            self.throttled_requests += 1
+        return waited
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self.tokens is not None and actual_tokens:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+
+    def block_for(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str] | None) -> None:
+        if not headers:
+            return
+
+        for kind, configured in (
+            ("requests", self.configured_rpm),
+            ("tokens", self.configured_tpm),
+        ):
+            limit = _header_float(headers, f"x-ratelimit-limit-{kind}")
+            if limit is None or limit <= 0:
+                continue
+
+            capacity = min(limit, configured) if configured else limit
+            bucket = getattr(self, kind)
+            if bucket is None:
+                bucket = TokenBucket(capacity)
+                setattr(self, kind, bucket)
+            elif bucket.capacity != capacity:
+                bucket.set_capacity(capacity)
+
+            remaining = _header_float(headers, f"x-ratelimit-remaining-{kind}")
+            if remaining is not None:
+                bucket.sync(remaining)
+                reset = headers.get(f"x-ratelimit-reset-{kind}")
+                if remaining < 1 and reset and (delay := parse_duration(reset)):
+                    self.block_for(delay)
+
+        retry_after = parse_retry_after(headers)
+        if retry_after:
+            self.block_for(retry_after)
+
+
+def _header_float(headers: Mapping[str, str], name: str) -> float | None:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(endpoint: str, config: RateLimitConfig) -> RateLimiter:
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        limiter = RateLimiter(config.requests_per_minute, config.tokens_per_minute)
+        _limiters[endpoint] = limiter
+    else:
+        limiter.configure(config)
+    return limiter
@@ -5,7 +5,7 @@ from enum import Enum
 import json
 
 
-@dataclass
+@dataclass(slots=True)
 class TextDelta:
     content: str
 
@@ -22,7 +22,7 @@ class StreamEventType(str, Enum):
     TOOL_CALL_COMPLETE = "tool_call_complete"
 
 
-@dataclass
+@dataclass(slots=True)
 class TokenUsage:
     prompt_tokens: int = 0
     completion_tokens: int = 0
@@ -38,21 +38,29 @@ class TokenUsage:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCallDelta:
     call_id: str
     name: str | None = None
     arguments_delta: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolCall:
     call_id: str
     name: str | None = None
     arguments: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
+class RequestStats:
+    ttft: float | None = None
+    duration: float = 0.0
+    retries: int = 0
+    rate_limit_wait: float = 0.0
+
+
+@dataclass(slots=True)
 class StreamEvent:
     type: StreamEventType
     text_delta: TextDelta | None = None
@@ -61,9 +69,10 @@ class StreamEvent:
     tool_call_delta: ToolCallDelta | None = None
     tool_call: ToolCall | None = None
     usage: TokenUsage | None = None
+    stats: RequestStats | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolResultMessage:
     tool_call_id: str
     content: str
@@ -77,6 +86,15 @@ class ToolResultMessage:
         }
 
 
+def canonical_json(value: Any) -> str:
+    """Serializes ``value`` the same way every time, byte for byte.
+
+    Used for anything replayed to the model as history, so a conversation's
+    prefix stays identical from turn to turn and provider prompt caching hits.
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
 def parse_tool_call_arguments(arguments_str: str) -> dict[str, Any]:
     if not arguments_str:
         return {}
@@ -1,21 +1,122 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from pathlib import Path
-from typing import List
+from typing import List, Literal
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+_env_loaded = False
 
 
-class ModelConfig(BaseModel):
+def load_env() -> None:
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+class _Snapshot(BaseModel):
+    """Config models are immutable; changes produce a new snapshot."""
+
+    model_config = ConfigDict(frozen=True)
+
+
+class ModelConfig(_Snapshot):
     name: str = "z-ai/glm-4.5-air:free"
     temperature: float = Field(default=1, ge=0.0, le=2.0)
     context_window: int = 256_000
+    # USD per million tokens; leave unset to skip cost estimates.
+    input_price_per_mtok: float | None = Field(default=None, ge=0)
+    cached_input_price_per_mtok: float | None = Field(default=None, ge=0)
+    output_price_per_mtok: float | None = Field(default=None, ge=0)
+
+
+class ToolsConfig(_Snapshot):
+    timeout: float | None = Field(default=120.0, gt=0)
+    timeouts: dict[str, float] = Field(default_factory=dict)
+    # Well above a typical read_file result, so ordinary reads stay inline.
+    spill_tokens: int | None = Field(default=20_000, ge=100)
+    spill_head_lines: int = Field(default=40, ge=0)
+    spill_tail_lines: int = Field(default=10, ge=0)
+    blob_directory: Path | None = None
+    blob_max_mb: int | None = Field(default=1_024, ge=1)
+    blob_max_age_days: float | None = Field(default=14.0, gt=0)
+
+
+class UIConfig(_Snapshot):
+    stream_flush_interval: float = Field(default=0.05, ge=0)
+    stream_flush_bytes: int = Field(default=2048, ge=1)
+    max_fps: int = Field(default=20, ge=1, le=120)
+    markdown: bool = False
+    tool_preview_lines: int | None = Field(default=None, ge=1)
+    highlight_max_bytes: int = Field(default=200_000, ge=0)
+    show_usage: bool = False
+
+
+class RateLimitConfig(_Snapshot):
+    requests_per_minute: int | None = Field(default=None, gt=0)
+    tokens_per_minute: int | None = Field(default=None, gt=0)
 
 
-class Config(BaseModel):
+class SubagentsConfig(_Snapshot):
+    enabled: bool = True
+    max_concurrency: int = Field(default=4, ge=1)
+    max_tasks: int = Field(default=16, ge=1)
+    max_turns: int = Field(default=25, ge=1)
+    result_max_tokens: int = Field(default=2_000, ge=100)
+    tools: list[str] | None = None
+
+
+class DaemonConfig(_Snapshot):
+    idle_timeout: float | None = Field(default=900.0, gt=0)
+    max_clients: int = Field(default=16, ge=1)
+
+
+class ServerConfig(_Snapshot):
+    host: str = "127.0.0.1"
+    port: int = Field(default=8765, ge=0, le=65535)
+    max_sessions: int = Field(default=256, ge=1)
+    event_buffer: int = Field(default=2_000, ge=1)
+
+
+class SessionsConfig(_Snapshot):
+    enabled: bool = True
+    directory: Path | None = None
+    compression: Literal["lzma", "zlib"] = "lzma"
+    compress_after_days: float | None = Field(default=7.0, gt=0)
+
+
+class RepoMapConfig(_Snapshot):
+    enabled: bool = True
+    max_tokens: int = Field(default=1_024, ge=0)
+    max_files: int = Field(default=5_000, ge=1)
+    directory: Path | None = None
+
+
+class MCPServerConfig(_Snapshot):
+    command: str
+    args: list[str] = Field(default_factory=list)
+    env: dict[str, str] = Field(default_factory=dict)
+    cwd: Path | None = None
+    enabled: bool = True
+    startup_timeout: float = Field(default=30.0, gt=0)
+    request_timeout: float = Field(default=60.0, gt=0)
+
+
+class Config(_Snapshot):
     model: ModelConfig = Field(default_factory=ModelConfig)
     cwd: Path = Field(default_factory=Path.cwd)
+    tools: ToolsConfig = Field(default_factory=ToolsConfig)
+    mcp_servers: dict[str, MCPServerConfig] = Field(default_factory=dict)
+    subagents: SubagentsConfig = Field(default_factory=SubagentsConfig)
+    rate_limits: dict[str, RateLimitConfig] = Field(default_factory=dict)
+    ui: UIConfig = Field(default_factory=UIConfig)
+    daemon: DaemonConfig = Field(default_factory=DaemonConfig)
+    server: ServerConfig = Field(default_factory=ServerConfig)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
+    repo_map: RepoMapConfig = Field(default_factory=RepoMapConfig)
 
     max_turns: int = 100
     max_tool_output_tokens: int = 50_000
@@ -27,27 +128,40 @@ class Config(BaseModel):
 
     @property
     def api_key(self) -> str | None:
+        load_env()
         return os.getenv("API_KEY")
 
     @property
     def base_url(self) -> str | None:
+        load_env()
         return os.getenv("BASE_URL")
 
     @property
     def model_name(self) -> str:
         return self.model.name
 
-    @model_name.setter
-    def model_name(self, value: str) -> None:
-        self.model.name = value
-
     @property
     def temperature(self) -> float:
         return self.model.temperature
 
-    @temperature.setter
-    def temperature(self, value: float) -> None:
-        self.model.temperature = value
+    def tool_timeout(
+        self, tool_name: str, default: float | None = None
+    ) -> float | None:
+        """Per-tool config, then an explicit global ``[tools] timeout``, then
+        the tool's own default."""
+        if tool_name in self.tools.timeouts:
+            return self.tools.timeouts[tool_name]
+        if "timeout" in self.tools.model_fields_set:
+            return self.tools.timeout
+        return default or self.tools.timeout
+
+    def rate_limit_for(self, endpoint: str | None) -> RateLimitConfig:
+        if endpoint:
+            endpoint = endpoint.rstrip("/")
+            for key, limits in self.rate_limits.items():
+                if key.rstrip("/") == endpoint:
+                    return limits
+        return self.rate_limits.get("default", RateLimitConfig())
 
     def validate(self) -> List[str]:
         errors: list[str] = []
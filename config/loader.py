@@ -1,23 +1,32 @@
 from pathlib import Path
-from platformdirs import user_config_dir
+from platformdirs import user_config_dir, user_data_dir
 from config.config import Config
+from context.agents_md import get_agents_index, workspace_instructions
 from tomli import TOMLDecodeError
 from utils.errors import ConfigError
 from typing import Any
 import tomli
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
 CONFIG_FILE_NAME = "config.toml"
 
-AGENT_MD_FILE_NAME = "agent.md"
+# How long a project config lookup is trusted before the parents are re-walked.
+PROJECT_LOOKUP_TTL = 5.0
+
+_project_configs: dict[Path, tuple[Path | None, float]] = {}
 
 
 def get_config_dir() -> Path:
     return Path(user_config_dir("ai-agent"))
 
 
+def get_data_dir() -> Path:
+    return Path(user_data_dir("ai-agent"))
+
+
 def get_system_config_path() -> Path:
     return get_config_dir() / CONFIG_FILE_NAME
 
@@ -38,32 +47,25 @@ def _parse_toml(path: Path):
         ) from e
 
 
-def _get_agent_md_files(cwd: Path) -> Path | None:
-    current = cwd.resolve()
-
-    if current.is_dir():
-        agent_md_path = current / AGENT_MD_FILE_NAME
-        if agent_md_path.is_file():
-            content = agent_md_path.read_text(encoding="utf-8")
-            return content
-
-    return None
-
-
 def _get_project_config(cwd: Path) -> Path | None:
     current = cwd.resolve()
-    agent_dir = current / ".ai-agent"
+    cached = _project_configs.get(current)
+    if cached is not None:
+        path, checked_at = cached
+        if time.monotonic() - checked_at < PROJECT_LOOKUP_TTL and (
+            path is None or path.is_file()
+        ):
+            return path
 
-    if agent_dir.is_dir():
-        config_path = agent_dir / CONFIG_FILE_NAME
-        if config_path.is_file():
-            return config_path
+    path = None
+    for directory in (current, *current.parents):
+        candidate = directory / ".ai-agent" / CONFIG_FILE_NAME
+        if candidate.is_file():
+            path = candidate
+            break
 
-    parent = current.parent
-    if parent != current:
-        return _get_project_config(parent)
-
-    return None
+    _project_configs[current] = (path, time.monotonic())
+    return path
 
 
 def _merge_dicts(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
@@ -77,7 +79,11 @@ def _merge_dicts(base: dict[str, Any], override: dict[str, Any]) -> dict[str, An
     return result
 
 
-def load_config(cwd: Path | None) -> Config:
+def load_config(cwd: Path | None, strict: bool = False) -> Config:
+    """Loads the system and project config for ``cwd``.
+
+    Unreadable config files are skipped with a warning, or raise with ``strict``.
+    """
     cwd = cwd or Path.cwd()
     system_path = get_system_config_path()
 
@@ -87,6 +93,8 @@ def load_config(cwd: Path | None) -> Config:
         try:
             config_dict = _parse_toml(system_path)
         except ConfigError as e:
+            if strict:
+                raise
             logger.warning(f"Skipping invalid system config file {system_path}: {e}")
 
     project_path = _get_project_config(cwd)
@@ -95,17 +103,77 @@ def load_config(cwd: Path | None) -> Config:
             project_config_dict = _parse_toml(project_path)
             config_dict = _merge_dicts(config_dict, project_config_dict)
         except ConfigError as e:
+            if strict:
+                raise
             logger.warning(f"Skipping invalid project config file {project_path}: {e}")
 
     if "cwd" not in config_dict:
         config_dict["cwd"] = str(cwd)
 
     if "developer_instructions" not in config_dict:
-        if agent_md_content := _get_agent_md_files(cwd):
-            config_dict["developer_instructions"] = agent_md_content
+        instructions = workspace_instructions(get_agents_index(cwd), cwd)
+        if instructions:
+            config_dict["developer_instructions"] = instructions
 
     try:
         config = Config(**config_dict)
     except Exception as e:
         raise ConfigError(f"Failed to load config: {e}") from e
     return config
+
+
+class ConfigWatcher:
+    """Polls the files a config snapshot was loaded from.
+
+    ``poll`` stats the system config, the project config and the AGENTS.md
+    files covering the cwd at most once per ``interval``. It returns a freshly
+    loaded snapshot when any of them changed, or None. Invalid edits are
+    logged and ignored.
+    """
+
+    def __init__(self, cwd: Path, interval: float = 1.0) -> None:
+        self.cwd = cwd
+        self.interval = interval
+        self._checked_at = time.monotonic()
+        self._stamps = self._stat()
+
+    def _paths(self) -> list[Path]:
+        project = _get_project_config(self.cwd)
+        return [
+            get_system_config_path(),
+            project or self.cwd / ".ai-agent" / CONFIG_FILE_NAME,
+            *get_agents_index(self.cwd).files_for(self.cwd),
+        ]
+
+    def _stat(self) -> list[tuple[Path, int, int] | None]:
+        stamps: list[tuple[Path, int, int] | None] = []
+        for path in self._paths():
+            try:
+                stat = path.stat()
+            except OSError:
+                stamps.append(None)
+                continue
+            stamps.append((path, stat.st_mtime_ns, stat.st_size))
+        return stamps
+
+    def poll(self) -> Config | None:
+        now = time.monotonic()
+        if now - self._checked_at < self.interval:
+            return None
+        self._checked_at = now
+
+        stamps = self._stat()
+        if stamps == self._stamps:
+            return None
+        self._stamps = stamps
+
+        try:
+            config = load_config(self.cwd, strict=True)
+        except ConfigError as e:
+            logger.warning(f"Keeping the current config: {e}")
+            return None
+        errors = config.validate()
+        if errors:
+            logger.warning(f"Keeping the current config: {'; '.join(errors)}")
+            return None
+        return config
@@ -0,0 +1,285 @@
+from __future__ import annotations
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Checked in this order when one directory holds several.
+INSTRUCTION_FILE_NAMES = ("AGENTS.md", "agents.md", "AGENT.md", "agent.md")
+SKIP_DIRS = {
+    "node_modules",
+    "__pycache__",
+    "venv",
+    "site-packages",
+    "dist",
+    "build",
+    "target",
+}
+MAX_SCAN_DIRS = 10_000
+MAX_LISTED_FILES = 50
+# Full revalidations closer together than this are skipped.
+REFRESH_INTERVAL = 2.0
+
+# A directory's mtime, its instruction files and its subdirectories.
+_Listing = tuple[int, list[Path], list[Path]]
+
+
+def find_workspace_root(cwd: Path) -> Path:
+    """The nearest ancestor of ``cwd`` holding a ``.git`` entry, else ``cwd``."""
+    current = cwd.resolve()
+    for directory in (current, *current.parents):
+        if (directory / ".git").exists():
+            return directory
+    return current
+
+
+class AgentsIndex:
+    """Every AGENTS.md / agent.md under a workspace root.
+
+    One scan records, per directory, its mtime, its instruction files and its
+    subdirectories. A directory's mtime changes whenever an entry is added,
+    removed or renamed in it, so lookups only re-list directories whose mtime
+    moved. ``files_for`` validates just the chain from the root down to a
+    path, in O(depth) stats, and does not wait for the full scan, which runs
+    in a background thread; ``ready`` is set once it finishes. File contents
+    are cached by mtime and size.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root.resolve()
+        self._dirs: dict[Path, _Listing] = {}
+        self._contents: dict[Path, tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._worker: threading.Thread | None = None
+        self.truncated = False
+        self._refreshed_at = time.monotonic()
+        self._start(self._scan_all)
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _start(self, target: Callable[[], None]) -> None:
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=target, daemon=True)
+            self._worker.start()
+
+    def _list(self, directory: Path) -> _Listing | None:
+        try:
+            mtime = directory.stat().st_mtime_ns
+            with os.scandir(directory) as entries:
+                names: dict[str, Path] = {}
+                subdirs: list[Path] = []
+                for entry in entries:
+                    if entry.name in INSTRUCTION_FILE_NAMES:
+                        if entry.is_file():
+                            names[entry.name] = Path(entry.path)
+                    elif (
+                        not entry.name.startswith(".")
+                        and entry.name not in SKIP_DIRS
+                        and entry.is_dir(follow_symlinks=False)
+                    ):
+                        subdirs.append(Path(entry.path))
+        except OSError:
+            return None
+        files = [names[n] for n in INSTRUCTION_FILE_NAMES if n in names]
+        return mtime, files, sorted(subdirs)
+
+    def _scan(self, directories: list[Path], limit: int) -> dict[Path, _Listing]:
+        """Lists ``directories`` and everything below them, without the lock."""
+        found: dict[Path, _Listing] = {}
+        pending = list(directories)
+        while pending:
+            if len(found) >= limit:
+                if not self.truncated:
+                    logger.warning(
+                        f"Stopped indexing AGENTS.md files under {self.root} "
+                        f"after {MAX_SCAN_DIRS} directories"
+                    )
+                self.truncated = True
+                break
+            current = pending.pop()
+            listing = self._list(current)
+            if listing is None:
+                continue
+            found[current] = listing
+            pending.extend(d for d in listing[2] if d not in found)
+        return found
+
+    def _merge(self, found: dict[Path, _Listing]) -> None:
+        # Entries validated by ``files_for`` meanwhile are at least as fresh.
+        with self._lock:
+            for directory, listing in found.items():
+                self._dirs.setdefault(directory, listing)
+
+    def _scan_all(self) -> None:
+        try:
+            self._merge(self._scan([self.root], MAX_SCAN_DIRS))
+        finally:
+            self._ready.set()
+
+    def _forget(self, directory: Path) -> None:
+        entry = self._dirs.pop(directory, None)
+        if entry is not None:
+            for subdir in entry[2]:
+                self._forget(subdir)
+
+    def _validate(self, directory: Path) -> list[Path]:
+        entry = self._dirs.get(directory)
+        try:
+            mtime = directory.stat().st_mtime_ns
+        except OSError:
+            self._forget(directory)
+            return []
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        listing = self._list(directory)
+        if listing is None:
+            self._forget(directory)
+            return []
+        if entry is not None:
+            for removed in set(entry[2]) - set(listing[2]):
+                self._forget(removed)
+        self._dirs[directory] = listing
+        return listing[1]
+
+    def refresh(self) -> None:
+        """Revalidates every indexed directory and scans new subdirectories."""
+        with self._lock:
+            directories = list(self._dirs)
+        for directory in directories:
+            with self._lock:
+                if directory in self._dirs:
+                    self._validate(directory)
+        with self._lock:
+            known = len(self._dirs)
+            new = [
+                subdir
+                for _, _, subdirs in self._dirs.values()
+                for subdir in subdirs
+                if subdir not in self._dirs
+            ]
+        if new:
+            self._merge(self._scan(new, MAX_SCAN_DIRS - known))
+
+    def refresh_in_background(self, max_age: float = REFRESH_INTERVAL) -> None:
+        """Starts a ``refresh`` unless one ran within ``max_age`` seconds or the
+        first scan is still going."""
+        if not self.ready or time.monotonic() - self._refreshed_at < max_age:
+            return
+        self._refreshed_at = time.monotonic()
+        self._start(self.refresh)
+
+    def all_files(self) -> list[Path]:
+        with self._lock:
+            return sorted(f for _, files, _ in self._dirs.values() for f in files)
+
+    def files_for(self, path: Path) -> list[Path]:
+        """Instruction files whose scope covers ``path``, outermost first.
+
+        Later files take precedence. Paths outside the root get none.
+        """
+        path = path.resolve()
+        directory = path if path.is_dir() else path.parent
+        try:
+            relative = directory.relative_to(self.root)
+        except ValueError:
+            return []
+
+        chain = [self.root]
+        for part in relative.parts:
+            chain.append(chain[-1] / part)
+        with self._lock:
+            return [f for d in chain for f in self._validate(d)]
+
+    def read(self, path: Path) -> str | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._contents.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        try:
+            text = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+        with self._lock:
+            self._contents[path] = (stat.st_mtime_ns, stat.st_size, text)
+        return text
+
+    def instructions_for(self, path: Path) -> list[tuple[Path, str]]:
+        result: list[tuple[Path, str]] = []
+        for file in self.files_for(path):
+            text = self.read(file)
+            if text and text.strip():
+                result.append((file, text.strip()))
+        return result
+
+    def scope(self, file: Path) -> str:
+        relative = file.parent.relative_to(self.root).as_posix()
+        return "the repository root" if relative == "." else f"{relative}/"
+
+
+def format_instructions(index: AgentsIndex, files: list[tuple[Path, str]]) -> str:
+    return "\n\n".join(
+        f"## {file.relative_to(index.root).as_posix()} "
+        f"(applies to {index.scope(file)})\n\n{text}"
+        for file, text in files
+    )
+
+
+def workspace_instructions(index: AgentsIndex, cwd: Path) -> str | None:
+    """The cwd chain's instructions, plus a list of the other scoped files.
+
+    The list is left out while the index's first scan is still running.
+    """
+    applicable = index.instructions_for(cwd)
+    included = {file for file, _ in applicable}
+    others = []
+    if index.ready:
+        others = [f for f in index.all_files() if f not in included]
+
+    sections = []
+    if applicable:
+        sections.append(format_instructions(index, applicable))
+    if others:
+        listed = "\n".join(
+            f"- {f.relative_to(index.root).as_posix()}"
+            for f in others[:MAX_LISTED_FILES]
+        )
+        if len(others) > MAX_LISTED_FILES:
+            listed += f"\n- ... and {len(others) - MAX_LISTED_FILES} more"
+        sections.append(
+            "Other AGENTS.md files in this workspace. Their instructions are "
+            f"attached to tool results for files in their scope:\n{listed}"
+        )
+    return "\n\n".join(sections) or None
+
+
+_indexes: dict[Path, AgentsIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_agents_index(cwd: Path) -> AgentsIndex:
+    root = find_workspace_root(cwd)
+    with _indexes_lock:
+        index = _indexes.get(root)
+        if index is None:
+            index = AgentsIndex(root)
+            _indexes[root] = index
+            return index
+    index.refresh_in_background()
+    return index
@@ -1,17 +1,53 @@
 from prompts.system import get_system_prompt
-from dataclasses import dataclass, field
-from utils.text import count_tokens
+from concurrent.futures import Future
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
+from utils.text import count_tokens, count_tokens_in_background, estimate_tokens
+from utils.tracing import get_tracer
 from config.config import Config
-from typing import Any, List
+from typing import Any, List, TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from context.session_store import SessionLog
 
-@dataclass
+
+@lru_cache(maxsize=16)
+def _count_prompt_tokens(model: str, text: str) -> int:
+    return count_tokens(model=model, text=text)
+
+
+# Shorter texts are counted inline: a worker thread handoff costs more.
+BACKGROUND_COUNT_CHARS = 16_384
+
+
+@dataclass(slots=True)
 class MessageItem:
     role: str
     content: str
     tool_call_id: str | None = None
-    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    tool_calls: list[dict[str, Any]] | None = None
     token_count: int | None = None
+    pending_tokens: Future[int] | None = field(default=None, repr=False, compare=False)
+
+    def tokens(self, wait: bool = False) -> int:
+        """The exact token count once known, otherwise a character estimate.
+
+        With ``wait``, blocks until a background count finishes.
+        """
+        pending = self.pending_tokens
+        if pending is not None and (wait or pending.done()):
+            self.token_count = pending.result()
+            self.pending_tokens = None
+        if self.token_count is not None:
+            return self.token_count
+        return estimate_tokens(self.content)
+
+    def to_record(self) -> dict[str, Any]:
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if f.name != "pending_tokens"
+        }
 
     def to_dict(self) -> dict[str, Any]:
         result: dict[str, Any] = {
@@ -30,19 +66,45 @@ class MessageItem:
 
 
 class ContextManager:
-    def __init__(self) -> None:
+    def __init__(self, config: Config) -> None:
         self._messages: list[MessageItem] = []
-        self.config = Config()
-        self._system_prompt = get_system_prompt(config=self.config)
-        self._model_name = self.config.model_name
+        self.session_log: SessionLog | None = None
+        self.reload(config)
 
-    def add_user_message(self, content: str) -> None:
-        item = MessageItem(
-            role="user",
-            content=content or "",
-            token_count=count_tokens(model=self._model_name, text=content or ""),
-        )
+    def reload(self, config: Config) -> None:
+        """Switches to a new config snapshot, keeping the history."""
+        self.config = config
+        self._system_prompt = get_system_prompt(config=config)
+        self._model_name = config.model_name
+        self._system_prompt_tokens = None
+
+    def _append(self, item: MessageItem) -> None:
         self._messages.append(item)
+        if self.session_log is not None:
+            self.session_log.append(item)
+
+    def _count_tokens(self, role: str, text: str) -> int:
+        with get_tracer().span("context.count_tokens", role=role, chars=len(text)):
+            return count_tokens(model=self._model_name, text=text)
+
+    def _schedule_count(self, item: MessageItem) -> None:
+        if len(item.content) < BACKGROUND_COUNT_CHARS:
+            item.token_count = self._count_tokens(item.role, item.content)
+        else:
+            item.pending_tokens = count_tokens_in_background(
+                self._count_tokens, item.role, item.content
+            )
+
+    def restore(self, items: list[MessageItem]) -> None:
+        self._messages = list(items)
+        for item in self._messages:
+            if item.token_count is None:
+                self._schedule_count(item)
+
+    def add_user_message(self, content: str) -> None:
+        item = MessageItem(role="user", content=content or "")
+        self._schedule_count(item)
+        self._append(item)
 
     def add_assistant_message(
         self, content: str, tool_calls: list[dict[str, Any]] | None = None
@@ -50,19 +112,44 @@ class ContextManager:
         item = MessageItem(
             role="assistant",
             content=content or "",
-            token_count=count_tokens(model=self._model_name, text=content or ""),
-            tool_calls=tool_calls or [],
+            tool_calls=tool_calls or None,
         )
-        self._messages.append(item)
+        self._schedule_count(item)
+        self._append(item)
 
     def add_tool_result(self, tool_call_id: str, content: str) -> None:
         item = MessageItem(
-            role="tool",
-            content=content,
-            tool_call_id=tool_call_id,
-            token_count=count_tokens(model=self._model_name, text=content or ""),
+            role="tool", content=content or "", tool_call_id=tool_call_id
         )
-        self._messages.append(item)
+        self._schedule_count(item)
+        self._append(item)
+
+    def _prompt_tokens(self) -> int:
+        if self._system_prompt_tokens is None:
+            self._system_prompt_tokens = _count_prompt_tokens(
+                self._model_name, self._system_prompt or ""
+            )
+        return self._system_prompt_tokens
+
+    def estimated_tokens(self) -> int:
+        """Context size for budget decisions; never waits on pending counts."""
+        return self._prompt_tokens() + sum(item.tokens() for item in self._messages)
+
+    def exact_tokens(self) -> int:
+        """Context size with every background count resolved."""
+        return self._prompt_tokens() + sum(
+            item.tokens(wait=True) for item in self._messages
+        )
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by message contents and tool call arguments."""
+        total = 0
+        for item in self._messages:
+            total += len(item.content.encode("utf-8"))
+            for tool_call in item.tool_calls or ():
+                arguments = tool_call.get("function", {}).get("arguments", "")
+                total += len(str(arguments).encode("utf-8"))
+        return total
 
     def get_messages(self) -> List[dict[str, Any]]:
         messages = []
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+
+
+class FileTracker:
+    """Remembers which version of each file the model has already seen.
+
+    One tracker belongs to one session. Versions are keyed by content hash and
+    kept as text so a re-read can be answered with a diff. The least recently
+    read files are dropped once ``max_bytes`` of text is held.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._seen: OrderedDict[Path, tuple[str, str]] = OrderedDict()
+        self._size = 0
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, path: Path) -> tuple[str, str] | None:
+        """Returns ``(digest, text)`` of the last version seen, if any."""
+        entry = self._seen.get(path)
+        if entry is not None:
+            self._seen.move_to_end(path)
+        return entry
+
+    def remember(self, path: Path, text: str, digest: str | None = None) -> None:
+        self.forget(path)
+        if len(text) > self.max_bytes:
+            return
+
+        self._seen[path] = (digest or self.digest(text), text)
+        self._size += len(text)
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._seen.popitem(last=False)
+            self._size -= len(evicted)
+
+    def forget(self, path: Path) -> None:
+        entry = self._seen.pop(path, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def __len__(self) -> int:
+        return len(self._seen)
@@ -0,0 +1,267 @@
+from __future__ import annotations
+import ast
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from config.config import Config
+from config.loader import get_data_dir
+from context.agents_md import SKIP_DIRS, find_workspace_root
+from utils.text import count_tokens
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+SOURCE_SUFFIXES = {
+    ".py",
+    ".js",
+    ".jsx",
+    ".ts",
+    ".tsx",
+    ".go",
+    ".rs",
+    ".java",
+    ".kt",
+    ".rb",
+    ".php",
+    ".cs",
+    ".swift",
+    ".scala",
+    ".c",
+    ".h",
+    ".cpp",
+    ".hpp",
+    ".sh",
+}
+MAX_FILE_BYTES = 512 * 1024
+MAX_SYMBOLS_PER_FILE = 12
+# Rescans of the same workspace closer together than this reuse the last map.
+REFRESH_INTERVAL = 5.0
+
+_DEFINITION = re.compile(
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:pub(?:\([^)]*\))?\s+)?(?:async\s+)?"
+    r"(?:function|class|interface|type|struct|enum|trait|fn|func|def|module)\s+"
+    r"(?:\([^)]*\)\s*)?([A-Za-z_]\w*)",
+    re.MULTILINE,
+)
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w{2,}")
+
+
+def _suffix(name: str) -> str:
+    return os.path.splitext(name)[1]
+
+
+def _python_symbols(text: str) -> list[str] | None:
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return None
+    return [
+        node.name
+        for node in tree.body
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+        and not node.name.startswith("_")
+    ]
+
+
+def extract_symbols(path: Path, text: str) -> list[str]:
+    """Top-level classes and functions defined in a source file."""
+    if path.suffix == ".py":
+        symbols = _python_symbols(text)
+        if symbols is not None:
+            return symbols
+    seen: dict[str, None] = {}
+    for name in _DEFINITION.findall(text):
+        if not name.startswith("_"):
+            seen[name] = None
+    return list(seen)
+
+
+class RepoMap:
+    """Outline of a workspace: its source files and their top-level symbols.
+
+    Files are ranked by how many other files reference their symbols, with a
+    bonus for recent changes. Parsed symbols are cached on disk per file and
+    re-parsed only when the file's mtime or size changes.
+    """
+
+    def __init__(self, root: Path, cache_path: Path, max_files: int) -> None:
+        self.root = root
+        self.cache_path = cache_path
+        self.max_files = max_files
+        self.files: dict[str, dict] = {}
+        self.truncated = False
+        self.updated_at = 0.0
+        self._load_cache()
+
+    def _load_cache(self) -> None:
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION and data.get("root") == str(self.root):
+            self.files = data.get("files", {})
+
+    def _save_cache(self) -> None:
+        payload = json.dumps(
+            {"version": CACHE_VERSION, "root": str(self.root), "files": self.files},
+            separators=(",", ":"),
+        )
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_path.parent)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self.cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write repo map cache {self.cache_path}: {e}")
+
+    def _walk(self) -> list[tuple[str, os.stat_result]]:
+        found: list[tuple[str, os.stat_result]] = []
+        pending = [self.root]
+        self.truncated = False
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith("."):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                pending.append(Path(entry.path))
+                        elif _suffix(entry.name) in SOURCE_SUFFIXES and entry.is_file(
+                            follow_symlinks=False
+                        ):
+                            if len(found) >= self.max_files:
+                                self.truncated = True
+                                return found
+                            relative = Path(entry.path).relative_to(self.root)
+                            found.append((relative.as_posix(), entry.stat()))
+            except OSError:
+                continue
+        return found
+
+    def update(self) -> None:
+        """Re-parses new and changed files and drops deleted ones."""
+        files: dict[str, dict] = {}
+        changed = False
+        for relative, stat in self._walk():
+            entry = self.files.get(relative)
+            if (
+                entry is not None
+                and entry["mtime"] == stat.st_mtime_ns
+                and entry["size"] == stat.st_size
+            ):
+                files[relative] = entry
+                continue
+
+            changed = True
+            symbols: list[str] = []
+            names: list[str] = []
+            if stat.st_size <= MAX_FILE_BYTES:
+                try:
+                    text = (self.root / relative).read_text(
+                        encoding="utf-8", errors="replace"
+                    )
+                except OSError:
+                    continue
+                symbols = extract_symbols(Path(relative), text)
+                names = sorted(set(_IDENTIFIER.findall(text)))
+            files[relative] = {
+                "mtime": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "symbols": symbols,
+                "names": names,
+            }
+
+        changed = changed or files.keys() != self.files.keys()
+        self.files = files
+        self.updated_at = time.monotonic()
+        if changed:
+            self._save_cache()
+
+    def ranked(self) -> list[tuple[str, list[str]]]:
+        """Files with their symbols, most important first."""
+        definers: dict[str, set[str]] = {}
+        for relative, entry in self.files.items():
+            for symbol in entry["symbols"]:
+                definers.setdefault(symbol, set()).add(relative)
+
+        references: Counter[str] = Counter()
+        for relative, entry in self.files.items():
+            for name in entry["names"]:
+                files = definers.get(name)
+                if files and relative not in files:
+                    references[name] += 1
+
+        newest = max((e["mtime"] for e in self.files.values()), default=0)
+        scored: list[tuple[float, str, list[str]]] = []
+        for relative, entry in self.files.items():
+            symbols = sorted(entry["symbols"], key=lambda s: -references[s])
+            age_days = (newest - entry["mtime"]) / 86_400e9
+            score = sum(references[s] for s in symbols) + 2.0 / (1.0 + age_days)
+            scored.append((score, relative, symbols))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(relative, symbols) for _, relative, symbols in scored]
+
+    def render(self, max_tokens: int, model: str) -> str:
+        """The highest-ranked files that fit in ``max_tokens``, in path order."""
+        lines: list[str] = []
+        used = 0
+        ranked = self.ranked()
+        for relative, symbols in ranked:
+            shown = symbols[:MAX_SYMBOLS_PER_FILE]
+            line = relative
+            if shown:
+                more = ", ..." if len(symbols) > len(shown) else ""
+                line += f": {', '.join(shown)}{more}"
+            tokens = count_tokens(line + "\n", model)
+            if used + tokens > max_tokens:
+                continue
+            lines.append(line)
+            used += tokens
+
+        # Path order keeps the map stable when only the ranking shifts.
+        lines.sort()
+        omitted = len(ranked) - len(lines)
+        if omitted:
+            lines.append(f"... {omitted} more files not shown")
+        if self.truncated:
+            lines.append(f"... stopped after {self.max_files} files")
+        return "\n".join(lines)
+
+
+_maps: dict[tuple[Path, int, Path], RepoMap] = {}
+_maps_lock = threading.Lock()
+
+
+def get_repo_map(config: Config) -> str | None:
+    """The rendered repository map for ``config.cwd``, or None when disabled."""
+    settings = config.repo_map
+    if not settings.enabled or not settings.max_tokens:
+        return None
+
+    root = find_workspace_root(config.cwd)
+    digest = hashlib.sha256(str(root).encode("utf-8")).hexdigest()[:16]
+    directory = settings.directory or get_data_dir() / "repo_maps"
+    cache_path = directory / f"{digest}.json"
+    # Keyed on the settings too, so a reloaded config takes effect.
+    key = (root, settings.max_files, cache_path)
+    with _maps_lock:
+        repo_map = _maps.get(key)
+        if repo_map is None:
+            repo_map = RepoMap(root, cache_path, settings.max_files)
+            _maps[key] = repo_map
+        if time.monotonic() - repo_map.updated_at >= REFRESH_INTERVAL:
+            repo_map.update()
+
+    if not repo_map.files:
+        return None
+    return repo_map.render(settings.max_tokens, config.model_name)
@@ -0,0 +1,333 @@
+from __future__ import annotations
+import dataclasses
+import json
+import logging
+import lzma
+import os
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, TYPE_CHECKING
+from config.config import Config
+from config.loader import get_data_dir
+from utils.errors import ConfigError
+
+if TYPE_CHECKING:
+    from context.contextmanager import ContextManager, MessageItem
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "index.jsonl"
+LOG_SUFFIX = ".jsonl"
+COMPRESSED_SUFFIXES = {"lzma": ".jsonl.xz", "zlib": ".jsonl.zz"}
+TITLE_MAX_CHARS = 80
+
+
+@dataclass
+class SessionInfo:
+    id: str
+    created_at: float
+    updated_at: float
+    cwd: str
+    title: str = ""
+    messages: int = 0
+    offset: int = 0
+    compression: str | None = None
+
+
+def _read_valid_lines(data: bytes) -> tuple[list[dict[str, Any]], int]:
+    """Parses complete JSON lines and returns them with the byte length they span.
+
+    A torn final line (from a crash mid-write) is dropped.
+    """
+    records: list[dict[str, Any]] = []
+    valid = 0
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+        valid += len(line)
+    return records, valid
+
+
+class SessionLog:
+    """Append-only JSONL log of one session's messages.
+
+    Every message is written as it is added, with its token count, so a
+    resumed session needs neither re-tokenizing nor re-running tools.
+    """
+
+    def __init__(self, store: SessionStore, info: SessionInfo, stream: IO[bytes]):
+        self.store = store
+        self.info = info
+        self._stream = stream
+        # Messages written before their background token count finished.
+        self._uncounted: list[tuple[int, MessageItem]] = []
+
+    @property
+    def id(self) -> str:
+        return self.info.id
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._stream.write(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode(
+                "utf-8"
+            )
+            + b"\n"
+        )
+        self._stream.flush()
+
+    def _write_counts(self, wait: bool = False) -> None:
+        """Appends ``tokens`` records for counts that finished after their message."""
+        remaining: list[tuple[int, MessageItem]] = []
+        for index, item in self._uncounted:
+            pending = item.pending_tokens
+            if pending is not None and not (wait or pending.done()):
+                remaining.append((index, item))
+                continue
+            self._write(
+                {"type": "tokens", "message": index, "token_count": item.tokens(wait)}
+            )
+        self._uncounted = remaining
+
+    def append(self, item: MessageItem) -> None:
+        if self._uncounted:
+            self._write_counts()
+        item.tokens()
+        self._write({"type": "message", **item.to_record()})
+        if item.token_count is None:
+            self._uncounted.append((self.info.messages, item))
+
+        self.info.messages += 1
+        self.info.offset = self._stream.tell()
+        self.info.updated_at = time.time()
+        if not self.info.title and item.role == "user":
+            self.info.title = " ".join(item.content.split())[:TITLE_MAX_CHARS]
+
+    def checkpoint(self) -> None:
+        if self._uncounted:
+            self._write_counts()
+            self.info.offset = self._stream.tell()
+        self.store.write_index(self.info)
+
+    def close(self) -> None:
+        if self._stream.closed:
+            return
+        if self._uncounted:
+            self._write_counts(wait=True)
+            self.info.offset = self._stream.tell()
+        self._stream.close()
+        self.checkpoint()
+
+
+class SessionStore:
+    """On-disk store of session logs plus an append-only index.
+
+    The index holds one JSON line per checkpoint (the latest line for an id
+    wins), so listing sessions reads one small file no matter how many logs
+    exist. Logs untouched for ``compress_after_days`` are compressed.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        compression: str = "lzma",
+        compress_after_days: float | None = 7.0,
+    ) -> None:
+        self.directory = directory
+        self.compression = compression
+        self.compress_after_days = compress_after_days
+        self._lock = threading.RLock()
+        self._index_lines = 0
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILE_NAME
+
+    def _log_path(self, session_id: str, compression: str | None = None) -> Path:
+        suffix = COMPRESSED_SUFFIXES[compression] if compression else LOG_SUFFIX
+        return self.directory / f"{session_id}{suffix}"
+
+    def _load_index(self) -> dict[str, SessionInfo]:
+        sessions: dict[str, SessionInfo] = {}
+        if not self.index_path.is_file():
+            return sessions
+
+        records, _ = _read_valid_lines(self.index_path.read_bytes())
+        for record in records:
+            try:
+                info = SessionInfo(**record)
+            except TypeError:
+                continue
+            sessions[info.id] = info
+        self._index_lines = len(records)
+        return sessions
+
+    def write_index(self, info: SessionInfo) -> None:
+        line = json.dumps(dataclasses.asdict(info), ensure_ascii=False) + "\n"
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with self.index_path.open("a", encoding="utf-8") as f:
+                f.write(line)
+            self._index_lines += 1
+
+    def _rewrite_index(self, sessions: dict[str, SessionInfo]) -> None:
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for info in sessions.values():
+                f.write(json.dumps(dataclasses.asdict(info), ensure_ascii=False))
+                f.write("\n")
+        os.replace(tmp_path, self.index_path)
+        self._index_lines = len(sessions)
+
+    def list_sessions(self) -> list[SessionInfo]:
+        with self._lock:
+            sessions = self._load_index()
+            if self._index_lines > 2 * len(sessions) + 100:
+                self._rewrite_index(sessions)
+        return sorted(sessions.values(), key=lambda s: s.updated_at, reverse=True)
+
+    def find(self, session_id: str) -> SessionInfo:
+        with self._lock:
+            sessions = self._load_index()
+
+        if session_id in sessions:
+            return sessions[session_id]
+        matches = [s for s in sessions.values() if s.id.startswith(session_id)]
+        if len(matches) == 1:
+            return matches[0]
+        if not matches:
+            raise ConfigError(f"No saved session matches {session_id!r}")
+        raise ConfigError(
+            f"Session id {session_id!r} is ambiguous: "
+            + ", ".join(s.id for s in matches[:5])
+        )
+
+    def create(self, cwd: Path) -> SessionLog:
+        now = time.time()
+        session_id = (
+            datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M%S")
+            + "-"
+            + uuid.uuid4().hex[:6]
+        )
+        info = SessionInfo(id=session_id, created_at=now, updated_at=now, cwd=str(cwd))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stream = self._log_path(session_id).open("ab")
+        self.write_index(info)
+        self.compress_stale_in_background()
+        return SessionLog(self, info, stream)
+
+    def _read_log(self, info: SessionInfo) -> tuple[list[dict[str, Any]], int]:
+        path = self._log_path(info.id, info.compression)
+        data = path.read_bytes()
+        if info.compression == "lzma":
+            data = lzma.decompress(data)
+        elif info.compression == "zlib":
+            data = zlib.decompress(data)
+        return _read_valid_lines(data)
+
+    def resume(self, session_id: str, context: ContextManager) -> SessionLog:
+        from context.contextmanager import MessageItem
+
+        with self._lock:
+            info = self.find(session_id)
+            records, valid = self._read_log(info)
+
+            path = self._log_path(info.id)
+            if info.compression:
+                compressed_path = self._log_path(info.id, info.compression)
+                lines = b"".join(
+                    json.dumps(r, ensure_ascii=False, separators=(",", ":")).encode(
+                        "utf-8"
+                    )
+                    + b"\n"
+                    for r in records
+                )
+                path.write_bytes(lines)
+                compressed_path.unlink()
+                info.compression = None
+                valid = len(lines)
+
+            stream = path.open("r+b")
+            stream.truncate(valid)
+            stream.seek(valid)
+
+        items: list[MessageItem] = []
+        for record in records:
+            record_type = record.pop("type", None)
+            if record_type == "message":
+                items.append(MessageItem(**record))
+            elif record_type == "tokens" and record["message"] < len(items):
+                items[record["message"]].token_count = record["token_count"]
+        context.restore(items)
+
+        info.messages = len(items)
+        info.offset = valid
+        info.updated_at = time.time()
+        log = SessionLog(self, info, stream)
+        log.checkpoint()
+        return log
+
+    def compress_stale(self) -> int:
+        if self.compress_after_days is None:
+            return 0
+
+        cutoff = time.time() - self.compress_after_days * 86400
+        compressed = 0
+        with self._lock:
+            sessions = self._load_index()
+            for info in sessions.values():
+                if info.compression or info.updated_at > cutoff:
+                    continue
+                path = self._log_path(info.id)
+                if not path.is_file():
+                    continue
+
+                data = path.read_bytes()
+                if self.compression == "lzma":
+                    packed = lzma.compress(data, preset=6)
+                else:
+                    packed = zlib.compress(data, 9)
+
+                target = self._log_path(info.id, self.compression)
+                target.write_bytes(packed)
+                path.unlink()
+                info.compression = self.compression
+                compressed += 1
+
+            if compressed:
+                self._rewrite_index(sessions)
+        return compressed
+
+    def compress_stale_in_background(self) -> None:
+        def compress() -> None:
+            try:
+                self.compress_stale()
+            except OSError as e:
+                logger.warning(f"Failed to compress old sessions: {e}")
+
+        threading.Thread(target=compress, daemon=True).start()
+
+
+_stores: dict[Path, SessionStore] = {}
+
+
+def get_session_store(config: Config) -> SessionStore:
+    directory = config.sessions.directory or get_data_dir() / "sessions"
+    store = _stores.get(directory)
+    if store is None:
+        store = SessionStore(
+            directory,
+            compression=config.sessions.compression,
+            compress_after_days=config.sessions.compress_after_days,
+        )
+        _stores[directory] = store
+    return store
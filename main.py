@@ -1,56 +1,170 @@
+from utils.startup import get_startup_profiler
 import asyncio
+import atexit
+import signal
+from contextlib import aclosing
 import click
-from typing import Any
-from agent.agent import Agent
-from ui.tui import TUI
+from typing import TYPE_CHECKING
 import sys
-from agent.events import AgentEventType
-from ui.tui import get_console
+import time
 from pathlib import Path
+from client.llm_client import prewarm
 from config.loader import load_config
 from config.config import Config
-from utils.errors import ConfigError
+from utils.errors import AgentError, ConfigError
+from utils.text import warm_tokenizer
+from utils.metrics import get_metrics
+from utils.tracing import get_tracer
 
-console = get_console()
+if TYPE_CHECKING:
+    from agent.agent import Agent
+
+
+def _open_session_log(config: Config, agent: "Agent", resume: str | None):
+    if resume is None and not config.sessions.enabled:
+        return None
+
+    from context.session_store import get_session_store
+
+    store = get_session_store(config)
+    if resume:
+        log = store.resume(resume, agent.context_manager)
+    else:
+        log = store.create(config.cwd)
+    agent.context_manager.session_log = log
+    return log
+
+
+def _attach_recorder(config: Config, agent: "Agent", record: Path | None) -> None:
+    if record is None:
+        return
+
+    from agent.replay import SessionRecorder
+
+    agent.recorder = SessionRecorder(record, config)
 
 
 class CLI:
-    def __init__(self, config: Config):
-        self.agent: Agent | None = None
-        self.tui = TUI(config=config, console=console)
+    def __init__(
+        self, config: Config, resume: str | None = None, record: Path | None = None
+    ):
+        from ui.tui import TUI, get_console
+
+        self.agent: "Agent | None" = None
+        self.console = get_console()
+        self.tui = TUI(config=config, console=self.console)
         self.config = config
+        self.resume = resume
+        self.record = record
 
     async def run_single(self, message: str) -> str | None:
-        async with Agent(config=self.config) as agent:
-            self.agent = agent
-            return await self._process_message(message)
+        with get_startup_profiler().phase("import_agent"):
+            from agent.agent import Agent
+            from tools.mcp import get_mcp_manager
 
-    async def run_interactive(self) -> str | None:
-        self.tui.print_welcome(
-            "AI Coding Agent",
-            [
-                f"model: {self.config.model_name}",
-                f"cwd: {self.config.cwd}",
-                "commands: /exit /help /config /approval /model",
-            ],
-        )
-        async with Agent(config=self.config) as agent:
-            self.agent = agent
-
-            while True:
+        try:
+            with get_startup_profiler().phase("agent_init"):
+                agent = Agent(config=self.config)
+            session_log = _open_session_log(self.config, agent, self.resume)
+            _attach_recorder(self.config, agent, self.record)
+            async with agent:
+                self.agent = agent
                 try:
-                    message = console.input("\n[user]>[/user] ").strip()
-                    if not message:
-                        continue
-                    if message == "/exit":
+                    return await self._process_message(message)
+                finally:
+                    if session_log:
+                        session_log.close()
+        finally:
+            await get_mcp_manager().close()
+
+    async def run_interactive(self) -> str | None:
+        from agent.agent import Agent
+        from config.loader import ConfigWatcher
+        from tools.mcp import get_mcp_manager
+
+        agent = Agent(config=self.config)
+        watcher = ConfigWatcher(self.config.cwd)
+        session_log = _open_session_log(self.config, agent, self.resume)
+        _attach_recorder(self.config, agent, self.record)
+
+        welcome = [
+            f"model: {self.config.model_name}",
+            f"cwd: {self.config.cwd}",
+            "commands: /exit /stats /help /config /approval /model",
+        ]
+        if session_log:
+            welcome.insert(2, f"session: {session_log.id}")
+        self.tui.print_welcome("AI Coding Agent", welcome)
+
+        try:
+            async with agent:
+                self.agent = agent
+
+                while True:
+                    try:
+                        message = self.console.input("\n[user]>[/user] ").strip()
+                        if not message:
+                            continue
+                        if message == "/exit":
+                            break
+                        if message == "/stats":
+                            self.tui.print_stats(
+                                {
+                                    **agent.metrics.summary(),
+                                    "context_tokens": await asyncio.to_thread(
+                                        agent.context_manager.exact_tokens
+                                    ),
+                                }
+                            )
+                            continue
+                        self._apply_config(watcher.poll())
+                        await self._run_turn(message)
+                        if session_log:
+                            session_log.checkpoint()
+                    except KeyboardInterrupt:
+                        self.console.print("\n[dim]Use /exit to quit.[/dim]")
+                    except EOFError:
                         break
-                    await self._process_message(message)
-                except KeyboardInterrupt:
-                    console.print("\n[dim]Use /exit to quit.[/dim]")
-                except EOFError:
-                    break
+        finally:
+            if session_log:
+                session_log.close()
+            await get_mcp_manager().close()
+
+        self.console.print("\n[dim]Goodbye![/dim]")
+        if session_log:
+            self.console.print(f"[dim]Resume with --resume {session_log.id}[/dim]")
 
-        console.print("\n[dim]Goodbye![/dim]")
+    def _apply_config(self, config: Config | None) -> None:
+        if config is None or self.agent is None:
+            return
+        self.config = config
+        self.tui.config = config
+        self.agent.reload_config(config)
+        self.console.print(f"[dim]Config reloaded (model: {config.model_name}).[/dim]")
+
+    async def _run_turn(self, message: str) -> str | None:
+        loop = asyncio.get_running_loop()
+        task = asyncio.create_task(self._process_message(message))
+
+        try:
+            loop.add_signal_handler(signal.SIGINT, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            self.tui.end_assistant()
+            self.console.print("\n[dim]Interrupted. Use /exit to quit.[/dim]")
+            return None
+        finally:
+            try:
+                loop.remove_signal_handler(signal.SIGINT)
+            except (NotImplementedError, RuntimeError):
+                pass
 
     def _get_tool_kind(self, tool_name: str) -> str | None:
         tool = self.agent.tool_registry.get(tool_name)
@@ -59,6 +173,8 @@ class CLI:
         return tool.kind.value
 
     async def _process_message(self, message: str) -> str | None:
+        from agent.events import AgentEventType
+
         if not self.agent:
             return None
 
@@ -66,47 +182,148 @@ class CLI:
 
         final_response: str | None = None
 
-        async for event in self.agent.run(message):
-            if event.type == AgentEventType.TEXT_DELTA:
-                content = event.data.get("content", "")
-                if not assistant_streaming:
-                    self.tui.begin_assistant()
-                    assistant_streaming = True
-                self.tui.stream_assistant_delta(content)
-            elif event.type == AgentEventType.TEXT_COMPLETE:
-                final_response = event.data.get("content", "")
-                if assistant_streaming:
-                    self.tui.end_assistant()
-                    assistant_streaming = False
-            elif event.type == AgentEventType.AGENT_ERROR:
-                error = event.data.get("error", "Unknown error")
-                console.print(f"\n[error]Error: {error}[/error]")
-            elif event.type == AgentEventType.TOOL_CALL_START:
-                tool_name = event.data.get("name", "unknown")
-                tool_kind = self._get_tool_kind(tool_name)
-                self.tui.tool_call_start(
-                    event.data.get("call_id", ""),
-                    tool_name,
-                    tool_kind,
-                    event.data.get("arguments", {}),
-                )
-            elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
-                tool_name = event.data.get("name", "unknown")
-                tool_kind = self._get_tool_kind(tool_name)
-                self.tui.tool_call_complete(
-                    event.data.get("call_id", ""),
-                    tool_name,
-                    tool_kind,
-                    event.data.get("success", False),
-                    event.data.get("output", ""),
-                    event.data.get("error", None),
-                    event.data.get("metadata", None),
-                    event.data.get("truncated", False),
-                )
+        async with aclosing(self.agent.run(message)) as events:
+            async for event in events:
+                if event.type == AgentEventType.TEXT_DELTA:
+                    content = event.data.get("content", "")
+                    if not assistant_streaming:
+                        self.tui.begin_assistant()
+                        assistant_streaming = True
+                    self.tui.stream_assistant_delta(content)
+                elif event.type == AgentEventType.TEXT_COMPLETE:
+                    final_response = event.data.get("content", "")
+                    if assistant_streaming:
+                        self.tui.end_assistant()
+                        assistant_streaming = False
+                elif event.type == AgentEventType.AGENT_ERROR:
+                    error = event.data.get("error", "Unknown error")
+                    self.console.print(f"\n[error]Error: {error}[/error]")
+                elif event.type == AgentEventType.TURN_USAGE:
+                    if self.config.ui.show_usage:
+                        if assistant_streaming:
+                            self.tui.end_assistant()
+                            assistant_streaming = False
+                        data = event.data
+                        line = (
+                            f"turn {data['turn']}: "
+                            f"{data['prompt_tokens']} prompt tokens "
+                            f"({data['cached_tokens']} cached, "
+                            f"{data['cache_hit_ratio']:.0%}), "
+                            f"{data['completion_tokens']} completion"
+                        )
+                        if data["ttft"] is not None:
+                            line += f", first token {data['ttft']:.2f}s"
+                        if data["tokens_per_second"]:
+                            line += f", {data['tokens_per_second']:.0f} tok/s"
+                        self.console.print(f"[muted]{line}[/muted]")
+                elif event.type == AgentEventType.TOOL_CALL_START:
+                    tool_name = event.data.get("name", "unknown")
+                    tool_kind = self._get_tool_kind(tool_name)
+                    self.tui.tool_call_start(
+                        event.data.get("call_id", ""),
+                        tool_name,
+                        tool_kind,
+                        event.data.get("arguments", {}),
+                    )
+                elif event.type == AgentEventType.TOOL_CALL_COMPLETE:
+                    tool_name = event.data.get("name", "unknown")
+                    tool_kind = self._get_tool_kind(tool_name)
+                    self.tui.tool_call_complete(
+                        event.data.get("call_id", ""),
+                        tool_name,
+                        tool_kind,
+                        event.data.get("success", False),
+                        event.data.get("output", ""),
+                        event.data.get("error", None),
+                        event.data.get("metadata", None),
+                        event.data.get("truncated", False),
+                        event.data.get("payload"),
+                    )
 
         return final_response
 
 
+async def run_ndjson(
+    config: Config,
+    prompt: str,
+    resume: str | None = None,
+    record: Path | None = None,
+) -> str | None:
+    with get_startup_profiler().phase("import_agent"):
+        from agent.agent import Agent
+        from agent.events import AgentEventType
+        from tools.mcp import get_mcp_manager
+        from ui.ndjson import NDJSONWriter
+
+    writer = NDJSONWriter()
+    final_response: str | None = None
+    session_log = None
+
+    try:
+        with get_startup_profiler().phase("agent_init"):
+            agent = Agent(config=config)
+        session_log = _open_session_log(config, agent, resume)
+        _attach_recorder(config, agent, record)
+        async with agent:
+            async for event in agent.run(prompt):
+                writer.write_event(event)
+                if event.type == AgentEventType.TEXT_COMPLETE:
+                    final_response = event.data.get("content")
+    finally:
+        if session_log:
+            session_log.close()
+        await get_mcp_manager().close()
+
+    return final_response
+
+
+def _report_errors(errors: list[str], output: str) -> None:
+    if output == "ndjson":
+        from ui.ndjson import NDJSONWriter
+
+        writer = NDJSONWriter()
+        for error in errors:
+            writer.write_error(error)
+        return
+
+    from ui.tui import get_console
+
+    console = get_console()
+    for error in errors:
+        console.print(f"[error]{error}[/error]")
+
+
+def _run_replay(
+    config: Config,
+    bundle: Path,
+    live_tools: bool,
+    report_path: Path | None,
+    baseline_path: Path | None,
+) -> None:
+    import json
+    from agent.replay import format_replay_report, run_replay
+
+    report = asyncio.run(run_replay(config, bundle, live_tools=live_tools))
+    baseline = None
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    click.echo(format_replay_report(report, baseline))
+    if report_path:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if any(turn["errors"] for turn in report["turns"]):
+        sys.exit(1)
+
+
+def _print_sessions(config: Config) -> None:
+    from datetime import datetime
+    from context.session_store import get_session_store
+
+    for info in get_session_store(config).list_sessions():
+        updated = datetime.fromtimestamp(info.updated_at).strftime("%Y-%m-%d %H:%M")
+        click.echo(f"{info.id}  {updated}  {info.messages:>4} msgs  {info.title}")
+
+
 @click.command()
 @click.argument("prompt", required=False)
 @click.option(
@@ -116,25 +333,240 @@ class CLI:
     default=Path.cwd(),
     help="Current working directory",
 )
-def main(prompt: str | None = None, cwd: Path | None = None):
+@click.option(
+    "--output",
+    "-o",
+    type=click.Choice(["text", "ndjson"]),
+    default="text",
+    help="Output format. ndjson writes one JSON event per line to stdout.",
+)
+@click.option(
+    "--batch",
+    "batch_path",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Run every task in a JSONL file concurrently and exit.",
+)
+@click.option(
+    "--batch-output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Where batch results are appended. Defaults to <tasks>.results.jsonl.",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=4,
+    show_default=True,
+    help="Maximum number of batch tasks running at once.",
+)
+@click.option(
+    "--daemon",
+    "daemon_mode",
+    is_flag=True,
+    default=False,
+    help="Run as a resident daemon serving prompts over a Unix socket.",
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Unix socket path for --daemon. Defaults to $AI_AGENT_SOCKET or a per-user runtime path.",
+)
+@click.option(
+    "--serve",
+    "serve_mode",
+    is_flag=True,
+    default=False,
+    help="Run the multi-session HTTP server (SSE event streams).",
+)
+@click.option("--host", default=None, help="Bind address for --serve.")
+@click.option("--port", type=int, default=None, help="Port for --serve.")
+@click.option(
+    "--resume",
+    default=None,
+    help="Resume a saved session by id (or unique id prefix).",
+)
+@click.option(
+    "--list-sessions",
+    is_flag=True,
+    default=False,
+    help="List saved sessions, most recent first, and exit.",
+)
+@click.option(
+    "--trace",
+    "trace_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Record spans and write them as a Chrome trace (Perfetto) JSON file on exit.",
+)
+@click.option(
+    "--metrics-output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write token, latency, tool and cost metrics in OpenMetrics text format on exit.",
+)
+@click.option(
+    "--record",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Record every LLM request/response and tool result to a replay bundle.",
+)
+@click.option(
+    "--replay",
+    "replay_bundle",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Re-run a recorded bundle offline and report per-turn cost and timings.",
+)
+@click.option(
+    "--replay-live-tools",
+    is_flag=True,
+    default=False,
+    help="With --replay, execute tools for real instead of using recorded results.",
+)
+@click.option(
+    "--replay-report",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="With --replay, also write the report as JSON.",
+)
+@click.option(
+    "--replay-baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="With --replay, show changes against an earlier --replay-report.",
+)
+@click.option(
+    "--startup-profile",
+    is_flag=True,
+    default=False,
+    help="Print startup phase timings to stderr when the first request is sent.",
+)
+def main(
+    prompt: str | None = None,
+    cwd: Path | None = None,
+    output: str = "text",
+    batch_path: Path | None = None,
+    batch_output: Path | None = None,
+    concurrency: int = 4,
+    daemon_mode: bool = False,
+    socket_path: Path | None = None,
+    serve_mode: bool = False,
+    host: str | None = None,
+    port: int | None = None,
+    resume: str | None = None,
+    list_sessions: bool = False,
+    trace_path: Path | None = None,
+    metrics_output: Path | None = None,
+    record: Path | None = None,
+    replay_bundle: Path | None = None,
+    replay_live_tools: bool = False,
+    replay_report: Path | None = None,
+    replay_baseline: Path | None = None,
+    startup_profile: bool = False,
+):
+    if trace_path:
+        get_tracer().enable(trace_path)
+    if metrics_output:
+        atexit.register(get_metrics().write, metrics_output)
+    profiler = get_startup_profiler()
+    if startup_profile:
+        profiler.enable()
+        profiler.record("imports", profiler.origin, time.perf_counter())
+    prewarm()
 
     try:
-        config = load_config(cwd=cwd)
+        with profiler.phase("load_config"):
+            config = load_config(cwd=cwd)
     except ConfigError as e:
-        console.print(f"[error]Error: {e}[/error]")
+        _report_errors([f"Error: {e}"], output)
         sys.exit(1)
 
-    # messages=[
-    #     {"role": "user", "content": prompt}
-    # ]
+    if list_sessions:
+        _print_sessions(config)
+        return
+
+    if replay_bundle:
+        try:
+            _run_replay(
+                config,
+                replay_bundle,
+                replay_live_tools,
+                replay_report,
+                replay_baseline,
+            )
+        except ConfigError as e:
+            _report_errors([f"Error: {e}"], output)
+            sys.exit(1)
+        return
+
+    if resume:
+        from context.session_store import get_session_store
+
+        try:
+            resume = get_session_store(config).find(resume).id
+        except ConfigError as e:
+            _report_errors([f"Error: {e}"], output)
+            sys.exit(1)
 
-    errors = config.validate()
+    with profiler.phase("validate"):
+        errors = config.validate()
     if errors:
-        for error in errors:
-            console.print(f"[error]{error}[/error]")
+        _report_errors(errors, output)
         sys.exit(1)
 
-    cli = CLI(config=config)
+    if daemon_mode:
+        from agent.daemon import AgentDaemon
+
+        daemon = AgentDaemon(config=config, socket_path=socket_path)
+        click.echo(f"Starting agent daemon on {daemon.socket_path}", err=True)
+        try:
+            asyncio.run(daemon.serve())
+        except AgentError as e:
+            _report_errors([f"Error: {e}"], output)
+            sys.exit(1)
+        return
+
+    if serve_mode:
+        from agent.server import AgentServer
+
+        server = AgentServer(config=config, host=host, port=port)
+        click.echo(f"Serving agent sessions on {server.host}:{server.port}", err=True)
+        asyncio.run(server.serve())
+        return
+
+    if batch_path:
+        from agent.batch import BatchRunner
+
+        batch_output = batch_output or batch_path.with_suffix(".results.jsonl")
+        runner = BatchRunner(config=config, concurrency=concurrency)
+        try:
+            stats = asyncio.run(runner.run(batch_path, batch_output))
+        except ConfigError as e:
+            _report_errors([f"Error: {e}"], output)
+            sys.exit(1)
+        click.echo(stats.summary(), err=True)
+        if stats.failed:
+            sys.exit(1)
+        return
+
+    if output == "ndjson":
+        if not prompt and not sys.stdin.isatty():
+            prompt = sys.stdin.read().strip()
+        if not prompt:
+            _report_errors(["A prompt is required with --output ndjson"], output)
+            sys.exit(2)
+        warm_tokenizer(config.model_name)
+        if asyncio.run(run_ndjson(config, prompt, resume, record)) is None:
+            sys.exit(1)
+        return
+
+    warm_tokenizer(config.model_name)
+
+    with profiler.phase("ui_init"):
+        cli = CLI(config=config, resume=resume, record=record)
 
     if prompt:
         result = asyncio.run(cli.run_single(prompt))
@@ -1,6 +1,5 @@
-from datetime import datetime
 from config.config import Config
-import platform
+from context.repo_map import get_repo_map
 
 
 def get_system_prompt(config: Config) -> str:
@@ -24,6 +23,11 @@ def get_system_prompt(config: Config) -> str:
     # Operational guidelines
     parts.append(_get_operational_section())
 
+    # Last, so edits to the workspace leave the prefix above cacheable
+    repo_map = get_repo_map(config)
+    if repo_map:
+        parts.append(_get_repo_map_section(repo_map))
+
     return "\n\n".join(parts)
 
 
@@ -55,7 +59,8 @@ def _get_agents_md_section() -> str:
     - Instructions about code style, structure, naming, etc. apply only to code within the AGENTS.md file's scope, unless the file states otherwise.
     - More-deeply-nested AGENTS.md files take precedence in the case of conflicting instructions.
     - Direct system/developer/user instructions (as part of a prompt) take precedence over AGENTS.md instructions.
-- The contents of the AGENTS.md file at the root of the repo and any directories from the CWD up to the root are included with the developer message and don't need to be re-read. When working in a subdirectory of CWD, or a directory outside the CWD, check for any AGENTS.md files that may be applicable."""
+- The contents of the AGENTS.md files at the root of the repo and in any directories from the CWD up to the root are included with the project instructions and don't need to be re-read.
+- When you read a file covered by other AGENTS.md files, their instructions are attached to the tool result the first time. You don't need to search for them. Files outside the repository are not covered."""
 
 
 def _get_security_section() -> str:
@@ -169,4 +174,12 @@ def _get_user_instructions_section(instructions: str) -> str:
 
 The user has provided the following custom instructions:
 
-{instructions}"""
\ No newline at end of file
+{instructions}"""
+
+
+def _get_repo_map_section(repo_map: str) -> str:
+    return f"""# Repository Map
+
+The harness generated this outline of the workspace: source files and their top-level classes and functions. Files whose symbols are referenced most by other files come first, within a token budget. It reflects the workspace when the session started, so read a file before relying on its exact contents, and use the map instead of listing directories to find where things live.
+
+{repo_map}"""
@@ -5,6 +5,11 @@ from typing import Any
 from pydantic import BaseModel, ValidationError
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from config.config import Config
+    from context.file_tracker import FileTracker
 
 
 class ToolKind(str, Enum):
@@ -20,6 +25,17 @@ class ToolKind(str, Enum):
 class ToolInvocation:
     params: dict[str, Any]
     cwd: Path
+    file_tracker: FileTracker | None = None
+    config: Config | None = None
+
+
+@dataclass
+class FileContent:
+    path: str
+    start_line: int
+    lines: list[str]
+    total_lines: int
+    truncated: bool = False
 
 
 @dataclass
@@ -29,6 +45,7 @@ class ToolResult:
     error: str | None = None
     metadata: dict[str, Any] = field(default_factory=dict)
     truncated: bool = False
+    payload: FileContent | None = None
 
     @classmethod
     def error_result(cls, error: str, output: str = "", **kwargs: Any):
@@ -55,6 +72,7 @@ class Tool(ABC):
     name: str = "base_tool"
     description: str = "base tool"
     kind: ToolKind = ToolKind.READ
+    timeout: float | None = None
 
     def __init__(self) -> None:
         pass
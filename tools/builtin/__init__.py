@@ -1,8 +1,10 @@
 from tools.builtin.read_file import ReadFileTool
+from tools.builtin.fetch_output import FetchOutputTool
 from tools.base import Tool
 
 __all__ = [
     "ReadFileTool",
+    "FetchOutputTool",
 ]
 
 
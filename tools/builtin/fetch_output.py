@@ -0,0 +1,114 @@
+from pydantic import BaseModel, Field
+from tools.base import Tool, ToolKind, ToolInvocation, ToolResult
+from utils.blob_store import BlobStore
+
+PAGE_MAX_CHARS = 40_000
+
+
+class FetchOutputParams(BaseModel):
+    handle: str = Field(
+        ...,
+        description="Handle of a stored tool output, e.g. 'blob:3f2a...'.",
+    )
+
+    start_line: int = Field(
+        1,
+        ge=1,
+        description="First line to return (1-based). Defaults to 1.",
+    )
+
+    limit: int = Field(
+        200,
+        ge=1,
+        le=2000,
+        description="Maximum number of lines to return. Defaults to 200.",
+    )
+
+
+def spill_output(
+    store: BlobStore, text: str, head_lines: int, tail_lines: int, max_chars: int
+) -> str:
+    """Stores ``text`` in ``store`` and returns a head/tail preview with its handle.
+
+    The preview keeps at most ``head_lines`` + ``tail_lines`` lines and
+    ``max_chars`` characters.
+    """
+    handle = store.put(text)
+    lines = text.splitlines()
+    total = len(lines)
+
+    if head_lines + tail_lines >= total:
+        head, tail = lines, []
+    else:
+        head = lines[:head_lines]
+        tail = lines[total - tail_lines :] if tail_lines else []
+
+    head_text = "\n".join(head)[: max_chars * 3 // 4]
+    tail_text = "\n".join(tail)[-(max_chars // 4) :] if tail else ""
+    notice = (
+        f"... [output too large for context ({total} lines, {len(text)} chars); "
+        f"showing the start and end only. Full output stored as {handle}: "
+        f'call {FetchOutputTool.name}(handle="{handle}", start_line=..., limit=...) '
+        f"to page in the rest] ..."
+    )
+    return "\n".join(part for part in (head_text, notice, tail_text) if part)
+
+
+class FetchOutputTool(Tool):
+    name = "fetch_output"
+    description = (
+        "Page in a large tool output that was stored out of context. "
+        "Large results are replaced by a preview that names a handle; pass that "
+        "handle with start_line and limit to read the lines you need."
+    )
+    kind = ToolKind.READ
+    schema = FetchOutputParams
+
+    def __init__(self, store: BlobStore) -> None:
+        super().__init__()
+        self.store = store
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        params = FetchOutputParams(**invocation.params)
+
+        try:
+            text = self.store.get(params.handle)
+        except KeyError as e:
+            return ToolResult.error_result(str(e.args[0]))
+
+        lines = text.splitlines()
+        total_lines = len(lines)
+        start_idx = params.start_line - 1
+        if start_idx >= total_lines:
+            return ToolResult.error_result(
+                f"start_line {params.start_line} is past the end of {params.handle} "
+                f"({total_lines} lines)"
+            )
+
+        end_idx = min(start_idx + params.limit, total_lines)
+        output_lines: list[str] = []
+        size = 0
+        for i in range(start_idx, end_idx):
+            line = lines[i]
+            if output_lines and size + len(line) > PAGE_MAX_CHARS:
+                end_idx = i
+                break
+            output_lines.append(line[:PAGE_MAX_CHARS])
+            size += len(line) + 1
+
+        header = (
+            f"Showing lines {start_idx + 1} to {end_idx} of {total_lines} "
+            f"from {params.handle}"
+        )
+        if end_idx < total_lines:
+            header += f" | next: start_line={end_idx + 1}"
+
+        return ToolResult.success_result(
+            header + "\n\n" + "\n".join(output_lines),
+            metadata={
+                "handle": params.handle,
+                "total_lines": total_lines,
+                "shown_start": start_idx + 1,
+                "shown_end": end_idx,
+            },
+        )
@@ -1,8 +1,11 @@
+import difflib
+from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List
-from tools.base import Tool, ToolKind, ToolInvocation, ToolResult
+from tools.base import FileContent, Tool, ToolKind, ToolInvocation, ToolResult
 from utils.paths import resolve_path, is_binary_file
 from utils.text import count_tokens, truncate_text
+from utils.file_cache import get_file_cache
 from config.config import Config
 
 
@@ -24,12 +27,19 @@ class ReadFileParams(BaseModel):
         description="Maximum number of lines to read from the file. Defaults to None (read entire file).",
     )
 
+    full: bool = Field(
+        False,
+        description="Return the whole file even if it was read before. By default a re-read returns only a diff against the version already seen.",
+    )
+
 
 class ReadFileTool(Tool):
     name = "read_file"
     description = (
         "Read the contents of a text file. Returns the file content with line numbers. "
         "For large files, use offset and limit to read specific portions. "
+        "Re-reading a whole file you have already seen returns a unified diff "
+        "against that version, or a note that it is unchanged. "
         "Cannot read binary files (images, executables, etc.)."
     )
     kind = ToolKind.READ
@@ -66,14 +76,23 @@ class ReadFileTool(Tool):
             )
 
         try:
-            try:
-                content = path.read_text(encoding="utf-8")
-            except UnicodeDecodeError as e:
-                content = path.read_text(encoding="latin-1")
+            content = get_file_cache().read_text(path)
 
             lines = content.splitlines()
             total_lines = len(lines)
 
+            tracker = invocation.file_tracker
+            whole_file = params.offset == 1 and params.limit is None
+            digest = None
+            if tracker is not None and whole_file:
+                digest = tracker.digest(content)
+                previous = tracker.get(path)
+                if previous is not None and not params.full:
+                    reread = self._reread_result(path, content, digest, previous)
+                    if reread is not None:
+                        tracker.remember(path, content, digest)
+                        return reread
+
             if total_lines == 0:
                 return ToolResult.success_result(
                     f"File is empty: {path}", metadata={"lines": 0}
@@ -95,17 +114,22 @@ class ReadFileTool(Tool):
 
             output = "\n".join(formatted_lines)
 
-            token_count = count_tokens(output)
+            model = (invocation.config or Config()).model_name
+            token_count = count_tokens(output, model)
 
             truncated = False
+            shown_lines = selected_lines
             if token_count > self.MAX_OUTPUT_TOKENS:
+                suffix = f"\n...[TRUNCATED {total_lines} LINES]..."
                 output = truncate_text(
                     output,
-                    Config().model_name,
+                    model,
                     self.MAX_OUTPUT_TOKENS,
-                    suffix=f"\n...[TRUNCATED {total_lines} LINES]...",
+                    suffix=suffix,
                 )
                 truncated = True
+                kept = output[: -len(suffix)].count("\n") + 1
+                shown_lines = selected_lines[:kept]
 
             metadata_lines = []
             if start_idx > 0 or end_idx < total_lines:
@@ -117,9 +141,22 @@ class ReadFileTool(Tool):
                 header = " | ".join(metadata_lines) + "\n\n"
                 output = header + output
 
+            if tracker is not None and whole_file:
+                if truncated:
+                    tracker.forget(path)
+                else:
+                    tracker.remember(path, content, digest)
+
             return ToolResult.success_result(
                 output,
                 truncated=truncated,
+                payload=FileContent(
+                    path=str(path),
+                    start_line=start_idx + 1,
+                    lines=shown_lines,
+                    total_lines=total_lines,
+                    truncated=truncated,
+                ),
                 metadata={
                     "path": str(path),
                     "total_lines": total_lines,
@@ -132,3 +169,36 @@ class ReadFileTool(Tool):
                 f"Failed to read file: {path}",
                 str(e),
             )
+
+    def _reread_result(
+        self, path: Path, content: str, digest: str, previous: tuple[str, str]
+    ) -> ToolResult | None:
+        previous_digest, previous_content = previous
+        total_lines = len(content.splitlines())
+        metadata = {"path": str(path), "total_lines": total_lines}
+
+        if previous_digest == digest:
+            return ToolResult.success_result(
+                f"File unchanged since you last read it: {path} ({total_lines} lines). "
+                "Your earlier read_file output is still current; pass full=true to "
+                "read it again.",
+                metadata={**metadata, "unchanged": True},
+            )
+
+        diff = "\n".join(
+            difflib.unified_diff(
+                previous_content.splitlines(),
+                content.splitlines(),
+                fromfile=f"{path} (last read)",
+                tofile=f"{path} (current)",
+                lineterm="",
+            )
+        )
+        if len(diff) >= len(content):
+            return None
+
+        return ToolResult.success_result(
+            f"File changed since you last read it: {path} ({total_lines} lines). "
+            "Unified diff against the version you last saw:\n\n" + diff,
+            metadata={**metadata, "diff": True},
+        )
@@ -0,0 +1,11 @@
+from tools.mcp.client import MCPClient
+from tools.mcp.manager import MCPManager, get_mcp_manager
+from tools.mcp.mcp_tool import MCPTool, mcp_tool_name
+
+__all__ = [
+    "MCPClient",
+    "MCPManager",
+    "MCPTool",
+    "get_mcp_manager",
+    "mcp_tool_name",
+]
@@ -0,0 +1,329 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import os
+from typing import Any
+from config.config import MCPServerConfig
+from utils.errors import MCPError
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = "2024-11-05"
+CLIENT_INFO = {"name": "ai-agent", "version": "0.1.0"}
+
+# stdio messages are newline delimited, a single tools/list or tool result can be large
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+class MCPClient:
+    """JSON-RPC client for a single local MCP server speaking the stdio transport.
+
+    Requests are multiplexed over the one pipe: each request gets its own id and
+    future, and a background reader task resolves them as responses arrive.
+    """
+
+    def __init__(self, name: str, config: MCPServerConfig) -> None:
+        self.name = name
+        self.config = config
+        self.server_info: dict[str, Any] = {}
+        self.capabilities: dict[str, Any] = {}
+        self.catalog_version = 0
+        self.closed = False
+
+        self._process: asyncio.subprocess.Process | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._stderr_task: asyncio.Task | None = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._write_lock = asyncio.Lock()
+        self._start_lock = asyncio.Lock()
+        self._tools_lock = asyncio.Lock()
+        self._tools: list[dict[str, Any]] | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return (
+            self._process is not None
+            and self._process.returncode is None
+            and self._reader_task is not None
+            and not self._reader_task.done()
+        )
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self.closed:
+                raise MCPError("MCP server was shut down", server=self.name)
+            if self.is_running:
+                return
+
+            await self._terminate()
+            env = {**os.environ, **self.config.env}
+            try:
+                self._process = await asyncio.create_subprocess_exec(
+                    self.config.command,
+                    *self.config.args,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=str(self.config.cwd) if self.config.cwd else None,
+                    env=env,
+                    limit=MAX_MESSAGE_BYTES,
+                )
+            except OSError as e:
+                raise MCPError(
+                    f"Failed to launch MCP server: {e}", server=self.name, cause=e
+                ) from e
+
+            self._reader_task = asyncio.create_task(self._read_loop())
+            self._stderr_task = asyncio.create_task(self._drain_stderr())
+
+            try:
+                await self._initialize()
+            except BaseException:
+                await self._terminate()
+                raise
+
+            logger.debug(f"Started MCP server {self.name}: {self.server_info}")
+
+    async def _initialize(self) -> None:
+        result = await self.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": CLIENT_INFO,
+            },
+            timeout=self.config.startup_timeout,
+        )
+        self.server_info = result.get("serverInfo", {})
+        self.capabilities = result.get("capabilities", {})
+        await self.notify("notifications/initialized")
+        self._invalidate_tools()
+
+    async def request(
+        self,
+        method: str,
+        params: dict[str, Any] | None = None,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        if not self.is_running:
+            raise MCPError("MCP server is not running", server=self.name)
+
+        self._next_id += 1
+        request_id = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        message: dict[str, Any] = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            message["params"] = params
+
+        try:
+            await self._send(message)
+            return await asyncio.wait_for(
+                future, timeout=timeout or self.config.request_timeout
+            )
+        except asyncio.TimeoutError as e:
+            await self._cancel_request(request_id, "timeout")
+            raise MCPError(
+                f"MCP request {method} timed out", server=self.name, cause=e
+            ) from e
+        except asyncio.CancelledError:
+            await asyncio.shield(self._cancel_request(request_id, "cancelled"))
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def notify(self, method: str, params: dict[str, Any] | None = None) -> None:
+        message: dict[str, Any] = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+
+    async def _cancel_request(self, request_id: int, reason: str) -> None:
+        if not self.is_running:
+            return
+        try:
+            await self.notify(
+                "notifications/cancelled",
+                {"requestId": request_id, "reason": reason},
+            )
+        except (MCPError, OSError):
+            pass
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        if self._process is None or self._process.stdin is None:
+            raise MCPError("MCP server is not running", server=self.name)
+
+        data = json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+        async with self._write_lock:
+            try:
+                self._process.stdin.write(data)
+                await self._process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as e:
+                raise MCPError(
+                    f"MCP server pipe closed: {e}", server=self.name, cause=e
+                ) from e
+
+    async def _read_loop(self) -> None:
+        assert self._process is not None and self._process.stdout is not None
+        stdout = self._process.stdout
+        error: MCPError | None = None
+
+        try:
+            while True:
+                try:
+                    line = await stdout.readline()
+                except ValueError as e:
+                    error = MCPError(
+                        f"MCP message exceeds {MAX_MESSAGE_BYTES} bytes",
+                        server=self.name,
+                        cause=e,
+                    )
+                    break
+
+                if not line:
+                    break
+
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.debug(f"MCP server {self.name} wrote non JSON: {line!r}")
+                    continue
+
+                if isinstance(message, list):
+                    for item in message:
+                        await self._handle_message(item)
+                else:
+                    await self._handle_message(message)
+        finally:
+            error = error or MCPError("MCP server exited", server=self.name)
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+
+    async def _handle_message(self, message: dict[str, Any]) -> None:
+        if "method" in message:
+            if "id" in message:
+                await self._handle_server_request(message)
+            else:
+                self._handle_notification(message)
+            return
+
+        future = self._pending.get(message.get("id"))
+        if future is None or future.done():
+            return
+
+        if "error" in message:
+            error = message["error"] or {}
+            future.set_exception(
+                MCPError(
+                    error.get("message", "Unknown MCP error"),
+                    server=self.name,
+                    code=error.get("code"),
+                )
+            )
+        else:
+            future.set_result(message.get("result") or {})
+
+    async def _handle_server_request(self, message: dict[str, Any]) -> None:
+        response: dict[str, Any] = {"jsonrpc": "2.0", "id": message["id"]}
+        if message["method"] == "ping":
+            response["result"] = {}
+        else:
+            response["error"] = {
+                "code": -32601,
+                "message": f"Method not found: {message['method']}",
+            }
+        try:
+            await self._send(response)
+        except MCPError:
+            pass
+
+    def _handle_notification(self, message: dict[str, Any]) -> None:
+        if message["method"] == "notifications/tools/list_changed":
+            logger.debug(f"MCP server {self.name} tool list changed")
+            self._invalidate_tools()
+
+    def _invalidate_tools(self) -> None:
+        self._tools = None
+        self.catalog_version += 1
+
+    async def _drain_stderr(self) -> None:
+        assert self._process is not None and self._process.stderr is not None
+        while True:
+            try:
+                line = await self._process.stderr.readline()
+            except ValueError:
+                continue
+            if not line:
+                return
+            logger.debug(f"[mcp:{self.name}] {line.decode(errors='replace').rstrip()}")
+
+    async def list_tools(self) -> list[dict[str, Any]]:
+        async with self._tools_lock:
+            if self._tools is not None:
+                return self._tools
+
+            version = self.catalog_version
+            tools: list[dict[str, Any]] = []
+            cursor: str | None = None
+            while True:
+                result = await self.request(
+                    "tools/list", {"cursor": cursor} if cursor else {}
+                )
+                tools.extend(result.get("tools", []))
+                cursor = result.get("nextCursor")
+                if not cursor:
+                    break
+
+            if version == self.catalog_version:
+                self._tools = tools
+            return tools
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: dict[str, Any],
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        return await self.request(
+            "tools/call",
+            {"name": name, "arguments": arguments},
+            timeout=timeout,
+        )
+
+    async def _terminate(self) -> None:
+        process = self._process
+        self._process = None
+
+        if process is not None and process.returncode is None:
+            if process.stdin is not None:
+                process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+
+        for task in (self._reader_task, self._stderr_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._reader_task = None
+        self._stderr_task = None
+
+    async def close(self) -> None:
+        """Stops the server for good. Later ``start`` calls raise."""
+        self.closed = True
+        async with self._start_lock:
+            await self._terminate()
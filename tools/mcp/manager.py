@@ -0,0 +1,159 @@
+from __future__ import annotations
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from config.config import MCPServerConfig
+from tools.mcp.client import MCPClient
+from tools.mcp.mcp_tool import MCPTool
+from tools.registry import ToolRegistry
+from utils.errors import MCPError
+
+logger = logging.getLogger(__name__)
+
+RESTART_BACKOFF_SECONDS = 30.0
+
+
+def _server_key(name: str, config: MCPServerConfig) -> tuple[str, str]:
+    return name, config.model_dump_json()
+
+
+class MCPManager:
+    """Process wide pool of MCP server connections.
+
+    Servers are started on first use and stay alive across turns and sessions;
+    registries are synced against each server's cached tool catalog. Each
+    registry declares the servers it uses, and a server is pooled by name and
+    config, so sessions with different configs never share or stop each
+    other's servers. A server no registry uses any more is closed.
+    """
+
+    def __init__(self) -> None:
+        self._wanted: weakref.WeakKeyDictionary[
+            ToolRegistry, dict[str, MCPServerConfig]
+        ] = weakref.WeakKeyDictionary()
+        self._clients: dict[tuple[str, str], MCPClient] = {}
+        self._failed_at: dict[tuple[str, str], float] = {}
+        self._synced: weakref.WeakKeyDictionary[
+            ToolRegistry, dict[str, tuple[MCPClient, int]]
+        ] = weakref.WeakKeyDictionary()
+        # configure() may run on a worker thread while an agent is built.
+        self._lock = threading.Lock()
+
+    def servers(self, registry: ToolRegistry) -> dict[str, MCPServerConfig]:
+        with self._lock:
+            wanted = dict(self._wanted.get(registry, {}))
+        return {name: cfg for name, cfg in wanted.items() if cfg.enabled}
+
+    def configure(
+        self, registry: ToolRegistry, servers: dict[str, MCPServerConfig]
+    ) -> None:
+        """Sets the servers ``registry`` uses. Tools of replaced or removed
+        servers are unregistered on its next ``sync_tools``."""
+        with self._lock:
+            self._wanted[registry] = dict(servers)
+
+    def _take_unused(self) -> list[MCPClient]:
+        with self._lock:
+            wanted = {
+                _server_key(name, cfg)
+                for servers in self._wanted.values()
+                for name, cfg in servers.items()
+                if cfg.enabled
+            }
+            unused = [key for key in self._clients if key not in wanted]
+            for key in unused:
+                self._failed_at.pop(key, None)
+            return [self._clients.pop(key) for key in unused]
+
+    async def get_client(self, name: str, config: MCPServerConfig) -> MCPClient:
+        if not config.enabled:
+            raise MCPError("MCP server is disabled", server=name)
+
+        key = _server_key(name, config)
+        client = self._clients.get(key)
+        if client is None:
+            client = MCPClient(name, config)
+            self._clients[key] = client
+
+        await client.start()
+        return client
+
+    async def _load_catalog(
+        self, name: str, config: MCPServerConfig
+    ) -> tuple[MCPClient, list[dict]] | None:
+        key = _server_key(name, config)
+        failed_at = self._failed_at.get(key)
+        if failed_at and time.monotonic() - failed_at < RESTART_BACKOFF_SECONDS:
+            return None
+
+        try:
+            client = await self.get_client(name, config)
+            tools = await client.list_tools()
+        except MCPError as e:
+            logger.warning(f"MCP server {name} unavailable: {e}")
+            self._failed_at[key] = time.monotonic()
+            return None
+
+        self._failed_at.pop(key, None)
+        return client, tools
+
+    def _unregister(self, registry: ToolRegistry, name: str) -> None:
+        for tool in registry.get_tools():
+            if isinstance(tool, MCPTool) and tool.client.name == name:
+                registry.unregister(tool.name)
+
+    async def sync_tools(self, registry: ToolRegistry) -> None:
+        unused = self._take_unused()
+        if unused:
+            await asyncio.gather(*(c.close() for c in unused), return_exceptions=True)
+
+        servers = self.servers(registry)
+        synced = self._synced.setdefault(registry, {})
+        catalogs = await asyncio.gather(
+            *(self._load_catalog(name, cfg) for name, cfg in servers.items())
+        )
+
+        # Tools bound to a replaced, removed or unreachable client go first.
+        current = {
+            name: catalog[0]
+            for name, catalog in zip(servers, catalogs)
+            if catalog is not None
+        }
+        for name, (client, _) in list(synced.items()):
+            if current.get(name) is not client:
+                self._unregister(registry, name)
+                del synced[name]
+
+        for name, catalog in zip(servers, catalogs):
+            if catalog is None:
+                continue
+
+            client, tools = catalog
+            if synced.get(name) == (client, client.catalog_version):
+                continue
+
+            self._unregister(registry, name)
+            for definition in sorted(tools, key=lambda t: t.get("name", "")):
+                if definition.get("name"):
+                    registry.register(MCPTool(client, definition))
+
+            synced[name] = (client, client.catalog_version)
+
+    async def close(self) -> None:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        self._synced = weakref.WeakKeyDictionary()
+        await asyncio.gather(*(c.close() for c in clients), return_exceptions=True)
+
+
+_manager: MCPManager | None = None
+
+
+def get_mcp_manager() -> MCPManager:
+    global _manager
+    if _manager is None:
+        _manager = MCPManager()
+    return _manager
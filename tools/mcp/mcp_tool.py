@@ -0,0 +1,67 @@
+from __future__ import annotations
+import re
+from typing import Any
+from tools.base import Tool, ToolKind, ToolInvocation, ToolResult
+from tools.mcp.client import MCPClient
+from utils.errors import MCPError
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_-]")
+MAX_TOOL_NAME_LENGTH = 64
+
+
+def mcp_tool_name(server: str, tool: str) -> str:
+    name = _INVALID_NAME_CHARS.sub("_", f"{server}__{tool}")
+    return name[:MAX_TOOL_NAME_LENGTH]
+
+
+def _format_content(content: list[dict[str, Any]]) -> str:
+    parts: list[str] = []
+    for item in content:
+        item_type = item.get("type")
+        if item_type == "text":
+            parts.append(item.get("text", ""))
+        elif item_type == "resource":
+            resource = item.get("resource", {})
+            parts.append(resource.get("text") or f"[resource: {resource.get('uri')}]")
+        elif item_type in ("image", "audio"):
+            parts.append(f"[{item_type}: {item.get('mimeType', 'unknown')}]")
+        else:
+            parts.append(f"[{item_type} content]")
+    return "\n".join(parts)
+
+
+class MCPTool(Tool):
+    kind = ToolKind.MCP
+
+    def __init__(self, client: MCPClient, definition: dict[str, Any]) -> None:
+        super().__init__()
+        self.client = client
+        self.remote_name: str = definition["name"]
+        self.name = mcp_tool_name(client.name, self.remote_name)
+        self.description = (
+            definition.get("description")
+            or f"Tool {self.remote_name} provided by MCP server {client.name}"
+        )
+        self._input_schema = definition.get("inputSchema") or {
+            "type": "object",
+            "properties": {},
+        }
+
+    @property
+    def schema(self) -> dict[str, Any]:
+        return {"parameters": self._input_schema}
+
+    async def execute(self, invocation: ToolInvocation) -> ToolResult:
+        metadata = {"server": self.client.name, "tool": self.remote_name}
+        try:
+            await self.client.start()
+            result = await self.client.call_tool(self.remote_name, invocation.params)
+        except MCPError as e:
+            return ToolResult.error_result(str(e), metadata=metadata)
+
+        output = _format_content(result.get("content", []))
+        if result.get("isError"):
+            return ToolResult.error_result(
+                f"MCP tool {self.remote_name} failed", output, metadata=metadata
+            )
+        return ToolResult.success_result(output, metadata=metadata)
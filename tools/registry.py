@@ -1,9 +1,13 @@
+import asyncio
 import logging
 from tools.base import Tool
 from typing import List, Any
 from pathlib import Path
 from tools.base import Tool, ToolResult, ToolInvocation
+from config.config import Config
+from context.file_tracker import FileTracker
 from tools.builtin import get_all_builtin_tools, ReadFileTool
+from utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +15,7 @@ logger = logging.getLogger(__name__)
 class ToolRegistry:
     def __init__(self):
         self._tools: dict[str, Tool] = {}
+        self._schemas: List[dict[str, Any]] | None = None
 
     def register(self, tool: Tool) -> None:
         if tool.name in self._tools:
@@ -19,11 +24,13 @@ class ToolRegistry:
             )
 
         self._tools[tool.name] = tool
+        self._schemas = None
         logger.debug(f"Registered tool: {tool.name}")
 
     def unregister(self, name: str) -> bool:
-        if name not in self._tools:
+        if name in self._tools:
             del self._tools[name]
+            self._schemas = None
             logger.debug(f"Unregistered tool: {name}")
             return True
         return False
@@ -41,9 +48,24 @@ class ToolRegistry:
         return tools
 
     def get_schemas(self) -> List[dict[str, Any]]:
-        return [tool.to_openai_schema() for tool in self.get_tools()]
-
-    async def invoke(self, name: str, params: dict[str, Any], cwd: Path) -> ToolResult:
+        # Sorted and built once so the tool block is byte-identical across
+        # turns, whatever order tools were registered in.
+        if self._schemas is None:
+            self._schemas = [
+                tool.to_openai_schema()
+                for tool in sorted(self._tools.values(), key=lambda t: t.name)
+            ]
+        return self._schemas
+
+    async def invoke(
+        self,
+        name: str,
+        params: dict[str, Any],
+        cwd: Path,
+        timeout: float | None = None,
+        file_tracker: FileTracker | None = None,
+        config: Config | None = None,
+    ) -> ToolResult:
         tool = self.get(name)
         if tool is None:
             return ToolResult.error_result(
@@ -57,16 +79,28 @@ class ToolRegistry:
                 metadata={"tool_name": name, "validation_errors": validation_errors},
             )
 
-        invocation = ToolInvocation(params=params, cwd=cwd)
-        try:
-            result = await tool.execute(invocation=invocation)
+        invocation = ToolInvocation(
+            params=params, cwd=cwd, file_tracker=file_tracker, config=config
+        )
+        with get_tracer().span("tool.invoke", tool=name) as span:
+            try:
+                result = await asyncio.wait_for(
+                    tool.execute(invocation=invocation), timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Tool {name} timed out after {timeout}s")
+                result = ToolResult.error_result(
+                    f"Tool timed out after {timeout:g}s",
+                    metadata={"tool_name": name, "timeout": timeout},
+                )
+            except Exception as e:
+                logger.error(f"Tool {name} execution failed: {str(e)}")
+                result = ToolResult.error_result(
+                    f"Internal error: {str(e)}",
+                    metadata={"tool_name": name, "error": str(e)},
+                )
+            span.set(success=result.success, output_chars=len(result.output or ""))
             return result
-        except Exception as e:
-            logger.error(f"Tool {name} execution failed: {str(e)}")
-            return ToolResult.error_result(
-                f"Internal error: {str(e)}",
-                metadata={"tool_name": name, "error": str(e)},
-            )
 
 
 def create_default_registry() -> ToolRegistry:
@@ -0,0 +1,53 @@
+from __future__ import annotations
+import dataclasses
+import json
+import sys
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Any, TextIO
+from agent.events import AgentEvent
+
+
+def _json_default(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, Path):
+        return str(value)
+    return str(value)
+
+
+_encoder = json.JSONEncoder(
+    default=_json_default, ensure_ascii=False, separators=(",", ":")
+)
+
+
+def encode_record(record: dict[str, Any]) -> str:
+    return _encoder.encode(record) + "\n"
+
+
+def make_record(type: str, data: dict[str, Any]) -> dict[str, Any]:
+    return {"type": type, "ts": time.time(), "data": data}
+
+
+def event_record(event: AgentEvent) -> dict[str, Any]:
+    return make_record(event.type.value, event.data)
+
+
+class NDJSONWriter:
+    """Writes each AgentEvent as one JSON object per line, without Rich."""
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self._stream = stream or sys.stdout
+
+    def write_record(self, record: dict[str, Any]) -> None:
+        self._stream.write(encode_record(record))
+        self._stream.flush()
+
+    def write_event(self, event: AgentEvent) -> None:
+        self.write_record(event_record(event))
+
+    def write_error(self, error: str) -> None:
+        self.write_record(make_record("error", {"error": error}))
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import time
+from typing import TYPE_CHECKING
+from rich.console import Console
+from rich.live import Live
+from rich.text import Text
+from utils.tracing import get_tracer
+
+if TYPE_CHECKING:
+    from rich.markdown import Markdown
+
+
+class AssistantStreamRenderer:
+    """Coalesces streamed text deltas and renders them at a capped frame rate.
+
+    Deltas are buffered until ``flush_interval`` seconds pass or ``flush_bytes``
+    accumulate. On a terminal, completed lines (or completed Markdown blocks)
+    are committed to the scrollback and only the unfinished tail is kept in a
+    live region, so each frame redraws a few lines rather than the whole reply.
+    """
+
+    def __init__(
+        self,
+        console: Console,
+        flush_interval: float = 0.05,
+        flush_bytes: int = 2048,
+        max_fps: int = 20,
+        markdown: bool = False,
+    ) -> None:
+        self.console = console
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.max_fps = max_fps
+        self.markdown = markdown
+
+        self._pending: list[str] = []
+        self._pending_bytes = 0
+        self._last_flush = 0.0
+        self._tail = ""
+        self._live: Live | None = None
+
+    def start(self) -> None:
+        self._last_flush = time.monotonic()
+        if self.console.is_terminal:
+            self._live = Live(
+                Text(""),
+                console=self.console,
+                refresh_per_second=self.max_fps,
+                transient=True,
+            )
+            self._live.start()
+
+    def feed(self, content: str) -> None:
+        if not content:
+            return
+        self._pending.append(content)
+        self._pending_bytes += len(content)
+
+        if (
+            self._pending_bytes >= self.flush_bytes
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+
+        with get_tracer().span("render.flush", chars=len(text)):
+            if self._live is None:
+                self.console.print(text, end="", markup=False, highlight=False)
+                self._tail = text[-1:]
+                return
+
+            self._tail += text
+            committed = self._take_committed()
+            if committed:
+                self._print_block(committed)
+            self._live.update(self._render_tail(), refresh=False)
+
+    def finish(self) -> None:
+        self.flush()
+        if self._live is not None:
+            self._live.stop()
+            self._live = None
+            if self._tail:
+                self._print_block(self._tail)
+        elif self._tail and self._tail != "\n":
+            self.console.print()
+        self._tail = ""
+
+    def _take_committed(self) -> str:
+        if not self.markdown:
+            idx = self._tail.rfind("\n")
+            if idx < 0:
+                return ""
+            committed, self._tail = self._tail[: idx + 1], self._tail[idx + 1 :]
+            return committed
+
+        boundary = -1
+        in_fence = False
+        pos = 0
+        for line in self._tail.splitlines(keepends=True):
+            pos += len(line)
+            if not line.endswith("\n"):
+                break
+            if line.lstrip().startswith("```"):
+                in_fence = not in_fence
+                if not in_fence:
+                    boundary = pos
+            elif not in_fence and not line.strip():
+                boundary = pos
+
+        if boundary < 0:
+            return ""
+
+        committed, self._tail = self._tail[:boundary], self._tail[boundary:]
+        return committed
+
+    def _render_tail(self) -> Text | Markdown:
+        if self.markdown:
+            from rich.markdown import Markdown
+
+            return Markdown(self._tail)
+        return Text(self._tail)
+
+    def _print_block(self, text: str) -> None:
+        if self.markdown:
+            from rich.markdown import Markdown
+
+            self.console.print(Markdown(text))
+        else:
+            self.console.print(
+                text[:-1] if text.endswith("\n") else text,
+                markup=False,
+                highlight=False,
+            )
@@ -4,16 +4,20 @@ from rich.rule import Rule
 from rich.text import Text
 from rich.panel import Panel
 from rich.table import Table
-from typing import Any, Tuple
+from typing import TYPE_CHECKING, Any, Tuple
 from pathlib import Path
 from utils.paths import display_path_rel_to_cwd
 from rich import box
-from rich.syntax import Syntax
-from utils.text import truncate_text
 from rich.console import Group
 from config.config import Config
+from tools.base import FileContent
+from ui.stream_renderer import AssistantStreamRenderer
+from utils.tracing import get_tracer
 import re
 
+if TYPE_CHECKING:
+    from rich.syntax import Syntax
+
 AGENT_THEME = Theme(
     {
         # General
@@ -57,21 +61,37 @@ class TUI:
         self.config = config
         self.console = console or get_console()
         self._assitant_stream_open = False
+        self._stream_renderer: AssistantStreamRenderer | None = None
         self._tool_args_by_call_id: dict[str, dict[str, Any]] = {}
         self.cwd = self.config.cwd
 
     def begin_assistant(self) -> None:
         self.console.print()
         self.console.print(Rule(Text("Assistant", style="assistant")))
+        ui = self.config.ui
+        self._stream_renderer = AssistantStreamRenderer(
+            self.console,
+            flush_interval=ui.stream_flush_interval,
+            flush_bytes=ui.stream_flush_bytes,
+            max_fps=ui.max_fps,
+            markdown=ui.markdown,
+        )
+        self._stream_renderer.start()
         self._assitant_stream_open = True
 
     def end_assistant(self) -> None:
-        if self._assitant_stream_open:
+        if self._stream_renderer is not None:
+            self._stream_renderer.finish()
+            self._stream_renderer = None
+        elif self._assitant_stream_open:
             self.console.print()
         self._assitant_stream_open = False
 
     def stream_assistant_delta(self, content: str) -> None:
-        self.console.print(content, end="", markup=False)
+        if self._stream_renderer is None:
+            self.console.print(content, end="", markup=False)
+            return
+        self._stream_renderer.feed(content)
 
     def _ordered_args(
         self, tool_name: str, args: dict[str, Any]
@@ -134,16 +154,19 @@ class TUI:
             title_align="left",
             subtitle_align="right",
         )
-        self.console.print()
-        self.console.print(panel)
+        with get_tracer().span("render.tool_call", tool=name):
+            self.console.print()
+            self.console.print(panel)
 
     def _extract_read_file_code(self, text: str) -> Tuple[int, str] | None:
         """
         Extracts the line range and code from a read_file tool call output.
-        Showing lines x -y of z\n\n1 def main()
+        Showing lines x to y of z\n\n1 def main()
+
+        Only used when the tool result carries no structured payload.
         """
         body = text
-        header_match = re.match(r"^Showing lines (\d+)-(\d+) of (\d+)\n\n", text)
+        header_match = re.match(r"^Showing lines (\d+) to (\d+) of (\d+)\n\n", text)
         if header_match:
             body = text[header_match.end() :]
 
@@ -153,6 +176,8 @@ class TUI:
         for line in body.splitlines():
             line_match = re.match(r"^\s*(\d+)\|(.*)$", line)
             if not line_match:
+                if line.startswith("...[TRUNCATED"):
+                    break
                 return None
 
             line_no = int(line_match.group(1))
@@ -211,6 +236,110 @@ class TUI:
             )
         )
 
+    def print_stats(self, stats: dict[str, Any]) -> None:
+        def seconds(dist: dict[str, float] | None) -> str:
+            if not dist:
+                return "-"
+            return f"p50 {dist['p50']:.2f}s  p95 {dist['p95']:.2f}s"
+
+        table = Table(box=box.SIMPLE, show_header=False, pad_edge=False)
+        table.add_column(style="muted", justify="right", no_wrap=True)
+        table.add_column(style="code")
+        table.add_row("LLM calls", str(stats["turns"]))
+        if stats.get("context_tokens") is not None:
+            table.add_row("context tokens", str(stats["context_tokens"]))
+        table.add_row(
+            "prompt tokens",
+            f"{stats['prompt_tokens']} ({stats['cached_tokens']} cached, "
+            f"{stats['cache_hit_ratio']:.0%})",
+        )
+        table.add_row("completion tokens", str(stats["completion_tokens"]))
+        table.add_row("time to first token", seconds(stats["ttft"]))
+        tps = stats["tokens_per_second"]
+        table.add_row(
+            "output tokens/s",
+            f"p50 {tps['p50']:.1f}  p95 {tps['p95']:.1f}" if tps else "-",
+        )
+        table.add_row(
+            "retries",
+            f"{stats['retries']} ({stats['rate_limit_wait']:.1f}s rate-limit wait)",
+        )
+        if stats["cost"] is not None:
+            table.add_row("cost", f"${stats['cost']:.4f}")
+        for name, tool in stats["tools"].items():
+            errors = f", {tool['errors']} failed" if tool["errors"] else ""
+            table.add_row(
+                f"{name} ({tool['kind']})",
+                f"{tool['calls']} calls{errors}  {seconds(tool)}  "
+                f"max {tool['max']:.2f}s",
+            )
+
+        self.console.print(
+            Panel(
+                table,
+                title=Text("Session stats", style="highlight"),
+                title_align="left",
+                border_style="border",
+                box=box.ROUNDED,
+            )
+        )
+
+    def _preview_lines(self) -> int:
+        configured = self.config.ui.tool_preview_lines
+        if configured:
+            return configured
+        return max(10, self.console.height - 12)
+
+    def _render_code(
+        self, lines: list[str], start_line: int, path: str | None
+    ) -> "Syntax | Text":
+        code = "\n".join(lines)
+        if len(code) > self.config.ui.highlight_max_bytes:
+            gutter = len(str(start_line + len(lines)))
+            return Text(
+                "\n".join(
+                    f"{i:>{gutter}} {line}"
+                    for i, line in enumerate(lines, start=start_line)
+                ),
+                style="code",
+                no_wrap=True,
+            )
+        from rich.syntax import Syntax
+
+        return Syntax(
+            code,
+            self._guess_language(path=path),
+            theme="monokai",
+            line_numbers=True,
+            start_line=start_line,
+            word_wrap=False,
+        )
+
+    def _render_file_content(self, payload: FileContent) -> list[Any]:
+        limit = self._preview_lines()
+        lines = payload.lines[:limit]
+        end_line = payload.start_line + len(payload.lines) - 1
+
+        header = (
+            f"{display_path_rel_to_cwd(payload.path, self.cwd)} • "
+            f"lines {payload.start_line}-{end_line} of {payload.total_lines}"
+        )
+        blocks: list[Any] = [Text(header, style="muted")]
+        blocks.append(self._render_code(lines, payload.start_line, payload.path))
+
+        hidden = len(payload.lines) - len(lines)
+        if hidden > 0:
+            blocks.append(Text(f"… {hidden} more lines", style="muted"))
+        return blocks
+
+    def _render_text_output(self, output: str) -> list[Any]:
+        limit = self._preview_lines()
+        lines = output.splitlines()
+        blocks: list[Any] = [Text("\n".join(lines[:limit]), style="code")]
+        if len(lines) > limit:
+            blocks.append(Text(f"… {len(lines) - limit} more lines", style="muted"))
+        return blocks
+
     def tool_call_complete(
         self,
         call_id: str,
@@ -221,6 +350,7 @@ class TUI:
         error: str | None,
         metadata: dict[str, Any] | None,
         truncated: bool,
+        payload: FileContent | None = None,
     ) -> None:
         border_style = f"tool.{tool_kind}" if tool_kind else "tool"
         status_icon = "✓" if success else "✗"
@@ -238,48 +368,30 @@ class TUI:
         if isinstance(metadata, dict) and isinstance(metadata.get("path"), str):
             primary_path = metadata["path"]
 
-        if name == "read_file" and success:
-            if primary_path:
-                extracted = self._extract_read_file_code(output)
-                if extracted:
-                    start_line, code = extracted
-                shown_start = None
-                shown_end = None
-                total_lines = None
-
-                shown_start = metadata.get("shown_start")
-                shown_end = metadata.get("shown_end")
-                total_lines = metadata.get("total_lines")
-                programming_language = self._guess_language(path=primary_path)
-
-                header_parts = [display_path_rel_to_cwd(primary_path, self.cwd)]
-                header_parts.append(" • ")
-
-                if shown_start and shown_end and total_lines:
-                    header_parts.append(
-                        f"lines {shown_start}-{shown_end} of {total_lines}"
-                    )
-
-                header = "".join(header_parts)
-                blocks.append(Text(header, style="muted"))
-                blocks.append(
-                    Syntax(
-                        code,
-                        programming_language,
-                        theme="monokai",
-                        line_numbers=True,
-                        start_line=start_line,
-                        word_wrap=False,
+        if not success:
+            blocks.append(Text(error or "Unknown error", style="error"))
+            if output:
+                blocks.extend(self._render_text_output(output))
+        elif payload is not None:
+            blocks.extend(self._render_file_content(payload))
+        elif name == "read_file" and primary_path:
+            extracted = self._extract_read_file_code(output)
+            if extracted:
+                start_line, code = extracted
+                blocks.extend(
+                    self._render_file_content(
+                        FileContent(
+                            path=primary_path,
+                            start_line=start_line,
+                            lines=code.split("\n"),
+                            total_lines=metadata.get("total_lines") or 0,
+                        )
                     )
                 )
             else:
-                output_display = truncate_text(output, "", 240)
-                blocks.append(
-                    output_display,
-                    "text",
-                    theme="monokai",
-                    word_wrap=False,
-                )
+                blocks.extend(self._render_text_output(output))
+        elif output:
+            blocks.extend(self._render_text_output(output))
 
         if truncated:
             blocks.append(Text("note: tool output was truncated", style="warning"))
@@ -296,5 +408,6 @@ class TUI:
             title_align="left",
             subtitle_align="right",
         )
-        self.console.print()
-        self.console.print(panel)
+        with get_tracer().span("render.tool_result", tool=name):
+            self.console.print()
+            self.console.print(panel)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from config.config import Config
+from config.loader import get_data_dir
+
+logger = logging.getLogger(__name__)
+
+HANDLE_PREFIX = "blob:"
+HANDLE_DIGEST_CHARS = 24
+
+
+class BlobStore:
+    """Content-addressed text blobs on disk.
+
+    A blob's handle is derived from the SHA-256 of its content, so storing the
+    same output twice writes it once. Blobs are written atomically and are
+    immutable, which makes them safe to share between sessions and processes.
+
+    Reads and repeated writes refresh a blob's mtime. ``sweep`` deletes blobs
+    unused for ``max_age_days``, then the least recently used ones until the
+    store fits in ``max_bytes``. It runs in the background when the store is
+    opened and again after each tenth of ``max_bytes`` written.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int | None = None,
+        max_age_days: float | None = None,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self._written = 0
+        self._sweep_lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / digest[2:]
+
+    @staticmethod
+    def handle_for(text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return HANDLE_PREFIX + digest[:HANDLE_DIGEST_CHARS]
+
+    def _digest(self, handle: str) -> str:
+        digest = handle.removeprefix(HANDLE_PREFIX)
+        if len(digest) != HANDLE_DIGEST_CHARS or not all(
+            c in "0123456789abcdef" for c in digest
+        ):
+            raise KeyError(f"Invalid blob handle: {handle}")
+        return digest
+
+    def put(self, text: str) -> str:
+        handle = self.handle_for(text)
+        path = self._path(self._digest(handle))
+        if path.is_file():
+            self._touch(path)
+            return handle
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._written += len(text)
+        if self.max_bytes and self._written >= self.max_bytes // 10:
+            self._written = 0
+            self.sweep_in_background()
+        return handle
+
+    def get(self, handle: str) -> str:
+        path = self._path(self._digest(handle))
+        try:
+            text = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            raise KeyError(f"Unknown blob handle: {handle}") from None
+        self._touch(path)
+        return text
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def __contains__(self, handle: str) -> bool:
+        try:
+            return self._path(self._digest(handle)).is_file()
+        except KeyError:
+            return False
+
+    def sweep(self) -> int:
+        """Evicts expired blobs, then the oldest ones over the size cap."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            blobs: list[tuple[float, int, Path]] = []
+            for path in self.directory.glob("*/*"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+            blobs.sort()
+
+            removed = 0
+            total = sum(size for _, size, _ in blobs)
+            cutoff = (
+                time.time() - self.max_age_days * 86400 if self.max_age_days else None
+            )
+            for mtime, size, path in blobs:
+                expired = cutoff is not None and mtime < cutoff
+                if not expired and (not self.max_bytes or total <= self.max_bytes):
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+        finally:
+            self._sweep_lock.release()
+
+    def sweep_in_background(self) -> None:
+        def sweep() -> None:
+            try:
+                self.sweep()
+            except OSError as e:
+                logger.warning(f"Failed to evict old blobs: {e}")
+
+        threading.Thread(target=sweep, daemon=True).start()
+
+
+_stores: dict[Path, BlobStore] = {}
+
+
+def get_blob_store(config: Config) -> BlobStore:
+    tools = config.tools
+    directory = tools.blob_directory or get_data_dir() / "blobs"
+    max_bytes = tools.blob_max_mb * 1024 * 1024 if tools.blob_max_mb else None
+    store = _stores.get(directory)
+    if store is None:
+        store = BlobStore(directory, max_bytes, tools.blob_max_age_days)
+        _stores[directory] = store
+        store.sweep_in_background()
+    else:
+        store.max_bytes = max_bytes
+        store.max_age_days = tools.blob_max_age_days
+    return store
@@ -47,3 +47,21 @@ class ConfigError(AgentError):
         super().__init__(message, details=details, **kwargs)
         self.config_key = config_key
         self.config_file = config_file
+
+
+class MCPError(AgentError):
+    def __init__(
+        self,
+        message: str,
+        server: str | None = None,
+        code: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        details = kwargs.pop("details", {}) or {}
+        if server:
+            details["server"] = server
+        if code is not None:
+            details["code"] = code
+        super().__init__(message, details=details, **kwargs)
+        self.server = server
+        self.code = code
@@ -0,0 +1,73 @@
+from __future__ import annotations
+from collections import OrderedDict
+from pathlib import Path
+import threading
+
+
+class FileCache:
+    """Decoded text of recently read files, validated by mtime and size.
+
+    Shared by every agent in the process so parallel sessions reading the same
+    files only hit the disk and decode once.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Path, tuple[int, int, str]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def read_text(self, path: Path) -> str:
+        stat = path.stat()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[2]
+
+        try:
+            text = path.read_text(encoding="utf-8")
+        except UnicodeDecodeError:
+            text = path.read_text(encoding="latin-1")
+
+        with self._lock:
+            self.misses += 1
+            self._store(path, (stat.st_mtime_ns, stat.st_size, text))
+        return text
+
+    def _store(self, path: Path, entry: tuple[int, int, str]) -> None:
+        old = self._entries.pop(path, None)
+        if old is not None:
+            self._size -= old[1]
+
+        if entry[1] > self.max_bytes // 4:
+            return
+
+        self._entries[path] = entry
+        self._size += entry[1]
+        while self._size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted[1]
+
+    def invalidate(self, path: Path | None = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._size = 0
+                return
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._size -= old[1]
+
+
+_file_cache: FileCache | None = None
+
+
+def get_file_cache() -> FileCache:
+    global _file_cache
+    if _file_cache is None:
+        _file_cache = FileCache()
+    return _file_cache
@@ -0,0 +1,92 @@
+from __future__ import annotations
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+_IMPORTED_AT = time.perf_counter()
+
+
+class StartupProfiler:
+    """Records the phases between process start and the first LLM request.
+
+    The report mimics ``python -X importtime``: self and cumulative time per
+    phase in microseconds, with nested phases indented under their parent.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.origin = _IMPORTED_AT
+        self.output: TextIO = sys.stderr
+        self._phases: list[tuple[str, float, float, int]] = []
+        self._depth = 0
+        self._first_request_at: float | None = None
+
+    def enable(self, output: TextIO | None = None) -> None:
+        self.enabled = True
+        if output is not None:
+            self.output = output
+
+    def record(self, name: str, start: float, end: float) -> None:
+        if self.enabled:
+            self._phases.append((name, start, end, self._depth))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.record(name, start, time.perf_counter())
+
+    @property
+    def time_to_first_request(self) -> float | None:
+        if self._first_request_at is None:
+            return None
+        return self._first_request_at - self.origin
+
+    def first_request(self) -> None:
+        if not self.enabled or self._first_request_at is not None:
+            return
+        self._first_request_at = time.perf_counter()
+        print(self.report(), file=self.output, flush=True)
+
+    def report(self) -> str:
+        lines = ["startup: self [us] | cumulative | phase"]
+        phases = sorted(self._phases, key=lambda p: (p[1], p[3]))
+
+        for name, start, end, depth in phases:
+            cumulative = end - start
+            children = sum(
+                c_end - c_start
+                for _, c_start, c_end, c_depth in phases
+                if c_depth == depth + 1 and c_start >= start and c_end <= end
+            )
+            self_time = cumulative - children
+            lines.append(
+                f"startup: {self_time * 1e6:>9.0f} | {cumulative * 1e6:>10.0f} | "
+                f"{'  ' * depth}{name}"
+            )
+
+        if self._first_request_at is not None:
+            lines.append(
+                f"startup: time to first request: "
+                f"{(self._first_request_at - self.origin) * 1000:.1f} ms"
+            )
+        return "\n".join(lines)
+
+
+_profiler: StartupProfiler | None = None
+
+
+def get_startup_profiler() -> StartupProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler()
+    return _profiler
@@ -1,13 +1,61 @@
-import tiktoken
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+import logging
+import os
+import threading
+from utils.tracing import get_tracer
 
+logger = logging.getLogger(__name__)
 
+_tokenizer_lock = threading.Lock()
+_count_executor: ThreadPoolExecutor | None = None
+
+
+@lru_cache(maxsize=None)
 def get_tokenizer(model: str):
+    with _tokenizer_lock:
+        return _load_tokenizer(model)
+
+
+def _load_tokenizer(model: str):
+    """The tiktoken encoder for ``model``, or None to count by estimate.
+
+    ``AI_AGENT_TOKENIZER=estimate`` skips tiktoken entirely. When its encoding
+    files cannot be fetched (offline, nothing cached), counts fall back to
+    estimates instead of retrying the download on every call.
+    """
+    if os.environ.get("AI_AGENT_TOKENIZER") == "estimate":
+        return None
+
+    import tiktoken
+
     try:
         encoding = tiktoken.encoding_for_model(model)
         return encoding.encode
     except Exception:
-        encoding = tiktoken.get_encoding("cl100k_base")
-        return encoding.encode
+        pass
+    try:
+        return tiktoken.get_encoding("cl100k_base").encode
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating token counts: {e}")
+        return None
+
+
+def warm_tokenizer(model: str) -> threading.Thread:
+    """Load the tokenizer for ``model`` in a background thread.
+
+    Failures leave counts to fall back to estimates.
+    """
+
+    def warm() -> None:
+        try:
+            get_tokenizer(model)
+        except Exception:
+            pass
+
+    thread = threading.Thread(target=warm, daemon=True)
+    thread.start()
+    return thread
 
 
 def count_tokens(text: str, model: str = "gpt-4") -> int:
@@ -19,6 +67,20 @@ def count_tokens(text: str, model: str = "gpt-4") -> int:
     return estimate_tokens(text)
 
 
+def count_tokens_in_background(fn, *args) -> Future:
+    """Runs a token-counting callable on a shared worker thread.
+
+    tiktoken releases the GIL while encoding, so large texts are counted
+    without stalling the event loop.
+    """
+    global _count_executor
+    if _count_executor is None:
+        _count_executor = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="count-tokens"
+        )
+    return _count_executor.submit(fn, *args)
+
+
 def estimate_tokens(text: str) -> int:
     return max(1, len(text) // 4)
 
@@ -30,20 +92,21 @@ def truncate_text(
     suffix: str = "\n... [truncated]",
     preserve_lines: bool = True,
 ):
-    current_tokens = count_tokens(text, model)
-    if current_tokens <= max_tokens:
-        return text
+    with get_tracer().span("text.truncate", chars=len(text), max_tokens=max_tokens):
+        current_tokens = count_tokens(text, model)
+        if current_tokens <= max_tokens:
+            return text
 
-    suffix_tokens = count_tokens(suffix, model)
-    target_tokens = max_tokens - suffix_tokens
+        suffix_tokens = count_tokens(suffix, model)
+        target_tokens = max_tokens - suffix_tokens
 
-    if target_tokens <= 0:
-        return suffix.strip()
+        if target_tokens <= 0:
+            return suffix.strip()
 
-    if preserve_lines:
-        return _truncate_by_lines(text, target_tokens, suffix, model)
-    else:
-        return _truncate_by_chars(text, target_tokens, suffix, model)
+        if preserve_lines:
+            return _truncate_by_lines(text, target_tokens, suffix, model)
+        else:
+            return _truncate_by_chars(text, target_tokens, suffix, model)
 
 
 def _truncate_by_lines(text: str, target_tokens: int, suffix: str, model: str) -> str:
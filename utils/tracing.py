@@ -0,0 +1,174 @@
+from __future__ import annotations
+import asyncio
+import atexit
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Any
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullSpan:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> bool:
+        return False
+
+    def set(self, **args: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer: Tracer, name: str, args: dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> Span:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._complete(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+    def set(self, **args: Any) -> None:
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects timed spans and instant events in Chrome trace format.
+
+    Each asyncio task (or thread, outside an event loop) gets its own track,
+    so concurrent sessions and tool calls do not interleave on one timeline.
+    While disabled, ``span`` returns a shared no-op object and ``instant``
+    returns immediately.
+    """
+
+    def __init__(self, max_events: int = 1_000_000) -> None:
+        self.enabled = False
+        self.path: Path | None = None
+        self.max_events = max_events
+        self.dropped = 0
+        self.origin = time.perf_counter()
+        self._events: list[dict[str, Any]] = []
+        self._tracks: weakref.WeakKeyDictionary[Any, int] = weakref.WeakKeyDictionary()
+        self._next_tid = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def enable(self, path: Path | None = None) -> None:
+        """Starts recording; with ``path``, the trace is written there at exit."""
+        if path is not None and self.path is None:
+            atexit.register(self._write_at_exit)
+        self.enabled = True
+        self.path = path or self.path
+
+    def span(self, name: str, **args: Any) -> Span | _NullSpan:
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def instant(self, name: str, **args: Any) -> None:
+        if not self.enabled:
+            return
+        self._add(
+            {
+                "name": name,
+                "ph": "i",
+                "s": "t",
+                "ts": (time.perf_counter() - self.origin) * 1e6,
+                "pid": self._pid,
+                "tid": self._track(),
+                "args": args,
+            }
+        )
+
+    def _complete(
+        self, name: str, start: float, end: float, args: dict[str, Any]
+    ) -> None:
+        self._add(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": self._pid,
+                "tid": self._track(),
+                "args": args,
+            }
+        )
+
+    def _add(self, event: dict[str, Any]) -> None:
+        if len(self._events) >= self.max_events:
+            self.dropped += 1
+            return
+        self._events.append(event)
+
+    def _track(self) -> int:
+        try:
+            owner: Any = asyncio.current_task()
+        except RuntimeError:
+            owner = None
+        if owner is None:
+            owner = threading.current_thread()
+
+        tid = self._tracks.get(owner)
+        if tid is not None:
+            return tid
+
+        with self._lock:
+            self._next_tid += 1
+            tid = self._next_tid
+            self._tracks[owner] = tid
+            name = owner.get_name() if isinstance(owner, asyncio.Task) else owner.name
+            self._events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+            )
+        return tid
+
+    def write(self, path: Path) -> None:
+        import json
+
+        trace = {
+            "traceEvents": list(self._events),
+            "displayTimeUnit": "ms",
+            "otherData": {"dropped_events": self.dropped},
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(trace, f, default=str)
+        os.replace(tmp_path, path)
+
+    def _write_at_exit(self) -> None:
+        if self.enabled and self.path is not None:
+            self.write(self.path)
+
+
+_tracer: Tracer | None = None
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer